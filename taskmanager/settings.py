@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tasks.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,11 +77,62 @@ WSGI_APPLICATION = 'taskmanager.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# Database profile, picked with DB_PROFILE: 'sqlite' (default) or a server database
+# ('postgresql', 'mysql') configured by DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT.
+# Connections are kept for DB_CONN_MAX_AGE seconds and checked before reuse.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+if DB_PROFILE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Take the write lock when a transaction starts: with WAL, a deferred
+                # transaction that later tries to write fails at once instead of
+                # waiting for busy_timeout.
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+elif DB_PROFILE in ('postgresql', 'mysql'):
+    DATABASES = {
+        'default': {
+            'ENGINE': f'django.db.backends.{DB_PROFILE}',
+            'NAME': os.environ.get('DB_NAME', 'taskmanager'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', ''),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
+    if DB_PROFILE == 'postgresql' and os.environ.get('DB_POOL'):
+        # psycopg's connection pool (needs psycopg[pool]); it replaces persistent connections.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+            },
+        }
+else:
+    raise ValueError(f"Unknown DB_PROFILE {DB_PROFILE!r}; use 'sqlite', 'postgresql' or 'mysql'.")
+
+# Applied to every new SQLite connection (tasks/db.py). WAL lets readers carry on
+# while a write is in progress; synchronous=NORMAL is safe with WAL and avoids an
+# fsync per commit. busy_timeout is in ms, mmap_size in bytes, and a negative
+# cache_size is in KiB.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
 }
 
 if 'PYTHONANYWHERE_DOMAIN' in os.environ:
@@ -135,14 +187,100 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Activity events are kept in memory and written with one bulk_create once
+# ACTIVITY_BUFFER_SIZE are waiting, or when a request finishes and the oldest one
+# has waited ACTIVITY_FLUSH_INTERVAL seconds (after the commit when a transaction
+# is open, see tasks/activity.py). False stops recording them.
+ACTIVITY_EVENTS_ENABLED = True
+ACTIVITY_BUFFER_SIZE = 100
+ACTIVITY_FLUSH_INTERVAL = 2.0
+ACTIVITY_RETENTION_DAYS = 90
+
+# Pagination for the HTML list pages and the API; ?page_size= is capped at MAX_PAGE_SIZE.
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# Search pages past this one are a 404: each page reads every earlier hit of
+# every model, so the limit bounds the rows a single search can read.
+SEARCH_MAX_PAGES = 40
+
+# Largest array the /api/<items>/bulk/ endpoints accept in one request.
+BULK_MAX_ITEMS = 1000
+
+# Rows fetched per database round trip by the streaming export.
+EXPORT_CHUNK_SIZE = 2000
+
+# Changes returned per /api/sync/ call (?limit= can ask for up to SYNC_MAX_PAGE_SIZE).
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 1000
+# Server databases can commit log rows out of id order; /api/sync/ only serves rows
+# older than this many seconds there (see tasks/sync.py). SQLite commits in order.
+SYNC_COMMIT_LAG = 0 if DB_PROFILE == 'sqlite' else 5
+
+# Local memory by default; any Django cache backend (file, Redis, memcached) works.
+# LocMemCache is private to each process, and so are the API cache's version tokens:
+# with several worker processes, a write only invalidates the responses (and list
+# ETags) of the process that made it, and the others serve stale ones for up to
+# API_CACHE_TIMEOUT. Run those deployments on a shared backend, or turn
+# API_CACHE_ENABLED off.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'taskmanager',
+    },
+}
+
+# GET responses of the item list/detail API are cached per model, user and query
+# string, and invalidated when an item is saved or deleted (see tasks/cache.py).
+API_CACHE_ENABLED = True
+API_CACHE_TIMEOUT = 300
+
+# Admin changelists count rows exactly up to ADMIN_EXACT_COUNT_LIMIT. Above that they
+# use the item counters, or a planner estimate / exact count cached for
+# ADMIN_COUNT_CACHE_TIMEOUT seconds (see tasks/changelist.py).
+ADMIN_EXACT_COUNT_LIMIT = 10_000
+ADMIN_COUNT_CACHE_TIMEOUT = 300
+
+# The /api/feed/ change stream (tasks/feed.py). FEED_BROKER is the class that fans
+# events out; the in-process default only reaches clients of the same server
+# process. A client is dropped (and told to reload) when FEED_QUEUE_SIZE events
+# are waiting for it; FEED_HEARTBEAT is the keep-alive interval in seconds.
+FEED_BROKER = 'tasks.feed.LocalBroker'
+FEED_QUEUE_SIZE = 1000
+FEED_HEARTBEAT = 15
+FEED_RETRY_MS = 3000
+
+# Per-view request metrics (tasks/metrics.py), scraped from /metrics by staff or
+# with "Authorization: Bearer $METRICS_TOKEN". METRICS_WINDOW is the number of
+# recent samples the percentiles are computed from.
+METRICS_ENABLED = True
+METRICS_WINDOW = 1000
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Send a Server-Timing header (DB and total time) that browser dev tools show.
+METRICS_SERVER_TIMING = DEBUG
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'tasks.pagination.KeysetPagination',
+    'PAGE_SIZE': PAGE_SIZE,
+}
+
+# Log records are queued and written to LOG_FILE (app.log by default) as JSON lines by a background thread,
+# so requests never wait on the disk. When the queue is full the policy decides:
+# 'drop_newest', 'drop_oldest', or 'block' (wait up to block_timeout seconds, then drop).
+LOG_FILE = os.environ.get('LOG_FILE', os.path.join(BASE_DIR, 'app.log'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'app.log',
+            'class': 'tasks.log_handlers.BatchingQueueHandler',
+            'filename': LOG_FILE,
+            'maxsize': 10000,
+            'policy': 'drop_oldest',
+            'batch_size': 200,
+            'flush_interval': 0.5,
         },
     },
     'loggers': {
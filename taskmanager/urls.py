@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.urls import path, include
-from tasks.views import home
+from tasks.views import home, metrics
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -8,4 +8,5 @@ urlpatterns = [
     path("", include("tasks.urls")),               
     path("api/", include("tasks.api_urls")),       
     path("accounts/", include("django.contrib.auth.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -0,0 +1,116 @@
+import asyncio
+import atexit
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+
+
+logger = logging.getLogger('project')
+
+
+class ActivityBuffer:
+    """
+    Collects ActivityEvent rows in memory and writes them with one bulk_create.
+    It flushes when ACTIVITY_BUFFER_SIZE events are waiting. When a request
+    finishes, it also flushes if the oldest event has waited longer than
+    ACTIVITY_FLUSH_INTERVAL seconds.
+
+    The buffer holds the events of every request in the process. A flush that
+    one of them triggers inside its own transaction therefore waits for the
+    commit; if that transaction rolls back, the events stay buffered for the
+    next flush.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.oldest = None
+        self.lock = threading.Lock()
+
+    def add(self, event):
+        with self.lock:
+            if not self.events:
+                self.oldest = time.monotonic()
+            self.events.append(event)
+            full = len(self.events) >= settings.ACTIVITY_BUFFER_SIZE
+        if full:
+            self.flush_soon()
+
+    def is_due(self):
+        oldest = self.oldest
+        return oldest is not None and time.monotonic() - oldest >= settings.ACTIVITY_FLUSH_INTERVAL
+
+    def flush_soon(self):
+        """flush() now, or once the current transaction commits."""
+        if connection.in_atomic_block:
+            transaction.on_commit(self.flush)
+        else:
+            self.flush()
+
+    def flush(self):
+        from .models import ActivityEvent
+
+        with self.lock:
+            events, self.events, self.oldest = self.events, [], None
+        if events:
+            ActivityEvent.objects.bulk_create(events, batch_size=500)
+        return len(events)
+
+    def clear(self):
+        with self.lock:
+            self.events, self.oldest = [], None
+
+
+activity_buffer = ActivityBuffer()
+atexit.register(activity_buffer.flush)
+
+
+_flush_tasks = set()
+
+
+def flush_activity_if_due(**kwargs):
+    if not settings.ACTIVITY_EVENTS_ENABLED or not activity_buffer.is_due():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        activity_buffer.flush_soon()
+        return
+    # ASGI responses finish on the event loop, where the ORM cannot run.
+    task = loop.create_task(sync_to_async(activity_buffer.flush_soon)())
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
+
+
+def log_activity(user, action, message, model=None, obj=None, level=logging.INFO, **details):
+    """
+    Log a user action. Besides the readable message, the record carries an
+    ``activity`` dict (user, action, model, object id) that the JSON formatter
+    writes out as separate fields. The action is also queued as an ActivityEvent.
+    """
+    from .models import ActivityEvent
+
+    activity = {
+        'user': str(user),
+        'user_id': getattr(user, 'pk', None),
+        'action': action,
+        'model': model.__name__ if model is not None else None,
+        'object_id': getattr(obj, 'pk', None),
+    }
+    activity.update(details)
+    logger.log(level, message, extra={'activity': activity})
+
+    if not settings.ACTIVITY_EVENTS_ENABLED:
+        return
+    activity_buffer.add(ActivityEvent(
+        user_id=activity['user_id'],
+        username=activity['user'] if activity['user_id'] else '',
+        action=action,
+        model_name=activity['model'] or '',
+        object_id=activity['object_id'],
+        title=(getattr(obj, 'title', '') or '')[:200],
+        query=(details.get('query') or '')[:200],
+    ))
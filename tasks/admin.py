@@ -1,6 +1,15 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django.contrib.auth.models import User  
-from .models import Task, BugReport, Note
+from django.core.exceptions import ValidationError
+from django.db.models import Count
+from .models import Task, BugReport, Note, ActivityEvent, Tag
+from .activity import log_activity
+from .bulk import queryset_delete, queryset_update
+from .changelist import ApproximateCountPaginator, CountingChangeList, is_unfiltered
+from .counters import item_count
+from .query_shaping import QueryShape
 
 class BaseItemAdminMixin:
 
@@ -9,13 +18,36 @@ class BaseItemAdminMixin:
     search_fields = ('title', 'description')
     readonly_fields = ('created_at', 'updated_at')
     date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+    # Changelists join the users they display and never show the description.
+    list_shape = QueryShape(select_related=('owner',), defer=('description',))
+    # Large tables: approximate counts above ADMIN_EXACT_COUNT_LIMIT, no unfiltered
+    # total, and a date hierarchy read from the day counters (tasks/changelist.py).
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/tasks/item_change_list.html'
     
+    def get_changelist(self, request, **kwargs):
+        return CountingChangeList
+
+    def get_owner_scope(self, request):
+        """The owner whose items ``request.user`` sees here; None for everyone's."""
+        return None if request.user.is_superuser else request.user.pk
+
     def get_queryset(self, request):
 
         qs = super().get_queryset(request)
-        if request.user.is_superuser:
+        owner_id = self.get_owner_scope(request)
+        if owner_id is None:
             return qs
-        return qs.filter(owner=request.user)
+        return qs.filter(owner_id=owner_id)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        known_count = None
+        if is_unfiltered(request.GET):
+            owner_id = self.get_owner_scope(request)
+            known_count = lambda: item_count(self.model, owner_id)
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, known_count=known_count)
     
     def save_model(self, request, obj, form, change):
 
@@ -23,10 +55,51 @@ class BaseItemAdminMixin:
             obj.owner = request.user
         super().save_model(request, obj, form, change)
 
+    # Actions write with one UPDATE or DELETE for the whole selection (tasks/bulk.py);
+    # the queryset they get is already scoped by get_queryset().
+
+    def update_selected(self, request, queryset, change, **values):
+        changed = queryset_update(queryset, **values)
+        log_activity(
+            request.user, 'updated',
+            f"User '{request.user}' {change} on {len(changed)} {self.model.__name__} item(s) in the admin",
+            model=self.model, count=len(changed),
+        )
+        self.message_user(request, f"{len(changed)} {self.model._meta.verbose_name_plural} updated.")
+
+    def delete_queryset(self, request, queryset):
+        # Used by the "Delete selected" action.
+        deleted = queryset_delete(queryset)
+        log_activity(
+            request.user, 'deleted',
+            f"User '{request.user}' deleted {len(deleted)} {self.model.__name__} item(s) in the admin",
+            model=self.model, count=len(deleted),
+        )
+
+    @admin.action(description="Set the status of selected %(verbose_name_plural)s", permissions=['change'])
+    def set_status(self, request, queryset):
+        status = request.POST.get('status')
+        if status not in dict(self.model.STATUS_CHOICES):
+            self.message_user(request, "Choose a status to set.", messages.WARNING)
+            return
+        self.update_selected(request, queryset, f"set status '{status}'", status=status)
+
+
+class TaskActionForm(ActionForm):
+    status = forms.ChoiceField(choices=[('', '---------')] + Task.STATUS_CHOICES, required=False)
+    assigned_to = forms.ModelChoiceField(User.objects.order_by('username'), required=False, label='Assign to')
+
+
+class BugReportActionForm(ActionForm):
+    status = forms.ChoiceField(choices=[('', '---------')] + BugReport.STATUS_CHOICES, required=False)
+
 @admin.register(Task)
 class TaskAdmin(BaseItemAdminMixin, admin.ModelAdmin):
     list_display = BaseItemAdminMixin.list_display + ('assigned_to', 'status', 'priority')
     list_filter = BaseItemAdminMixin.list_filter + ('status', 'priority', 'assigned_to')
+    list_shape = QueryShape(select_related=('owner', 'assigned_to'), defer=('description',))
+    action_form = TaskActionForm
+    actions = ['set_status', 'reassign']
     
     fieldsets = (
         ('Basic Information', {
@@ -37,12 +110,26 @@ class TaskAdmin(BaseItemAdminMixin, admin.ModelAdmin):
         }),
 
     )
+
+    @admin.action(description="Assign selected tasks to", permissions=['change'])
+    def reassign(self, request, queryset):
+        try:
+            user = self.action_form.base_fields['assigned_to'].clean(request.POST.get('assigned_to'))
+        except ValidationError:
+            user = None
+        if user is None:
+            self.message_user(request, "Choose a user to assign the tasks to.", messages.WARNING)
+            return
+        self.update_selected(request, queryset, f"assigned to '{user}'", assigned_to=user)
     
 
 @admin.register(BugReport)
-class BugReportAdmin(admin.ModelAdmin, BaseItemAdminMixin):
+class BugReportAdmin(BaseItemAdminMixin, admin.ModelAdmin):
     list_display = BaseItemAdminMixin.list_display + ('severity', 'status')
     list_filter = BaseItemAdminMixin.list_filter + ('severity', 'status')
+    list_shape = QueryShape(select_related=('owner',), defer=('description', 'expected_result'))
+    action_form = BugReportActionForm
+    actions = ['set_status']
     
     fieldsets = (
         ('Basic Information', {
@@ -61,10 +148,12 @@ class BugReportAdmin(admin.ModelAdmin, BaseItemAdminMixin):
         return base_list
 
 @admin.register(Note)
-class NoteAdmin(admin.ModelAdmin, BaseItemAdminMixin):
+class NoteAdmin(BaseItemAdminMixin, admin.ModelAdmin):
     list_display = BaseItemAdminMixin.list_display + ('note_type', 'is_pinned')
     list_filter = BaseItemAdminMixin.list_filter + ('note_type', 'is_pinned')
-    search_fields = BaseItemAdminMixin.search_fields + ('tags',)
+    # Exact tag match through the tag index instead of a substring scan of every note.
+    search_fields = BaseItemAdminMixin.search_fields + ('=tag_set__name',)
+    actions = ['pin', 'unpin']
     
     fieldsets = (
         ('Basic Information', {
@@ -83,3 +172,40 @@ class NoteAdmin(admin.ModelAdmin, BaseItemAdminMixin):
             return qs
         return qs.filter(owner=request.user)
 
+    @admin.action(description="Pin selected notes", permissions=['change'])
+    def pin(self, request, queryset):
+        self.update_selected(request, queryset, "pinned", is_pinned=True)
+
+    @admin.action(description="Unpin selected notes", permissions=['change'])
+    def unpin(self, request, queryset):
+        self.update_selected(request, queryset, "unpinned", is_pinned=False)
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('name', 'note_count')
+    search_fields = ('name',)
+    ordering = ('name',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(note_count=Count('note_links'))
+
+    @admin.display(ordering='note_count')
+    def note_count(self, obj):
+        return obj.note_count
+
+
+@admin.register(ActivityEvent)
+class ActivityEventAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'username', 'action', 'model_name', 'object_id', 'title')
+    list_filter = ('action', 'model_name')
+    search_fields = ('username', 'title', 'query')
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+
+    # The trail is written by the app only.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,8 +1,11 @@
 from django.urls import path
+from . import async_views
 from .api_views import (
-    TaskListCreateAPIView, TaskRetrieveUpdateDestroyAPIView,
-    BugReportListCreateAPIView, BugReportRetrieveUpdateDestroyAPIView,
-    NoteListCreateAPIView, NoteRetrieveUpdateDestroyAPIView,
+    TaskListCreateAPIView, TaskRetrieveUpdateDestroyAPIView, TaskBulkAPIView,
+    BugReportListCreateAPIView, BugReportRetrieveUpdateDestroyAPIView, BugReportBulkAPIView,
+    NoteListCreateAPIView, NoteRetrieveUpdateDestroyAPIView, NoteBulkAPIView,
+    SearchAPIView, SyncAPIView, ExportAPIView, ActivityEventListAPIView, CacheStatsAPIView,
+    StatsAPIView, TagListAPIView, TagAutocompleteAPIView,
 )
 
 urlpatterns = [
@@ -11,16 +14,71 @@ urlpatterns = [
     # --------------------
     path("tasks/", TaskListCreateAPIView.as_view(), name="api-task-list"),
     path("tasks/<int:pk>/", TaskRetrieveUpdateDestroyAPIView.as_view(), name="api-task-detail"),
+    path("tasks/bulk/", TaskBulkAPIView.as_view(), name="api-task-bulk"),
 
     # --------------------
     # 🔹 BugReport API
     # --------------------
     path("bugs/", BugReportListCreateAPIView.as_view(), name="api-bug-list"),
     path("bugs/<int:pk>/", BugReportRetrieveUpdateDestroyAPIView.as_view(), name="api-bug-detail"),
+    path("bugs/bulk/", BugReportBulkAPIView.as_view(), name="api-bug-bulk"),
 
     # --------------------
     # 🔹 Note API
     # --------------------
     path("notes/", NoteListCreateAPIView.as_view(), name="api-note-list"),
     path("notes/<int:pk>/", NoteRetrieveUpdateDestroyAPIView.as_view(), name="api-note-detail"),
+    path("notes/bulk/", NoteBulkAPIView.as_view(), name="api-note-bulk"),
+
+    # --------------------
+    # 🔹 Tags API
+    # --------------------
+    path("tags/", TagListAPIView.as_view(), name="api-tag-list"),
+    path("tags/autocomplete/", TagAutocompleteAPIView.as_view(), name="api-tag-autocomplete"),
+
+    # --------------------
+    # 🔹 Search API
+    # --------------------
+    path("search/", SearchAPIView.as_view(), name="api-search"),
+
+    # --------------------
+    # 🔹 Sync API
+    # --------------------
+    path("sync/", SyncAPIView.as_view(), name="api-sync"),
+
+    # --------------------
+    # 🔹 Export API
+    # --------------------
+    path("export/<slug:kind>.<slug:fmt>", ExportAPIView.as_view(), name="api-export"),
+
+    # --------------------
+    # 🔹 Async read API (same responses, async ORM; for ASGI servers)
+    # --------------------
+    path("async/tasks/", async_views.AsyncTaskListView.as_view(), name="api-async-task-list"),
+    path("async/tasks/<int:pk>/", async_views.AsyncTaskDetailView.as_view(), name="api-async-task-detail"),
+    path("async/bugs/", async_views.AsyncBugReportListView.as_view(), name="api-async-bug-list"),
+    path("async/bugs/<int:pk>/", async_views.AsyncBugReportDetailView.as_view(), name="api-async-bug-detail"),
+    path("async/notes/", async_views.AsyncNoteListView.as_view(), name="api-async-note-list"),
+    path("async/notes/<int:pk>/", async_views.AsyncNoteDetailView.as_view(), name="api-async-note-detail"),
+    path("async/search/", async_views.search_api, name="api-async-search"),
+
+    # --------------------
+    # 🔹 Change feed (Server-Sent Events; ASGI only)
+    # --------------------
+    path("feed/", async_views.change_feed, name="api-feed"),
+
+    # --------------------
+    # 🔹 Activity API
+    # --------------------
+    path("activity/", ActivityEventListAPIView.as_view(), name="api-activity"),
+
+    # --------------------
+    # 🔹 Dashboard counters API
+    # --------------------
+    path("stats/", StatsAPIView.as_view(), name="api-stats"),
+
+    # --------------------
+    # 🔹 Cache stats API (staff only)
+    # --------------------
+    path("cache/stats/", CacheStatsAPIView.as_view(), name="api-cache-stats"),
 ]
@@ -1,61 +1,212 @@
+from django.core.paginator import InvalidPage
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from rest_framework import generics, permissions
-from django.db.models import Q
-from .models import Task, BugReport, Note
-from .serializers import TaskSerializer, BugReportSerializer, NoteSerializer
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from .models import Task, BugReport, Note, ActivityEvent
+from .serializers import (
+    TaskSerializer, BugReportSerializer, NoteSerializer, SearchHitSerializer, ActivityEventSerializer,
+)
+from .pagination import get_page_size
+from .query_shaping import QueryShape, QueryShapeMixin
+from .activity import activity_buffer, log_activity
+from .cache import CachedResponseMixin, cache_stats
+from .counters import user_counters
+from .conditional import ListConditionalMixin, ObjectConditionalMixin
+from .bulk import bulk_create_items, bulk_delete_items, bulk_update_items, check_batch_size
 from .permissions import IsOwnerOrReadOnly
-import logging
+from .facets import apply_filters, counter_facet_counts, facet_counts, format_facets, parse_filters
+from .export import EXPORTS, FORMATS, export_lines
+from .search import search_all, search_queryset
+from .sync import changes_since
+from .tags import autocomplete, notes_tagged, tag_counts
 
-logger = logging.getLogger('project')
-
-class BaseItemListCreateAPIView(generics.ListCreateAPIView):
+class BaseItemListCreateAPIView(ListConditionalMixin, CachedResponseMixin, QueryShapeMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    # Serializers send owner/assigned_to as ids straight off the row, so lists need no joins;
+    # subclasses can still declare a query_shape.
+    ordering = ('-created_at', '-id')
 
-    def get_queryset(self):
-        queryset = self.model.objects.all()
+    def get_ordering(self):
+        if self.request.GET.get("q"):
+            return ('search_rank',) + self.ordering
+        return self.ordering
+
+    # ?field= filters with per-value counts on the first page (see tasks/facets.py).
+    facet_fields = ()
+    # Parameters that narrow the list besides the facets; without them the
+    # facet counts are read from the dashboard counters where those cover the filters.
+    narrowing_params = ("q",)
+
+    def get_base_queryset(self):
+        """The list before the facet filters are applied."""
+        queryset = super().get_queryset()
         query = self.request.GET.get("q") 
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) | Q(description__icontains=query)
-            )
+            queryset = search_queryset(queryset, query)
         return queryset
 
+    def get_queryset(self):
+        return apply_filters(self.get_base_queryset(), self.get_filters())
+
+    def get_filters(self):
+        if not hasattr(self, "_filters"):
+            self._filters = parse_filters(self.model, self.request.GET, self.facet_fields)
+        return self._filters
+
+    def show_facets(self):
+        # Paging does not change the counts, so only the first page carries them.
+        return bool(self.facet_fields) and self.pagination_class.cursor_query_param not in self.request.GET
+
+    def get_facets(self):
+        counts = None
+        if not any(self.request.GET.get(param) for param in self.narrowing_params):
+            counts = counter_facet_counts(self.model, self.facet_fields, self.get_filters())
+        if counts is None:
+            counts = facet_counts(self.get_base_queryset(), self.get_filters(), self.facet_fields)
+        return format_facets(self.model, counts)
+
+    def get_validator_queryset(self):
+        # A facet also counts rows the facet filters leave out of the page.
+        if self.show_facets():
+            return self.get_base_queryset()
+        return super().get_validator_queryset()
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self.show_facets():
+            response.data["facets"] = self.get_facets()
+        return response
+
     def perform_create(self, serializer):
         instance = serializer.save(owner=self.request.user)
-        logger.info(f"User '{self.request.user}' created a new {self.model.__name__} titled '{instance.title}'")
+        log_activity(
+            self.request.user, 'created',
+            f"User '{self.request.user}' created a new {self.model.__name__} titled '{instance.title}'",
+            model=self.model, obj=instance,
+        )
 
         
-class BaseItemRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class BaseItemRetrieveUpdateDestroyAPIView(ObjectConditionalMixin, CachedResponseMixin, QueryShapeMixin,
+                                           generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    # The (owner, title) uniqueness check on update reads instance.owner.
+    query_shape = QueryShape(select_related=('owner',))
+
+    def get_object(self):
+        # retrieve() logs the object before the generic view fetches it again; load it once.
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        logger.info(f"User '{request.user}' viewed details of {self.model.__name__} titled '{instance.title}'")
+        self.log_viewed(self.get_object())
         return super().retrieve(request, *args, **kwargs)
 
+    def update(self, request, *args, **kwargs):
+        # If-Match: only write over the version the client last saw.
+        return self.check_preconditions(request) or super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return self.check_preconditions(request) or super().destroy(request, *args, **kwargs)
+
+    def cache_hit(self, data):
+        self.log_viewed(self.model(pk=data['id'], title=data['title']))
+
+    def log_viewed(self, instance):
+        log_activity(
+            self.request.user, 'viewed',
+            f"User '{self.request.user}' viewed details of {self.model.__name__} titled '{instance.title}'",
+            model=self.model, obj=instance,
+        )
+
     def perform_update(self, serializer):
         instance = serializer.save()
-        logger.info(f"User '{self.request.user}' updated {self.model.__name__} titled '{instance.title}'")
+        log_activity(
+            self.request.user, 'updated',
+            f"User '{self.request.user}' updated {self.model.__name__} titled '{instance.title}'",
+            model=self.model, obj=instance,
+        )
 
     def perform_destroy(self, instance):
-        logger.info(f"User '{self.request.user}' deleted {self.model.__name__} titled '{instance.title}'")
+        log_activity(
+            self.request.user, 'deleted',
+            f"User '{self.request.user}' deleted {self.model.__name__} titled '{instance.title}'",
+            model=self.model, obj=instance,
+        )
         super().perform_destroy(instance)
 
 
 
 
+class BaseItemBulkAPIView(APIView):
+    """
+    Write many items in one request: POST a list of new items, PATCH a list of
+    partial updates (each with its ``id``), DELETE a list of ids. Items that fail
+    validation are reported under ``errors`` by index; the rest are still written.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_batch(self, request):
+        message = check_batch_size(request.data)
+        if message:
+            raise ValidationError({"non_field_errors": [message]})
+        return request.data
+
+    def respond(self, key, result, data, success_status=status.HTTP_200_OK):
+        log_activity(
+            self.request.user, key,
+            f"User '{self.request.user}' {key} {len(result.objects)} {self.model.__name__} item(s) in bulk",
+            model=self.model, count=len(result.objects), errors=len(result.errors),
+        )
+        return Response(
+            {key: data, "errors": result.errors},
+            status=success_status if result.objects or not result.errors else status.HTTP_400_BAD_REQUEST,
+        )
+
+    def post(self, request, *args, **kwargs):
+        result = bulk_create_items(
+            self.serializer_class, self.get_batch(request), request.user, {"request": request},
+        )
+        data = self.serializer_class(result.objects, many=True).data
+        return self.respond("created", result, data, status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        result = bulk_update_items(
+            self.serializer_class, self.get_batch(request), request.user, {"request": request},
+        )
+        data = self.serializer_class(result.objects, many=True).data
+        return self.respond("updated", result, data)
+
+    def delete(self, request, *args, **kwargs):
+        result = bulk_delete_items(self.model, self.get_batch(request), request.user)
+        return self.respond("deleted", result, [obj.pk for obj in result.objects])
+
+
 class TaskListCreateAPIView(BaseItemListCreateAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     model = Task
+    facet_fields = ('status', 'priority', 'assigned_to')
 
 class TaskRetrieveUpdateDestroyAPIView(BaseItemRetrieveUpdateDestroyAPIView):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     model = Task
 
+class TaskBulkAPIView(BaseItemBulkAPIView):
+    serializer_class = TaskSerializer
+    model = Task
+
 class BugReportListCreateAPIView(BaseItemListCreateAPIView):
     queryset = BugReport.objects.all()
     serializer_class = BugReportSerializer
     model = BugReport
+    facet_fields = ('status', 'severity')
 
 
 class BugReportRetrieveUpdateDestroyAPIView(BaseItemRetrieveUpdateDestroyAPIView):
@@ -63,11 +214,22 @@ class BugReportRetrieveUpdateDestroyAPIView(BaseItemRetrieveUpdateDestroyAPIView
     serializer_class = BugReportSerializer
     model = BugReport
 
+class BugReportBulkAPIView(BaseItemBulkAPIView):
+    serializer_class = BugReportSerializer
+    model = BugReport
+
 class NoteListCreateAPIView(BaseItemListCreateAPIView):
     queryset = Note.objects.all()
     serializer_class = NoteSerializer
     model = Note
 
+    facet_fields = ('note_type', 'is_pinned')
+    narrowing_params = ("q", "tag")
+
+    def get_base_queryset(self):
+        # ?tag=work&tag=urgent: notes carrying every one of the tags.
+        return notes_tagged(super().get_base_queryset(), self.request.GET.getlist("tag"))
+
 
 class NoteRetrieveUpdateDestroyAPIView(BaseItemRetrieveUpdateDestroyAPIView):
     queryset = Note.objects.all()
@@ -75,4 +237,161 @@ class NoteRetrieveUpdateDestroyAPIView(BaseItemRetrieveUpdateDestroyAPIView):
     model = Note
 
 
+class NoteBulkAPIView(BaseItemBulkAPIView):
+    serializer_class = NoteSerializer
+    model = Note
 
+
+class SearchAPIView(APIView):
+    """One relevance-ranked result stream across tasks, bug reports and notes."""
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("q", "").strip()
+        try:
+            page_number = max(1, int(request.GET.get("page", 1)))
+        except ValueError:
+            page_number = 1
+
+        hits, has_next = [], False
+        if query:
+            try:
+                page = search_all(query, page_number, get_page_size(request))
+            except InvalidPage as exc:
+                raise NotFound(str(exc))
+            hits, has_next = page.object_list, page.has_next()
+        log_activity(
+            request.user, 'searched', f"User '{request.user}' searched for '{query}' through the API",
+            query=query,
+        )
+
+        url = request.build_absolute_uri()
+        return Response({
+            "query": query,
+            "page": page_number,
+            "next": replace_query_param(url, "page", page_number + 1) if has_next else None,
+            "previous": replace_query_param(url, "page", page_number - 1) if page_number > 1 else None,
+            "results": SearchHitSerializer(hits, many=True, context={"request": request}).data,
+        })
+
+
+class ExportAPIView(APIView):
+    """
+    Stream every task, bug report or note as NDJSON or CSV, e.g.
+    /api/export/tasks.ndjson or /api/export/bugs.csv.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, kind, fmt, *args, **kwargs):
+        if kind not in EXPORTS or fmt not in FORMATS:
+            raise NotFound(f"Export formats: {', '.join(FORMATS)}; kinds: {', '.join(EXPORTS)}.")
+        model = EXPORTS[kind][0]
+        log_activity(
+            request.user, 'exported', f"User '{request.user}' exported all {model.__name__} items as {fmt}",
+            model=model,
+        )
+        response = StreamingHttpResponse(export_lines(kind, fmt), content_type=FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="{kind}.{fmt}"'
+        return response
+
+
+class SyncAPIView(APIView):
+    """
+    Everything created, updated or deleted after ``?cursor=`` (0, or nothing, for a
+    full sync). Keep the returned ``cursor`` for the next call; while ``has_more``
+    is true there are more changes to fetch right away.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            cursor = int(request.GET.get("cursor", 0))
+            limit = int(request.GET["limit"]) if request.GET.get("limit") else None
+        except ValueError:
+            raise ValidationError({"cursor": "cursor and limit must be whole numbers."})
+        if cursor < 0 or (limit is not None and limit < 1):
+            raise ValidationError({"cursor": "cursor and limit must be whole numbers."})
+
+        changes, next_cursor, has_more = changes_since(cursor, limit, context={"request": request})
+        return Response({"cursor": next_cursor, "has_more": has_more, "changes": changes})
+
+
+class StatsAPIView(APIView):
+    """
+    The user's items broken down by status, priority, severity and note type,
+    as owner and (tasks) as assignee. Read from the materialized counters.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response(user_counters(request.user))
+
+
+def _limit(request, default, maximum=100):
+    try:
+        return min(maximum, max(1, int(request.GET.get("limit", default))))
+    except ValueError:
+        return default
+
+
+class TagListAPIView(APIView):
+    """Tags in use with their note counts, most used first; ``prefix`` narrows them."""
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        counts = tag_counts(request.GET.get("prefix", ""), _limit(request, 50))
+        return Response([{"name": name, "count": count} for name, count in counts])
+
+
+class TagAutocompleteAPIView(APIView):
+    """Names of the tags in use starting with ``q``."""
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        return Response(autocomplete(request.GET.get("q", ""), _limit(request, 10)))
+
+
+class CacheStatsAPIView(APIView):
+    """Hit and miss counts of the item API response cache, per model."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(cache_stats([Task, BugReport, Note]))
+
+
+class ActivityEventListAPIView(generics.ListAPIView):
+    """
+    The activity trail, newest first. Staff see everyone's events and can filter
+    by ``user``; everyone else only sees their own. Also filters on ``model``,
+    ``action`` and a ``since``/``until`` time range.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = ActivityEventSerializer
+    ordering = ('-created_at', '-id')
+
+    def get_ordering(self):
+        return self.ordering
+
+    def get_queryset(self):
+        # Show events still waiting in the buffer too.
+        activity_buffer.flush()
+        queryset = ActivityEvent.objects.all()
+        params = self.request.GET
+
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        elif params.get("user"):
+            user = params["user"]
+            queryset = queryset.filter(user_id=user) if user.isdigit() else queryset.filter(username=user)
+
+        if params.get("model"):
+            queryset = queryset.filter(model_name__iexact=params["model"])
+        if params.get("action"):
+            queryset = queryset.filter(action=params["action"])
+        for param, lookup in (("since", "created_at__gte"), ("until", "created_at__lt")):
+            if params.get(param):
+                value = parse_datetime(params[param])
+                if value is None:
+                    raise ValidationError({param: "Expected an ISO 8601 date and time."})
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
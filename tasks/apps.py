@@ -1,6 +1,56 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_delete, pre_save
+
+
+def create_search_index(sender, using="default", **kwargs):
+    from .search import ensure_search_index
+    ensure_search_index(using=using)
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from django.contrib.auth.models import User
+        from .activity import flush_activity_if_due
+        from .db import configure_connection
+        from .metrics import install_query_timer
+        from .cache import invalidate_assigned_tasks, invalidate_bulk, invalidate_item
+        from .counters import (
+            count_bulk, count_delete, count_save, drop_user_counters, load_current_values, remember_values,
+        )
+        from .feed import publish_bulk, publish_delete, publish_save
+        from .models import Task, BugReport, Note
+        from .signals import items_bulk_changed
+        from .sync import record_assigned_tasks, record_bulk, record_delete, record_save
+        from .tags import remember_tags, sync_bulk_tags, sync_note_tags
+
+        connection_created.connect(configure_connection)
+        connection_created.connect(install_query_timer)
+        post_migrate.connect(create_search_index, sender=self)
+        request_finished.connect(flush_activity_if_due)
+
+        for model in (Task, BugReport, Note):
+            post_save.connect(invalidate_item, sender=model)
+            post_delete.connect(invalidate_item, sender=model)
+            items_bulk_changed.connect(invalidate_bulk, sender=model)
+            post_save.connect(record_save, sender=model)
+            post_delete.connect(record_delete, sender=model)
+            items_bulk_changed.connect(record_bulk, sender=model)
+            post_init.connect(remember_values, sender=model)
+            pre_save.connect(load_current_values, sender=model)
+            post_save.connect(count_save, sender=model)
+            post_delete.connect(count_delete, sender=model)
+            items_bulk_changed.connect(count_bulk, sender=model)
+            post_save.connect(publish_save, sender=model)
+            post_delete.connect(publish_delete, sender=model)
+            items_bulk_changed.connect(publish_bulk, sender=model)
+        post_init.connect(remember_tags, sender=Note)
+        post_save.connect(sync_note_tags, sender=Note)
+        items_bulk_changed.connect(sync_bulk_tags, sender=Note)
+        pre_delete.connect(invalidate_assigned_tasks, sender=User)
+        pre_delete.connect(record_assigned_tasks, sender=User)
+        post_delete.connect(drop_user_counters, sender=User)
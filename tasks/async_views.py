@@ -0,0 +1,154 @@
+"""
+Async versions of the item list/detail API and the search API, for the ASGI
+entry point (taskmanager/asgi.py). They use the async ORM, so under an ASGI
+server a request waiting on the database does not hold a worker thread.
+
+DRF views are synchronous, so these are plain Django views. They return the
+same JSON as the DRF endpoints and reuse the same serializers; serializing
+loaded rows never touches the database.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+from .activity import log_activity
+from .feed import event_stream, feed_filter, get_broker
+from .models import Task, BugReport, Note
+from .pagination import KeysetPagination, get_page_size
+from .search import asearch_all, search_queryset
+from .sync import SYNC_SERIALIZERS, current_cursor
+from .serializers import TaskSerializer, BugReportSerializer, NoteSerializer, SearchHitSerializer
+
+
+class AsyncItemListView(View):
+    model = None
+    serializer_class = None
+    ordering = ('-created_at', '-id')
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.model._default_manager.all()
+        ordering = self.ordering
+        query = request.GET.get("q")
+        if query:
+            # May check for the FTS tables, which is a sync query.
+            queryset = await sync_to_async(search_queryset)(queryset, query)
+            ordering = ('search_rank',) + ordering
+
+        paginator = KeysetPagination()
+        try:
+            page = await paginator.apaginate_queryset(queryset, request, ordering)
+        except NotFound as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=404)
+        data = self.serializer_class(page, many=True).data
+        return JsonResponse(paginator.get_paginated_data(data))
+
+
+class AsyncItemDetailView(View):
+    model = None
+    serializer_class = None
+
+    async def get(self, request, pk, *args, **kwargs):
+        try:
+            instance = await self.model._default_manager.aget(pk=pk)
+        except self.model.DoesNotExist:
+            return JsonResponse({"detail": "No %s matches the given query." % self.model._meta.object_name},
+                                status=404)
+        user = await request.auser()
+        await sync_to_async(log_activity)(
+            user, 'viewed', f"User '{user}' viewed details of {self.model.__name__} titled '{instance.title}'",
+            model=self.model, obj=instance,
+        )
+        return JsonResponse(self.serializer_class(instance).data)
+
+
+async def search_api(request):
+    query = request.GET.get("q", "").strip()
+    try:
+        page_number = max(1, int(request.GET.get("page", 1)))
+    except ValueError:
+        page_number = 1
+
+    hits, has_next = [], False
+    if query:
+        try:
+            page = await asearch_all(query, page_number, get_page_size(request))
+        except InvalidPage as exc:
+            return JsonResponse({"detail": str(exc)}, status=404)
+        hits, has_next = page.object_list, page.has_next()
+    user = await request.auser()
+    await sync_to_async(log_activity)(
+        user, 'searched', f"User '{user}' searched for '{query}' through the API", query=query,
+    )
+    url = request.build_absolute_uri()
+    return JsonResponse({
+        "query": query,
+        "page": page_number,
+        "next": replace_query_param(url, "page", page_number + 1) if has_next else None,
+        "previous": replace_query_param(url, "page", page_number - 1) if page_number > 1 else None,
+        "results": SearchHitSerializer(hits, many=True, context={"request": request}).data,
+    })
+
+
+async def change_feed(request):
+    """
+    Server-Sent Events for every change to the items the user can see:
+    ``?types=task,bugreport`` to pick models, ``?mine=1`` for the user's own and
+    assigned items. The ``ready`` event carries the current /api/sync/ cursor,
+    so a client that reconnects can fetch what it missed from there.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the endless stream instead of sending it.
+        return JsonResponse({"detail": "The change feed needs the ASGI server (taskmanager.asgi)."}, status=501)
+    types = [name for name in request.GET.get("types", "").split(",") if name]
+    unknown = sorted(set(types) - set(SYNC_SERIALIZERS))
+    if unknown:
+        return JsonResponse({"types": [f"Unknown type '{name}'." for name in unknown]}, status=400)
+    mine = request.GET.get("mine", "").lower() in ("1", "true", "yes")
+
+    # Subscribe before reading the cursor so no change falls between the two.
+    subscription = get_broker().subscribe()
+    try:
+        cursor = await sync_to_async(current_cursor)()
+    except BaseException:
+        # Failed, or cancelled by the client going away: event_stream() never owns it.
+        subscription.close()
+        raise
+    response = StreamingHttpResponse(
+        event_stream(subscription, feed_filter(user, types, mine), {"cursor": cursor}),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class AsyncTaskListView(AsyncItemListView):
+    model = Task
+    serializer_class = TaskSerializer
+
+class AsyncTaskDetailView(AsyncItemDetailView):
+    model = Task
+    serializer_class = TaskSerializer
+
+class AsyncBugReportListView(AsyncItemListView):
+    model = BugReport
+    serializer_class = BugReportSerializer
+
+class AsyncBugReportDetailView(AsyncItemDetailView):
+    model = BugReport
+    serializer_class = BugReportSerializer
+
+class AsyncNoteListView(AsyncItemListView):
+    model = Note
+    serializer_class = NoteSerializer
+
+class AsyncNoteDetailView(AsyncItemDetailView):
+    model = Note
+    serializer_class = NoteSerializer
@@ -0,0 +1,236 @@
+"""
+Benchmark harness: seed a database with a given volume of items, then time
+the web pages, API endpoints and admin changelists through Django's test
+client. The results are plain dicts (and JSON from ``manage.py benchmark``),
+so two runs, e.g. before and after a change, can be compared.
+
+Requests run one after another, in process: latency includes the whole
+middleware stack, but not a web server or the network.
+"""
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Task, BugReport, Note
+from .signals import items_bulk_changed
+
+
+WORDS = [
+    "design", "review", "login", "deploy", "search", "report", "backup", "layout", "billing", "export",
+    "invoice", "cache", "mobile", "upload", "email", "profile", "payment", "schema", "timeout", "widget",
+]
+# URL prefix and model of each item kind.
+KINDS = (('task', Task), ('bug', BugReport), ('note', Note))
+
+
+def _choices(model, field):
+    return [value for value, _ in model._meta.get_field(field).choices]
+
+
+def _build(model, index, rng, owners, assignees):
+    words = rng.sample(WORDS, 4)
+    fields = {
+        'title': f"{model.__name__} {index} {words[0]}",
+        'description': f"{' '.join(words)} benchmark item {index}",
+        'owner': rng.choice(owners),
+    }
+    if model is Task:
+        fields.update(assigned_to=rng.choice(assignees), status=rng.choice(_choices(Task, 'status')),
+                      priority=rng.choice(_choices(Task, 'priority')))
+    elif model is BugReport:
+        fields.update(severity=rng.choice(_choices(BugReport, 'severity')),
+                      status=rng.choice(_choices(BugReport, 'status')), expected_result="It works")
+    else:
+        fields.update(note_type=rng.choice(_choices(Note, 'note_type')), is_pinned=rng.random() < 0.05,
+                      tags=words[1])
+    return model(**fields)
+
+
+def seed_items(items, owners, seed=0, batch_size=5000, progress=None):
+    """
+    Bring each of Task, BugReport and Note up to ``items`` rows, owned by (and
+    tasks assigned to) ``owners``. Rows go in with bulk_create plus
+    items_bulk_changed, like the bulk API, one transaction per batch, so the
+    sync log and dashboard counters stay consistent. Deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    assignees = list(owners) + [None]
+    for model in (Task, BugReport, Note):
+        start = model.objects.count()
+        objects = (_build(model, index, rng, owners, assignees) for index in range(start, items))
+        done = start
+        while batch := list(islice(objects, batch_size)):
+            with transaction.atomic():
+                created = model.objects.bulk_create(batch, batch_size=500)
+                items_bulk_changed.send(sender=model, action="created", objects=created)
+            done += len(batch)
+            if progress:
+                progress(model, done, items)
+
+
+def seed(items, users=20, seed=0, batch_size=5000, progress=None):
+    """seed_items() over ``users`` seed users, created if missing."""
+    names = [f"bench{i}" for i in range(users)]
+    for name in names:
+        User.objects.get_or_create(username=name)
+    owners = list(User.objects.filter(username__in=names).order_by("id"))
+    seed_items(items, owners, seed=seed, batch_size=batch_size, progress=progress)
+
+
+@dataclass
+class Scenario:
+    name: str
+    path: object          # callable(rng) -> path
+    method: str = "get"
+    data: object = None   # callable(rng, n, user) -> request body, for POSTs
+
+
+def scenarios(words=WORDS):
+    """Every measured request, by name."""
+    ids, pages = {}, {}
+    for prefix, model in KINDS:
+        bounds = model.objects.aggregate(low=Min("id"), high=Max("id"))
+        ids[prefix] = (bounds["low"] or 0, bounds["high"] or 0)
+        pages[prefix] = max(1, math.ceil(model.objects.count() / settings.PAGE_SIZE))
+
+    def pk(prefix, rng):
+        return rng.randint(*ids[prefix])
+
+    result = [
+        Scenario("search", lambda rng: f"{reverse('search')}?q={rng.choice(words)}"),
+        Scenario("api-search", lambda rng: f"{reverse('api-search')}?q={rng.choice(words)}"),
+    ]
+    for prefix, model in KINDS:
+        model_name = model._meta.model_name
+        result += [
+            Scenario(f"web-list:{prefix}", lambda rng, p=prefix: reverse(f"{p}-list")),
+            Scenario(f"web-list-page:{prefix}",
+                     lambda rng, p=prefix: f"{reverse(f'{p}-list')}?page={rng.randint(1, pages[p])}"),
+            Scenario(f"web-detail:{prefix}", lambda rng, p=prefix: reverse(f"{p}-detail", args=[pk(p, rng)])),
+            Scenario(f"api-list:{prefix}", lambda rng, p=prefix: reverse(f"api-{p}-list")),
+            Scenario(f"api-list-search:{prefix}",
+                     lambda rng, p=prefix: f"{reverse(f'api-{p}-list')}?q={rng.choice(words)}"),
+            Scenario(f"api-detail:{prefix}", lambda rng, p=prefix: reverse(f"api-{p}-detail", args=[pk(p, rng)])),
+            Scenario(f"api-create:{prefix}", lambda rng, p=prefix: reverse(f"api-{p}-list"), method="post",
+                     data=lambda rng, n, user: {"title": f"bench create {rng.random():.12f} {n}",
+                                                "description": "created by the benchmark", "owner": user.pk}),
+            Scenario(f"admin-changelist:{prefix}",
+                     lambda rng, n=model_name: reverse(f"admin:tasks_{n}_changelist")),
+        ]
+    return {scenario.name: scenario for scenario in result}
+
+
+def latency_stats(timings):
+    timings = sorted(timings)
+
+    def percentile(q):
+        # Nearest rank.
+        return timings[max(0, math.ceil(q * len(timings)) - 1)]
+
+    return {
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "p50_ms": percentile(0.5) * 1000,
+        "p90_ms": percentile(0.9) * 1000,
+        "p99_ms": percentile(0.99) * 1000,
+        "max_ms": timings[-1] * 1000,
+    }
+
+
+def run_scenario(scenario, client, user, requests=50, warmup=5, seed=0):
+    rng = random.Random(seed)
+    timings, queries, errors = [], 0, 0
+    for n in range(warmup + requests):
+        path = scenario.path(rng)
+        kwargs = {}
+        if scenario.data is not None:
+            kwargs = {"data": json.dumps(scenario.data(rng, n, user)), "content_type": "application/json"}
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = getattr(client, scenario.method)(path, **kwargs)
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        if n < warmup:
+            continue
+        timings.append(elapsed)
+        queries += len(captured)
+        errors += response.status_code >= 400
+    total = sum(timings)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": requests / total if total else None,
+        "queries_per_request": queries / requests,
+        **latency_stats(timings),
+    }
+
+
+def run_benchmarks(names=None, requests=50, warmup=5, seed=0, user=None, progress=None):
+    """
+    Run the scenarios whose names start with one of ``names`` (all by default)
+    as ``user`` (a staff superuser is created if needed). Returns ``{name: stats}``.
+    """
+    if user is None:
+        user, _ = User.objects.get_or_create(username="bench-admin", defaults={"is_staff": True, "is_superuser": True})
+    client = Client()
+    client.force_login(user)
+
+    results = {}
+    for name, scenario in scenarios().items():
+        if names and not name.startswith(tuple(names)):
+            continue
+        results[name] = run_scenario(scenario, client, user, requests, warmup, seed)
+        if progress:
+            progress(name, results[name])
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "time": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "items": {model._meta.model_name: model.objects.count() for _, model in KINDS},
+    }
+
+
+def compare(baseline, current):
+    """
+    ``{name: {metric: (baseline, current, change %)}}`` for the p50, p99 and
+    throughput of every scenario both runs measured.
+    """
+    changes = {}
+    for name, stats in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        changes[name] = {}
+        for metric in ("p50_ms", "p99_ms", "throughput_rps"):
+            old, new = before.get(metric), stats.get(metric)
+            change = (new - old) / old * 100 if old and new is not None else None
+            changes[name][metric] = (old, new, change)
+    return changes
@@ -0,0 +1,315 @@
+"""
+Batch writes for the bulk API endpoints (and anything else that loads many
+items at once). Each item is validated on its own so one bad row only fails
+itself; the (owner, title) uniqueness check, related-object lookups and the
+writes are done once per batch.
+"""
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import CASCADE
+from django.utils import timezone
+from rest_framework import serializers
+
+from .signals import items_bulk_changed
+
+
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves ids from a dict loaded once for the whole batch instead of one query per item."""
+
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.objects[int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkResult:
+    def __init__(self):
+        self.objects = []
+        self.errors = []
+
+    def add_error(self, index, errors, **extra):
+        self.errors.append({'index': index, **extra, 'errors': errors})
+
+
+def check_batch_size(items):
+    """Return an error message if ``items`` is not a usable batch, else None."""
+    if not isinstance(items, list) or not items:
+        return "Expected a non-empty list."
+    if len(items) > settings.BULK_MAX_ITEMS:
+        return f"A batch can hold at most {settings.BULK_MAX_ITEMS} items."
+    return None
+
+
+def _related_objects(serializer_class, items, owner_from_items=False):
+    """Load every related object the batch refers to: one query per relation field."""
+    related = {}
+    model = serializer_class.Meta.model
+    for name in serializer_class.Meta.fields:
+        if name == 'owner' and not owner_from_items:
+            continue
+        field = model._meta.get_field(name)
+        if not field.is_relation:
+            continue
+        ids = set()
+        for item in items:
+            value = item.get(name) if isinstance(item, dict) else None
+            if isinstance(value, (int, str)) and str(value).isdigit():
+                ids.add(int(value))
+        related[name] = field.related_model._default_manager.in_bulk(ids) if ids else {}
+    return related
+
+
+def _bulk_context(serializer_class, items, context, owner_from_items=False):
+    related = _related_objects(serializer_class, items, owner_from_items)
+    return {**(context or {}), 'bulk': True, 'bulk_related': related}
+
+
+def _taken_titles(model, owner, titles):
+    """{title: pk} of the owner's existing items with any of these titles - one query."""
+    if not titles:
+        return {}
+    rows = model._default_manager.filter(owner=owner, title__in=titles).values_list('title', 'pk')
+    return {title: pk for title, pk in rows}
+
+
+def _taken_pairs(model, pairs):
+    """The (owner id, title) pairs that already exist - one query for any number of owners."""
+    if not pairs:
+        return set()
+    owners, titles = {owner_id for owner_id, _ in pairs}, {title for _, title in pairs}
+    rows = model._default_manager.filter(owner_id__in=owners, title__in=titles).values_list('owner_id', 'title')
+    return set(rows) & set(pairs)
+
+
+def bulk_create_items(serializer_class, items, owner, context=None):
+    """
+    Validate and insert ``items`` (a list of dicts) for ``owner``. Returns a
+    BulkResult whose ``objects`` are the created instances and ``errors`` the
+    rejected items by index. With ``owner=None`` each item names its own owner.
+    """
+    model = serializer_class.Meta.model
+    context = _bulk_context(serializer_class, items, context, owner_from_items=owner is None)
+    result = BulkResult()
+
+    valid = []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item, context=context)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            if owner is not None:
+                data['owner'] = owner
+            valid.append((index, data))
+        else:
+            result.add_error(index, serializer.errors)
+
+    taken = _taken_pairs(model, {(data['owner'].pk, data['title']) for _, data in valid})
+    instances, seen = [], set()
+    for index, data in valid:
+        key = (data['owner'].pk, data['title'])
+        if key in taken or key in seen:
+            result.add_error(index, {'title': [_duplicate_message(model)]})
+            continue
+        seen.add(key)
+        instances.append((index, model(**data)))
+
+    while instances:
+        try:
+            with transaction.atomic(using=model._default_manager.db):
+                result.objects = model._default_manager.bulk_create([obj for _, obj in instances], batch_size=500)
+            break
+        except IntegrityError:
+            # Another request inserted one of these titles after the check above:
+            # report the collisions and insert the rest.
+            taken = _taken_pairs(model, {(obj.owner_id, obj.title) for _, obj in instances})
+            if not taken:
+                raise
+            for index, obj in instances:
+                if (obj.owner_id, obj.title) in taken:
+                    result.add_error(index, {'title': [_duplicate_message(model)]})
+            instances = [(index, obj) for index, obj in instances if (obj.owner_id, obj.title) not in taken]
+
+    if result.objects:
+        items_bulk_changed.send(sender=model, action='created', objects=result.objects)
+    result.errors.sort(key=lambda error: error['index'])
+    return result
+
+
+def bulk_update_items(serializer_class, items, owner, context=None):
+    """
+    Apply partial updates. Each item is a dict with the ``id`` of one of
+    ``owner``'s items plus the fields to change.
+    """
+    model = serializer_class.Meta.model
+    context = _bulk_context(serializer_class, items, context)
+    result = BulkResult()
+
+    pks = [_as_pk(item.get('id')) if isinstance(item, dict) else None for item in items]
+    ids = {pk for pk in pks if pk is not None}
+    instances = model._default_manager.filter(owner=owner).in_bulk(ids) if ids else {}
+
+    valid, claimed = [], set()
+    for index, (item, pk) in enumerate(zip(items, pks)):
+        if pk not in instances:
+            result.add_error(index, {'id': ["Not found."]}, id=item.get('id') if isinstance(item, dict) else None)
+            continue
+        if pk in claimed:
+            result.add_error(index, {'id': ["Listed more than once in this batch."]}, id=pk)
+            continue
+        claimed.add(pk)
+        data = {key: value for key, value in item.items() if key != 'id'}
+        serializer = serializer_class(instances[pk], data=data, partial=True, context=context)
+        if serializer.is_valid():
+            valid.append((index, instances[pk], serializer.validated_data))
+        else:
+            result.add_error(index, serializer.errors, id=pk)
+
+    new_titles = {data['title'] for _, obj, data in valid if 'title' in data and data['title'] != obj.title}
+    # Titles held by items renamed in this same batch still count as taken: the
+    # rows are updated one after another, so a swap would hit the unique index.
+    taken = _taken_titles(model, owner, new_titles)
+
+    now = timezone.now()
+    fields, seen = {'updated_at'}, set()
+    for index, obj, data in valid:
+        title = data.get('title', obj.title)
+        if title != obj.title and (title in taken or title in seen):
+            result.add_error(index, {'title': [_duplicate_message(model)]}, id=obj.pk)
+            continue
+        seen.add(title)
+        for attr, value in data.items():
+            setattr(obj, attr, value)
+        # bulk_update() skips auto_now.
+        obj.updated_at = now
+        fields.update(data)
+        result.objects.append(obj)
+
+    indexes = {obj.pk: index for index, obj, _ in valid}
+    while result.objects:
+        try:
+            with transaction.atomic(using=model._default_manager.db):
+                model._default_manager.bulk_update(result.objects, sorted(fields), batch_size=500)
+            break
+        except IntegrityError:
+            # Another request took one of the new titles after the check above:
+            # report the collisions and update the rest.
+            taken = _taken_titles(model, owner, {obj.title for obj in result.objects if obj.title in new_titles})
+            clashing = [obj for obj in result.objects if taken.get(obj.title, obj.pk) != obj.pk]
+            if not clashing:
+                raise
+            for obj in clashing:
+                result.add_error(indexes[obj.pk], {'title': [_duplicate_message(model)]}, id=obj.pk)
+            result.objects = [obj for obj in result.objects if obj not in clashing]
+
+    if result.objects:
+        items_bulk_changed.send(sender=model, action='updated', objects=result.objects, fields=sorted(fields))
+    result.errors.sort(key=lambda error: error['index'])
+    return result
+
+
+def bulk_delete_items(model, ids, owner):
+    """Delete the listed items of ``owner``; unknown or repeated ids are reported, not fatal."""
+    result = BulkResult()
+    pks = [_as_pk(pk) for pk in ids]
+    wanted = {pk for pk in pks if pk is not None}
+    relations = _cascaded_relations(model)
+
+    using = model._default_manager.db
+    with transaction.atomic(using=using):
+        # The rows are read (and locked) once; the DELETE works from these instances.
+        instances = model._default_manager.filter(owner=owner).select_for_update().in_bulk(wanted) if wanted else {}
+        claimed = set()
+        for index, pk in enumerate(pks):
+            if pk not in instances:
+                result.add_error(index, {'id': ["Not found."]}, id=ids[index])
+            elif pk in claimed:
+                result.add_error(index, {'id': ["Listed more than once in this batch."]}, id=pk)
+            else:
+                claimed.add(pk)
+                result.objects.append(instances[pk])
+        _delete_objects(model, result.objects, relations, using)
+    return result
+
+
+def queryset_update(queryset, **values):
+    """
+    Set ``values`` on every item of ``queryset`` that does not have them yet,
+    with one UPDATE. The rows are read (and locked) first so the counters, sync
+    log and caches follow through items_bulk_changed. Returns the changed items.
+    """
+    model = queryset.model
+    with transaction.atomic(using=queryset.db):
+        changing = queryset.select_related(None).exclude(**values).order_by()
+        objects = list(changing.select_for_update())
+        if not objects:
+            return []
+        values['updated_at'] = timezone.now()
+        model._default_manager.filter(pk__in=changing.values('pk')).update(**values)
+        for obj in objects:
+            for name, value in values.items():
+                setattr(obj, model._meta.get_field(name).attname, getattr(value, 'pk', value))
+        items_bulk_changed.send(sender=model, action='updated', objects=objects, fields=sorted(values))
+    return objects
+
+
+def _cascaded_relations(model):
+    """The relations queryset_delete() deletes through; anything but CASCADE is refused."""
+    relations = model._meta.related_objects
+    unsupported = [relation for relation in relations if relation.on_delete is not CASCADE]
+    if unsupported:
+        names = ", ".join(f"{relation.related_model.__name__}.{relation.field.name}" for relation in unsupported)
+        raise ValueError(f"queryset_delete() only follows on_delete=CASCADE; {model.__name__} is referenced by {names}.")
+    return relations
+
+
+def queryset_delete(queryset):
+    """
+    Delete every item of ``queryset`` with one DELETE (plus one per cascaded
+    relation) instead of the per-object signals of QuerySet.delete(). Ids go in
+    batches of the database's parameter limit, like the delete collector's.
+    Returns the deleted items, as loaded before the DELETE.
+
+    Rows referencing the items are only deleted for on_delete=CASCADE; a model
+    with any other rule (PROTECT, SET_NULL, ...) raises ValueError before
+    anything is deleted. The items themselves go through the private
+    QuerySet._raw_delete(), which may change between Django versions.
+    """
+    model = queryset.model
+    using = queryset.db
+    relations = _cascaded_relations(model)
+    with transaction.atomic(using=using):
+        objects = list(queryset.select_related(None).order_by().select_for_update())
+        _delete_objects(model, objects, relations, using)
+    return objects
+
+
+def _delete_objects(model, objects, relations, using):
+    """The DELETEs behind queryset_delete(), for rows already loaded and locked."""
+    pks = [obj.pk for obj in objects]
+    batch_size = max(1, connections[using].ops.bulk_batch_size(['pk'], pks))
+    for start in range(0, len(pks), batch_size):
+        batch = pks[start:start + batch_size]
+        for relation in relations:
+            relation.related_model._base_manager.using(using).filter(
+                **{f"{relation.field.name}__in": batch}
+            ).delete()
+        # _raw_delete() is QuerySet.delete() without the collector and its per-object signals.
+        model._base_manager.using(using).filter(pk__in=batch)._raw_delete(using)
+    if objects:
+        items_bulk_changed.send(sender=model, action='deleted', objects=objects, set_based=True)
+
+
+def _as_pk(value):
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def _duplicate_message(model):
+    return f"You already have a {model._meta.verbose_name} with this title."
@@ -0,0 +1,132 @@
+"""
+Response cache for the item API.
+
+Cached GET responses are keyed by model, user, host and query string, plus a
+version token: one per model for list responses and one per object for detail
+responses. Saving or deleting an item replaces its object's token and its
+model's token, so stale entries are never read again and simply expire.
+"""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+STATS_KEY = "tasks:api-cache:{model}:{outcome}"
+
+
+def _model_version_key(model):
+    return f"tasks:v:{model._meta.label_lower}"
+
+
+def _object_version_key(model, pk):
+    return f"tasks:v:{model._meta.label_lower}:{pk}"
+
+
+def _new_token():
+    return uuid.uuid4().hex
+
+
+def bump_versions(model, pks=()):
+    """Invalidate every cached list of ``model`` and the detail of each of ``pks``."""
+    keys = [_model_version_key(model)] + [_object_version_key(model, pk) for pk in pks]
+
+    def bump():
+        token = _new_token()
+        cache.set_many(dict.fromkeys(keys, token), timeout=None)
+
+    bump()
+    # A request that reads before the write commits could store the old rows under
+    # the new token; bump again once the data is visible.
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def _versions(model, pk=None):
+    key = _model_version_key(model) if pk is None else _object_version_key(model, pk)
+    version = cache.get(key)
+    if version is None:
+        # Evicted or never set: start a new version so nothing older can match.
+        version = _new_token()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def response_cache_key(model, request, pk=None):
+    params = sorted((key, request.GET.getlist(key)) for key in request.GET)
+    digest = hashlib.md5(f"{request.get_host()}|{params}".encode(), usedforsecurity=False).hexdigest()
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    scope = "list" if pk is None else f"detail:{pk}"
+    return f"tasks:api:{model._meta.label_lower}:{scope}:{user}:{_versions(model, pk)}:{digest}"
+
+
+def _count(model, outcome):
+    key = STATS_KEY.format(model=model._meta.label_lower, outcome=outcome)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def cache_stats(models):
+    """{model label: {"hits": n, "misses": n}} for the given models."""
+    keys = {
+        STATS_KEY.format(model=model._meta.label_lower, outcome=outcome): (model._meta.label_lower, outcome)
+        for model in models for outcome in ("hits", "misses")
+    }
+    values = cache.get_many(keys)
+    stats = {model._meta.label_lower: {"hits": 0, "misses": 0} for model in models}
+    for key, (label, outcome) in keys.items():
+        stats[label][outcome] = values.get(key, 0)
+    return stats
+
+
+class CachedResponseMixin:
+    """
+    For the item list and detail API views: serve GET from the cache when the
+    model (list) or object (detail) has not changed since the response was stored.
+    Responses say whether they were served from the cache in an ``X-Cache`` header.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not settings.API_CACHE_ENABLED:
+            return super().get(request, *args, **kwargs)
+
+        key = response_cache_key(self.model, request, self.kwargs.get("pk"))
+        data = cache.get(key)
+        if data is not None:
+            _count(self.model, "hits")
+            self.cache_hit(data)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _count(self.model, "misses")
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def cache_hit(self, data):
+        """Called with the cached data instead of running the view."""
+
+
+def invalidate_item(sender, instance, **kwargs):
+    bump_versions(sender, [instance.pk])
+
+
+def invalidate_bulk(sender, objects, **kwargs):
+    bump_versions(sender, [obj.pk for obj in objects])
+
+
+def invalidate_assigned_tasks(sender, instance, **kwargs):
+    # pre_delete of a user: their assigned tasks get assigned_to = NULL through a plain
+    # UPDATE, which sends no signal of its own.
+    from .models import Task
+    bump_versions(Task, list(instance.assigned_tasks.values_list("pk", flat=True)))
@@ -0,0 +1,172 @@
+"""
+Admin changelists that stay responsive on big tables.
+
+By default a changelist page counts every matching row, counts the whole table
+again for the "N total" link when filtered, and builds the date hierarchy from
+MIN/MAX and SELECT DISTINCT over the table. The item admins instead:
+
+- count exactly only up to ADMIN_EXACT_COUNT_LIMIT rows (a COUNT over a
+  LIMITed subquery). Above that, an unfiltered list is counted from the item
+  counters. A filtered one uses a cached count, the PostgreSQL planner's
+  estimate, or one exact count kept for ADMIN_COUNT_CACHE_TIMEOUT seconds;
+- leave out the unfiltered total (``show_full_result_count = False``);
+- read the date hierarchy's years, months and days from the per-day counters.
+"""
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.admin.views.main import (
+    ALL_VAR, ERROR_FLAG, IS_FACETS_VAR, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR,
+)
+from django.core.cache import cache
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .counters import DAY_FIELD, item_days
+from .query_shaping import ShapedChangeList
+
+
+# Changelist parameters that page, sort or lay out the list without filtering it.
+LIST_PARAMS = {ALL_VAR, ERROR_FLAG, IS_FACETS_VAR, IS_POPUP_VAR, ORDER_VAR, PAGE_VAR, TO_FIELD_VAR}
+
+
+def is_unfiltered(params, allowed=()):
+    """Whether changelist ``params`` only page and sort (besides the ``allowed`` ones)."""
+    return set(params) <= LIST_PARAMS | set(allowed)
+
+
+def planner_estimate(queryset):
+    """The row count the query planner expects for ``queryset``, where the database offers one."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def cached_count(queryset):
+    """``queryset``'s count from the cache, else estimated or counted and cached."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f"{queryset.db}|{sql}|{params}".encode(), usedforsecurity=False).hexdigest()
+    key = f"tasks:admin-count:{digest}"
+    count = cache.get(key)
+    if count is None:
+        count = planner_estimate(queryset)
+        if count is None:
+            count = queryset.count()
+        cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    A paginator whose count is exact up to ADMIN_EXACT_COUNT_LIMIT and approximate
+    above it: ``known_count()`` (e.g. from the counters) when given, else cached_count().
+    """
+
+    def __init__(self, *args, known_count=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.known_count = known_count
+        self.approximate = False
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        bounded = self.object_list.order_by().values('pk')[:limit + 1].count()
+        if bounded <= limit:
+            return bounded
+        self.approximate = True
+        count = self.known_count() if self.known_count is not None else None
+        if count is None:
+            count = cached_count(self.object_list)
+        return max(count, bounded)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # An approximate count can promise a last page or two that is empty.
+            if self.approximate and int(number) > self.num_pages:
+                return int(number)
+            raise
+
+
+class DateBuckets:
+    """
+    Stands in for the changelist queryset in the date_hierarchy tag: answers its
+    aggregate(Min, Max) and dates()/datetimes() calls from a list of days.
+    """
+
+    def __init__(self, days):
+        self.days = days
+
+    def aggregate(self, **aggregates):
+        result = {}
+        for name, aggregate in aggregates.items():
+            day = (min if isinstance(aggregate, Min) else max)(self.days, default=None)
+            result[name] = None if day is None else self._datetime(day)
+        return result
+
+    def dates(self, field_name, kind, order='ASC'):
+        truncated = {
+            'year': lambda day: day.replace(month=1, day=1),
+            'month': lambda day: day.replace(day=1),
+            'day': lambda day: day,
+        }[kind]
+        return sorted({truncated(day) for day in self.days}, reverse=order == 'DESC')
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        return [self._datetime(day) for day in self.dates(field_name, kind, order)]
+
+    @staticmethod
+    def _datetime(day):
+        value = datetime.datetime.combine(day, datetime.time())
+        if settings.USE_TZ:
+            value = timezone.make_aware(value, timezone.get_default_timezone())
+        return value
+
+
+class BucketedChangeList:
+    """The changelist as the date_hierarchy tag sees it, with DateBuckets for a queryset."""
+
+    def __init__(self, changelist, buckets):
+        self._changelist = changelist
+        self.queryset = buckets
+
+    def __getattr__(self, name):
+        return getattr(self._changelist, name)
+
+
+class CountingChangeList(ShapedChangeList):
+    """
+    ShapedChangeList for the item admins, which provide ``get_owner_scope()``:
+    its date hierarchy comes from the per-day counters while nothing but the
+    date is filtered.
+    """
+
+    def get_results(self, request):
+        self.owner_id = self.model_admin.get_owner_scope(request)
+        super().get_results(request)
+
+    def get_date_buckets(self):
+        """DateBuckets of the hierarchy's current level, or None when the counters do not apply."""
+        field = self.date_hierarchy
+        lookups = [f"{field}__{part}" for part in ('year', 'month', 'day')]
+        if field != DAY_FIELD or self.query or not is_unfiltered(self.params, lookups):
+            return None
+        try:
+            year = int(self.params.get(f"{field}__year") or 0) or None
+            month = int(self.params.get(f"{field}__month") or 0) or None
+        except ValueError:
+            return None
+        return DateBuckets(item_days(self.model, self.owner_id, year, month if year else None))
@@ -0,0 +1,94 @@
+"""
+Conditional requests for item views: ETag and Last-Modified come from
+``updated_at``, so clients that already have the current version get a 304
+before anything is serialized, and a PUT/PATCH/DELETE with a stale If-Match
+gets a 412 instead of overwriting someone else's change.
+"""
+import hashlib
+from calendar import timegm
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import response_cache_key
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(":".join(map(str, parts)).encode(), usedforsecurity=False).hexdigest())
+
+
+class ConditionalMixin:
+    """
+    Subclasses implement ``get_validators()`` returning ``(etag, last_modified)``,
+    either of which may be None. GET answers 304 when the client is up to date;
+    ``check_preconditions()`` gives writes their 412.
+    """
+
+    def get_validators(self):
+        return None, None
+
+    def conditional_response(self, request):
+        etag, last_modified = self.get_validators()
+        response = get_conditional_response(
+            request, etag=etag,
+            last_modified=timegm(last_modified.utctimetuple()) if last_modified else None,
+        )
+        if response is not None:
+            self.set_validator_headers(response, etag, last_modified)
+        return response, etag, last_modified
+
+    def set_validator_headers(self, response, etag, last_modified):
+        if etag and not response.has_header("ETag"):
+            response["ETag"] = etag
+        if last_modified and not response.has_header("Last-Modified"):
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+
+    def get(self, request, *args, **kwargs):
+        not_modified, etag, last_modified = self.conditional_response(request)
+        if not_modified is not None:
+            return not_modified
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.set_validator_headers(response, etag, last_modified)
+        return response
+
+    def check_preconditions(self, request):
+        """The 412 response for a write whose If-Match/If-Unmodified-Since fails, else None."""
+        if not ("HTTP_IF_MATCH" in request.META or "HTTP_IF_UNMODIFIED_SINCE" in request.META
+                or "HTTP_IF_NONE_MATCH" in request.META):
+            return None
+        return self.conditional_response(request)[0]
+
+
+class ObjectConditionalMixin(ConditionalMixin):
+    """Validators of a detail view, from the (cached) object's ``updated_at``."""
+
+    def get_validators(self):
+        obj = self.get_object()
+        return make_etag(obj._meta.label_lower, obj.pk, obj.updated_at.isoformat()), obj.updated_at
+
+
+class ListConditionalMixin(ConditionalMixin):
+    """
+    Validators of a list. With the API cache on, the ETag is the response's cache
+    key, whose model version token changes on every write, so a 304 costs no query
+    (and there is no Last-Modified). Otherwise they come from one aggregate over the
+    filtered queryset: the newest ``updated_at`` changes on every create and
+    update, the count on every delete.
+    """
+
+    def get_validator_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def get_validators(self):
+        if settings.API_CACHE_ENABLED:
+            return make_etag(response_cache_key(self.model, self.request)), None
+        queryset = self.get_validator_queryset().order_by()
+        stats = queryset.aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+        last_modified = stats["last_modified"]
+        etag = make_etag(
+            self.model._meta.label_lower, stats["count"], last_modified.isoformat() if last_modified else "",
+        )
+        return etag, last_modified
@@ -0,0 +1,285 @@
+"""
+Materialized dashboard counters: for every user, how many of their items (and,
+for tasks, of the tasks assigned to them) have each status, priority, severity
+or note type.
+
+Rows are adjusted as items change instead of being counted on every page load.
+A save re-reads the row's current values under a lock (pre_save, inside the
+transaction BaseItem.save() opens), so it knows which counters to move from even
+when another request changed the item since it was loaded; every write costs
+that read and one upsert at most. Deletes and bulk writes use the values the
+instances were loaded with (post_init).
+Writes that send no signal (QuerySet.update(), raw SQL) are not seen: run
+``python manage.py reconcile_counters`` after those.
+"""
+import datetime
+from collections import Counter
+
+from django.db import connections, router, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Task, BugReport, Note, ItemCounter
+
+
+# model -> counted fields
+DIMENSIONS = {
+    Task: ('status', 'priority'),
+    BugReport: ('status', 'severity'),
+    Note: ('note_type',),
+}
+
+# model -> (role, user field)
+ROLES = {
+    Task: (('owner', 'owner_id'), ('assignee', 'assigned_to_id')),
+    BugReport: (('owner', 'owner_id'),),
+    Note: (('owner', 'owner_id'),),
+}
+
+# Every item is also counted per owner and day created, for the admin date
+# hierarchy (tasks/changelist.py). Days are in the default time zone.
+DAY_FIELD = 'created_at'
+DAY_DIMENSION = 'created_day'
+
+_MISSING = object()
+
+
+def _tracked_fields(model):
+    return [field for _, field in ROLES[model]] + list(DIMENSIONS[model]) + [DAY_FIELD]
+
+
+def day_bucket(value):
+    """The counter value of the day ``value`` (a datetime) falls on: 'YYYY-MM-DD'."""
+    if timezone.is_aware(value):
+        value = timezone.localtime(value, timezone.get_default_timezone())
+    return value.date().isoformat()
+
+
+def _snapshot(instance):
+    # __dict__, not getattr: reading a deferred field would cost a query per row.
+    return {field: instance.__dict__.get(field, _MISSING) for field in _tracked_fields(type(instance))}
+
+
+def _keys(model, values):
+    model_name = model._meta.model_name
+    for role, user_field in ROLES[model]:
+        user_id = values[user_field]
+        if user_id is None:
+            continue
+        for dimension in DIMENSIONS[model]:
+            yield (user_id, role, model_name, dimension, values[dimension])
+        if role == 'owner':
+            yield (user_id, role, model_name, DAY_DIMENSION, day_bucket(values[DAY_FIELD]))
+
+
+def _deltas(model, old=None, new=None):
+    deltas = Counter()
+    if old is not None:
+        deltas.subtract(_keys(model, old))
+    if new is not None:
+        deltas.update(_keys(model, new))
+    return {key: n for key, n in deltas.items() if n}
+
+
+def apply_deltas(deltas, using='default'):
+    """Add each delta to its counter, creating missing rows, in one statement per 500 keys."""
+    if not deltas:
+        return
+    connection = connections[using]
+    if connection.vendor not in ('sqlite', 'postgresql', 'mysql'):
+        for (user_id, role, model_name, dimension, value), n in deltas.items():
+            counter, _ = ItemCounter.objects.using(using).get_or_create(
+                user_id=user_id, role=role, model_name=model_name, dimension=dimension, value=value,
+            )
+            counter.count += n
+            counter.save(update_fields=['count'])
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(ItemCounter._meta.db_table)
+    columns = ['user_id', 'role', 'model_name', 'dimension', 'value', 'count']
+    if connection.vendor == 'mysql':
+        conflict = f"ON DUPLICATE KEY UPDATE {qn('count')} = {qn('count')} + VALUES({qn('count')})"
+    else:
+        conflict = (
+            f"ON CONFLICT ({', '.join(qn(column) for column in columns[:-1])}) "
+            f"DO UPDATE SET {qn('count')} = {table}.{qn('count')} + excluded.{qn('count')}"
+        )
+    rows = [key + (n,) for key, n in deltas.items()]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            placeholders = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(batch))
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) "
+                f"VALUES {placeholders} {conflict}",
+                [value for row in batch for value in row],
+            )
+
+
+def remember_values(sender, instance, **kwargs):
+    instance._counted_values = _snapshot(instance)
+
+
+def load_current_values(sender, instance, raw=False, using=None, **kwargs):
+    # pre_save: the values this instance was loaded with may be stale (another
+    # request saved it since) or deferred (.only()/.defer()), so read the row's
+    # current ones and hold its lock until the save commits.
+    if instance._state.adding or instance.pk is None:
+        return
+    fields = _tracked_fields(sender)
+    row = (
+        sender._default_manager.using(using).select_for_update()
+        .filter(pk=instance.pk).values(*fields).first()
+    )
+    instance._counted_values = row or dict.fromkeys(fields, _MISSING)
+
+
+def count_save(sender, instance, created, update_fields=None, using=None, **kwargs):
+    new = _snapshot(instance)
+    old = None if created else instance._counted_values
+    if old is not None and _MISSING in old.values():
+        # The row was already gone, so there is nothing to move from.
+        old = None
+    if old is not None:
+        # Fields left out of the UPDATE (update_fields, or deferred) keep their old value.
+        saved = None if update_fields is None else {sender._meta.get_field(name).attname for name in update_fields}
+        new = {
+            field: value if (saved is None or field in saved) and value is not _MISSING else old[field]
+            for field, value in new.items()
+        }
+    if _MISSING not in new.values():
+        apply_deltas(_deltas(sender, old, new), using=using)
+    instance._counted_values = new
+
+
+def count_delete(sender, instance, using=None, **kwargs):
+    apply_deltas(_deltas(sender, old=instance._counted_values), using=using)
+
+
+def count_bulk(sender, action, objects, set_based=False, **kwargs):
+    if action == 'deleted' and not set_based:
+        # The queryset delete already sent post_delete for each row (count_delete).
+        return
+    deltas = Counter()
+    for obj in objects:
+        if action == 'deleted':
+            deltas.update(_deltas(sender, old=obj._counted_values))
+            continue
+        new = _snapshot(obj)
+        old = obj._counted_values if action == 'updated' else None
+        deltas.update(_deltas(sender, old, new))
+        obj._counted_values = new
+    apply_deltas({key: n for key, n in deltas.items() if n}, using=router.db_for_write(sender))
+
+
+def drop_user_counters(sender, instance, using=None, **kwargs):
+    # post_delete of a user: sent after their cascaded items, whose post_delete
+    # has already adjusted these rows.
+    ItemCounter.objects.using(using).filter(user_id=instance.pk).delete()
+
+
+def recompute_counts(using='default'):
+    """Every counter as it should be, from GROUP BY queries over the items."""
+    counts = {}
+    for model, dimensions in DIMENSIONS.items():
+        model_name = model._meta.model_name
+        for role, user_field in ROLES[model]:
+            for dimension in dimensions:
+                groups = (
+                    model._default_manager.using(using).filter(**{f'{user_field}__isnull': False})
+                    .values_list(user_field, dimension).annotate(n=Count('id')).order_by()
+                )
+                for user_id, value, n in groups:
+                    counts[(user_id, role, model_name, dimension, value)] = n
+        days = (
+            model._default_manager.using(using)
+            .values_list('owner_id', TruncDate(DAY_FIELD, tzinfo=timezone.get_default_timezone()))
+            .annotate(n=Count('id')).order_by()
+        )
+        for user_id, day, n in days:
+            counts[(user_id, 'owner', model_name, DAY_DIMENSION, day.isoformat())] = n
+    return counts
+
+
+def reconcile_counters(dry_run=False, using='default'):
+    """
+    Recompute every counter and rewrite the ones that drifted. Returns the
+    ``{key: (stored, actual)}`` differences found.
+    """
+    with transaction.atomic(using=using):
+        actual = recompute_counts(using)
+        stored = {
+            (row.user_id, row.role, row.model_name, row.dimension, row.value): row
+            for row in ItemCounter.objects.using(using).all()
+        }
+        drift = {}
+        for key in actual.keys() | stored.keys():
+            count = stored[key].count if key in stored else 0
+            if count != actual.get(key, 0):
+                drift[key] = (count, actual.get(key, 0))
+        if dry_run or not drift:
+            return drift
+
+        stale = [stored[key].pk for key in drift if key in stored and key not in actual]
+        ItemCounter.objects.using(using).filter(pk__in=stale).delete()
+        changed = [stored[key] for key in drift if key in stored and key in actual]
+        for row in changed:
+            row.count = drift[(row.user_id, row.role, row.model_name, row.dimension, row.value)][1]
+        ItemCounter.objects.using(using).bulk_update(changed, ['count'], batch_size=500)
+        ItemCounter.objects.using(using).bulk_create(
+            [ItemCounter(user_id=key[0], role=key[1], model_name=key[2], dimension=key[3], value=key[4],
+                         count=actual[key])
+             for key in drift if key not in stored],
+            batch_size=500,
+        )
+    return drift
+
+
+def user_counters(user):
+    """
+    ``{role: {model_name: {dimension: {value: count}}}}`` for ``user``, with
+    every choice present (zeros included). One query.
+    """
+    stored = {
+        (row.role, row.model_name, row.dimension, row.value): row.count
+        for row in ItemCounter.objects.filter(user=user).exclude(dimension=DAY_DIMENSION)
+    }
+    result = {}
+    for model, dimensions in DIMENSIONS.items():
+        model_name = model._meta.model_name
+        for role, _ in ROLES[model]:
+            by_dimension = result.setdefault(role, {}).setdefault(model_name, {})
+            for dimension in dimensions:
+                by_dimension[dimension] = {
+                    value: stored.get((role, model_name, dimension, value), 0)
+                    for value, _ in model._meta.get_field(dimension).choices
+                }
+    return result
+
+
+def item_count(model, owner_id=None):
+    """How many items of ``model`` there are (of one owner), from the counters: one query."""
+    rows = ItemCounter.objects.filter(role='owner', model_name=model._meta.model_name, dimension=DIMENSIONS[model][0])
+    if owner_id is not None:
+        rows = rows.filter(user_id=owner_id)
+    return rows.aggregate(n=Sum('count'))['n'] or 0
+
+
+def item_days(model, owner_id=None, year=None, month=None):
+    """
+    The days (dates, ascending) that items of ``model`` (of one owner, in one
+    year or month) were created on, from the counters: one query.
+    """
+    rows = ItemCounter.objects.filter(
+        role='owner', model_name=model._meta.model_name, dimension=DAY_DIMENSION, count__gt=0,
+    )
+    if owner_id is not None:
+        rows = rows.filter(user_id=owner_id)
+    if year is not None:
+        # A range rather than LIKE, which the index cannot answer on SQLite.
+        prefix = f"{year:04d}-" if month is None else f"{year:04d}-{month:02d}-"
+        rows = rows.filter(value__gte=prefix, value__lt=prefix[:-1] + '.')
+    values = rows.order_by('value').values_list('value', flat=True).distinct()
+    return [datetime.date.fromisoformat(value) for value in values]
@@ -0,0 +1,16 @@
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(cursor, pragmas=None):
+    """Run ``PRAGMA name = value`` for each of ``pragmas`` (default: settings.SQLITE_PRAGMAS)."""
+    for name, value in (settings.SQLITE_PRAGMAS if pragmas is None else pragmas).items():
+        if not name.replace('_', '').isalnum():
+            raise ValueError(f"Invalid PRAGMA name {name!r}")
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def configure_connection(sender, connection, **kwargs):
+    """connection_created receiver: tune each new SQLite connection."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            apply_sqlite_pragmas(cursor)
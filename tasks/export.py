@@ -0,0 +1,69 @@
+"""
+Streaming export of tasks, bug reports and notes as NDJSON or CSV. Rows are
+read with ``values().iterator(chunk_size=...)`` and encoded one at a time, so
+memory use does not grow with the table.
+"""
+import csv
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+
+from .models import Task, BugReport, Note
+
+
+BASE_FIELDS = ['id', 'title', 'description', 'owner', 'created_at', 'updated_at']
+
+EXPORTS = {
+    'tasks': (Task, BASE_FIELDS + ['status', 'priority', 'assigned_to']),
+    'bugs': (BugReport, BASE_FIELDS + ['severity', 'status', 'expected_result']),
+    'notes': (Note, BASE_FIELDS + ['note_type', 'is_pinned', 'tags']),
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_rows(kind, queryset=None, chunk_size=None):
+    """Yield one dict per item, in id order, without loading the table into memory."""
+    model, fields = EXPORTS[kind]
+    if queryset is None:
+        queryset = model.objects.all()
+    return queryset.order_by('id').values(*fields).iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, default=_json_default) + '\n'
+
+
+class _Echo:
+    """csv.writer target that hands each encoded line back instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            value.isoformat() if isinstance(value, (datetime, date)) else value
+            for value in (row[field] for field in fields)
+        ])
+
+
+def export_lines(kind, fmt, queryset=None, chunk_size=None):
+    rows = export_rows(kind, queryset, chunk_size)
+    if fmt == 'csv':
+        return csv_lines(rows, EXPORTS[kind][1])
+    return ndjson_lines(rows)
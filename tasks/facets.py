@@ -0,0 +1,188 @@
+"""
+Filters and facet counts for the item list API. A list view declares its
+``facet_fields``. Each one is a ``?field=`` filter and a facet: how many items
+have each value. Repeat a filter, or separate values with commas, to match any
+of them (``?status=todo,review``); ``none`` matches an empty nullable field.
+
+A facet counts the items that match every *other* filter, so the counts next to
+a selected value still show what selecting another one would give.
+
+All the facets of a request come from one query. Normally that is the
+per-facet GROUP BYs joined with UNION ALL. When every facet can be read from the
+dashboard counters (tasks/counters.py), it is a single GROUP BY over those
+instead of a scan of the items. The counters hold one dimension at a time, so
+that covers an unfiltered list, a task list filtered on its assignee alone, and
+the assignee facet under one status or priority filter; a search, any other
+combination, and facets that are not counted (a note's is_pinned) scan.
+"""
+from collections import Counter
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Case, CharField, Count, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from .counters import DIMENSIONS, ROLES
+from .models import ItemCounter
+
+
+NONE_VALUES = ('none', 'null')
+BOOLEAN_VALUES = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+
+def parse_filters(model, params, fields):
+    """
+    ``{field: [values]}`` for the ``fields`` present in ``params`` (a QueryDict),
+    with the values converted to Python. Raises a 400 for unknown values.
+    """
+    filters, errors = {}, {}
+    for name in fields:
+        raw = [part.strip() for value in params.getlist(name) for part in value.split(",") if part.strip()]
+        if not raw:
+            continue
+        field = model._meta.get_field(name)
+        choices = {value for value, _ in field.flatchoices}
+        values = []
+        for text in raw:
+            if field.null and text.lower() in NONE_VALUES:
+                values.append(None)
+                continue
+            try:
+                if field.get_internal_type() == 'BooleanField':
+                    value = BOOLEAN_VALUES.get(text.lower())
+                else:
+                    value = field.to_python(text)
+            except DjangoValidationError:
+                value = None
+            if value is None or (choices and value not in choices):
+                errors[name] = [f"'{text}' is not a valid {name}."]
+                break
+            values.append(value)
+        filters[name] = values
+    if errors:
+        raise ValidationError(errors)
+    return filters
+
+
+def apply_filters(queryset, filters, exclude=None):
+    """``queryset`` narrowed by every filter but ``exclude``'s."""
+    for name, values in filters.items():
+        if name == exclude:
+            continue
+        condition = Q(**{f"{name}__in": [value for value in values if value is not None]})
+        if None in values:
+            condition |= Q(**{f"{name}__isnull": True})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+def facet_counts(queryset, filters, fields):
+    """``{field: {value: count}}`` over ``queryset``, every facet in one UNION ALL query."""
+    model = queryset.model
+    parts = [
+        apply_filters(queryset, filters, exclude=name).order_by()
+        .values(facet=Value(name, output_field=CharField()),
+                facet_value=Cast(model._meta.get_field(name).attname, CharField()))
+        .annotate(n=Count("pk"))
+        for name in fields
+    ]
+    counts = {name: {} for name in fields}
+    if not parts:
+        return counts
+    for row in parts[0].union(*parts[1:], all=True):
+        field = model._meta.get_field(row["facet"])
+        value = None if row["facet_value"] is None else field.to_python(row["facet_value"])
+        counts[row["facet"]][value] = row["n"]
+    return counts
+
+
+def _counted(model, fields):
+    # Which facets the counters can answer: the counted dimensions, plus the
+    # assignee (each assignee's tasks, summed over one dimension).
+    roles = dict(ROLES.get(model, ()))
+    countable = set(DIMENSIONS.get(model, ()))
+    if 'assignee' in roles:
+        countable.add(roles['assignee'])
+    return all(model._meta.get_field(name).attname in countable for name in fields)
+
+
+def counter_facet_counts(model, fields, filters=None):
+    """
+    facet_counts() of ``model`` under ``filters``, from the counters: one GROUP
+    BY over a few rows per user. None when a facet is not counted or its other
+    filters are a combination the counters do not hold.
+    """
+    filters = filters or {}
+    if not fields or not _counted(model, list(fields) + list(filters)):
+        return None
+    dimensions = DIMENSIONS[model]
+    assignee_field = dict(ROLES[model]).get('assignee')
+    assignee = next((name for name in list(fields) + list(filters)
+                     if model._meta.get_field(name).attname == assignee_field), None)
+    for name in fields:
+        others = [other for other in filters if other != name]
+        if others and not (len(others) == 1 and assignee in (name, others[0])):
+            return None
+
+    # The owner rows, summed over users, count every item once per dimension;
+    # the assignee rows split the assigned tasks by user.
+    condition = Q(role='owner', dimension__in=dimensions)
+    if assignee:
+        condition |= Q(role='assignee', dimension__in=dimensions)
+    rows = (
+        ItemCounter.objects.filter(condition, model_name=model._meta.model_name)
+        .values('role', 'dimension', 'value', assignee=Case(When(role='assignee', then='user_id')))
+        .annotate(n=Sum('count')).order_by()
+    )
+    owner, assigned = Counter(), Counter()
+    for row in rows:
+        if row['role'] == 'owner':
+            owner[(row['dimension'], row['value'])] += row['n']
+        else:
+            assigned[(row['assignee'], row['dimension'], row['value'])] += row['n']
+
+    counts = {}
+    for name in fields:
+        if name == assignee:
+            # Over the values of one dimension: all of them, or the filtered ones.
+            dimension = next((other for other in filters if other != name), dimensions[0])
+            values = filters.get(dimension)
+            by_user = Counter()
+            for (user_id, counted, value), n in assigned.items():
+                if counted == dimension and (values is None or value in values):
+                    by_user[user_id] += n
+            total = sum(n for (counted, value), n in owner.items()
+                        if counted == dimension and (values is None or value in values))
+            counts[name] = {**by_user, None: total - sum(by_user.values())}
+            continue
+        by_value = Counter({value: n for (dimension, value), n in owner.items() if dimension == name})
+        if assignee in filters:
+            users, unassigned, by_value = filters[assignee], by_value, Counter()
+            for (user_id, dimension, value), n in assigned.items():
+                if dimension == name:
+                    unassigned[value] -= n
+                    if user_id in users:
+                        by_value[value] += n
+            if None in users:
+                by_value.update(unassigned)
+        counts[name] = dict(by_value)
+    return counts
+
+
+def format_facets(model, counts):
+    """
+    ``{field: [{"value", "count"}]}``: every choice in declaration order (zeros
+    included), both booleans, and other values most common first.
+    """
+    result = {}
+    for name, by_value in counts.items():
+        field = model._meta.get_field(name)
+        if field.choices:
+            values = [value for value, _ in field.flatchoices]
+        elif field.get_internal_type() == 'BooleanField':
+            values = [True, False]
+        else:
+            values = sorted((value for value, n in by_value.items() if n),
+                            key=lambda value: (-by_value[value], value is None, value))
+        result[name] = [{"value": value, "count": by_value.get(value, 0)} for value in values]
+    return result
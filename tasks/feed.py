@@ -0,0 +1,191 @@
+"""
+Live change feed: /api/feed/ streams Server-Sent Events as items are created,
+updated and deleted, so an open task or bug list can patch itself instead of
+reloading. Each event carries the item as the API serializes it (``data`` is
+null for deletes) plus its owner and assignee:
+
+    event: change
+    data: {"type": "task", "id": 7, "action": "updated", "owner": 1, "assigned_to": 2, "data": {...}}
+
+Events come from the model signals (and items_bulk_changed for bulk writes) and
+are published once the transaction commits, through the broker named by
+FEED_BROKER. The default LocalBroker fans them out in this process only; a
+deployment running several ASGI processes plugs in a broker backed by a shared
+pub/sub (Redis, PostgreSQL LISTEN/NOTIFY) with the same two methods.
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .sync import SYNC_SERIALIZERS
+
+
+class Broker:
+    """Hands published events to every open subscription."""
+
+    # Whether publishing can reach anyone; events are only built when it is true.
+    listening = True
+
+    def publish(self, event):
+        raise NotImplementedError
+
+    def subscribe(self):
+        """A Subscription: ``await get()`` for the next event (None once dropped), then ``close()``."""
+        raise NotImplementedError
+
+
+class LocalSubscription:
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, event):
+        # Runs on the subscriber's loop. A reader too slow to keep up is sent None
+        # (and dropped) rather than holding an ever longer queue.
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            self.broker.unsubscribe(self)
+            return
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker(Broker):
+    """In-process fan-out to asyncio queues; publish() may be called from any thread."""
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or settings.FEED_QUEUE_SIZE
+        self.subscriptions = set()
+        self.lock = threading.Lock()
+
+    @property
+    def listening(self):
+        return bool(self.subscriptions)
+
+    def publish(self, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The subscriber's event loop is closed.
+                self.unsubscribe(subscription)
+
+    def subscribe(self):
+        subscription = LocalSubscription(self, self.queue_size)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.FEED_BROKER)()
+    return _broker
+
+
+def reset_broker(setting, **kwargs):
+    global _broker
+    if setting in ('FEED_BROKER', 'FEED_QUEUE_SIZE'):
+        _broker = None
+
+
+setting_changed.connect(reset_broker)
+
+
+def _event(model, instance, action):
+    model_name = model._meta.model_name
+    return {
+        'type': model_name,
+        'id': instance.pk,
+        'action': action,
+        'owner': instance.owner_id,
+        'assigned_to': getattr(instance, 'assigned_to_id', None),
+        'data': None if action == 'deleted' else SYNC_SERIALIZERS[model_name](instance).data,
+    }
+
+
+def _publish_on_commit(events, using=None):
+    broker = get_broker()
+    transaction.on_commit(lambda: [broker.publish(event) for event in events], using=using)
+
+
+def publish_save(sender, instance, created, using=None, **kwargs):
+    if get_broker().listening:
+        _publish_on_commit([_event(sender, instance, 'created' if created else 'updated')], using)
+
+
+def publish_delete(sender, instance, using=None, **kwargs):
+    if get_broker().listening:
+        _publish_on_commit([_event(sender, instance, 'deleted')], using)
+
+
+def publish_bulk(sender, action, objects, set_based=False, **kwargs):
+    if action == 'deleted' and not set_based:
+        # The queryset delete already sent post_delete for each row (publish_delete).
+        return
+    if get_broker().listening:
+        _publish_on_commit([_event(sender, obj, action) for obj in objects])
+
+
+def feed_filter(user, types=None, mine=False):
+    """
+    Which events a subscriber receives. Every signed-in user can read every item
+    through the list and sync APIs, so the feed only narrows by ``types`` and,
+    with ``mine``, to the items the user owns or is assigned.
+    """
+    def accepts(event):
+        if types and event['type'] not in types:
+            return False
+        return not mine or user.pk in (event['owner'], event['assigned_to'])
+    return accepts
+
+
+def format_event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def event_stream(subscription, accepts, ready, heartbeat=None):
+    """
+    The SSE body: a ``ready`` event, then the accepted changes, with a comment
+    line every ``heartbeat`` seconds to keep proxies from closing the connection.
+    Ends with a ``reset`` event if the subscription is dropped.
+    """
+    heartbeat = heartbeat or settings.FEED_HEARTBEAT
+    try:
+        yield f"retry: {settings.FEED_RETRY_MS}\n" + format_event("ready", ready)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                yield format_event("reset", {"detail": "Too many changes to follow; reload the list."})
+                return
+            if accepts(event):
+                yield format_event("change", event)
+    finally:
+        subscription.close()
@@ -0,0 +1,159 @@
+"""
+Non-blocking log handling: requests only put records on a bounded queue and a
+background thread writes them to disk in batches, as JSON lines.
+
+Nothing in here imports Django models, because settings.LOGGING loads it
+before the apps are ready.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including the structured ``activity`` fields."""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        data.update(getattr(record, "activity", None) or {})
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class BatchFileHandler(logging.FileHandler):
+    """FileHandler that can write a whole batch of records with a single flush."""
+
+    def __init__(self, filename, mode="a", encoding="utf-8", delay=True):
+        super().__init__(filename, mode, encoding, delay)
+        self.setFormatter(JsonFormatter())
+
+    def emit_batch(self, records):
+        lines = []
+        for record in records:
+            try:
+                lines.append(self.format(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        with self.lock:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write("".join(lines))
+            self.stream.flush()
+
+
+class BatchingQueueHandler(QueueHandler):
+    """
+    Queue records for a background writer thread.
+
+    ``maxsize`` bounds the queue and ``policy`` says what happens when it is full:
+    ``drop_newest`` discards the incoming record, ``drop_oldest`` discards the
+    oldest queued one, and ``block`` waits up to ``block_timeout`` seconds
+    (backpressure on the request) before dropping. Dropped records are counted and
+    reported in the log once the writer catches up.
+    """
+
+    POLICIES = ("drop_newest", "drop_oldest", "block")
+
+    def __init__(self, filename, maxsize=10000, policy="drop_newest", batch_size=100,
+                 flush_interval=1.0, block_timeout=0.05, start_thread=True, level=logging.NOTSET):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown queue policy {policy!r}; expected one of {self.POLICIES}")
+        super().__init__(queue.Queue(maxsize))
+        self.setLevel(level)
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.target = BatchFileHandler(filename)
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._start_thread = start_thread
+        self._thread = None
+        self._stop = threading.Event()
+        self._thread_lock = threading.Lock()
+
+    def enqueue(self, record):
+        self._ensure_thread()
+        if self.policy == "block":
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+            except queue.Full:
+                self.dropped += 1
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                if self.policy == "drop_newest":
+                    self.dropped += 1
+                    return
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def _ensure_thread(self):
+        if not self._start_thread or self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._write_batch(timeout=self.flush_interval)
+
+    def _write_batch(self, timeout=None):
+        """Wait up to ``timeout`` for a record, then write it with whatever else is queued."""
+        try:
+            records = [self.queue.get(timeout=timeout) if timeout else self.queue.get_nowait()]
+        except queue.Empty:
+            return 0
+        while len(records) < self.batch_size:
+            try:
+                records.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if self.dropped != self._reported_dropped:
+            records.append(self._dropped_record())
+        self.target.emit_batch(records)
+        return len(records)
+
+    def _dropped_record(self):
+        count = self.dropped - self._reported_dropped
+        self._reported_dropped = self.dropped
+        return logging.LogRecord(
+            "tasks.log_handlers", logging.WARNING, __file__, 0,
+            f"Log queue full: dropped {count} record(s) ({self.dropped} in total)", None, None,
+        )
+
+    def flush(self):
+        """Write everything queued so far from the calling thread."""
+        while self._write_batch():
+            pass
+
+    def close(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+        self.target.close()
+        super().close()
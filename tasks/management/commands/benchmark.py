@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from tasks.benchmarks import compare, environment, run_benchmarks, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a benchmark database with Task/BugReport/Note rows and time the search, list, detail, "
+        "API and admin pages through the test client. Prints (or writes) the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=10_000, help="Rows per model (e.g. 10000 to 1000000).")
+        parser.add_argument("--users", type=int, default=20, help="Users the items are spread over.")
+        parser.add_argument("--requests", type=int, default=50, help="Timed requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed requests before each scenario.")
+        parser.add_argument("--only", nargs="+", metavar="PREFIX",
+                            help="Only scenarios whose name starts with one of these (e.g. api-list search).")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the data and the requests.")
+        parser.add_argument("--output", "-o", help="Write the JSON results to this file.")
+        parser.add_argument("--compare", metavar="BASELINE", help="A previous --output file to compare against.")
+        parser.add_argument("--db-path", default=os.path.join(tempfile.gettempdir(), "taskmanager-benchmark.sqlite3"),
+                            help="SQLite file for the benchmark database (default: in the temp directory).")
+        parser.add_argument("--keepdb", action="store_true",
+                            help="Keep the benchmark database (and its rows) for the next run.")
+        parser.add_argument("--current-db", action="store_true",
+                            help="Use the configured database as it is instead of a separate benchmark database.")
+        parser.add_argument("--with-cache", action="store_true", help="Leave the API response cache on.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"], encoding="utf-8") as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline {options['compare']}: {exc}")
+
+        if options["current_db"]:
+            report = self.run(options)
+        else:
+            # A database of its own, created (and migrated) like the test database.
+            if connection.vendor == "sqlite":
+                connection.settings_dict["TEST"]["NAME"] = options["db_path"]
+            old_name = connection.settings_dict["NAME"]
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False,
+                                               keepdb=options["keepdb"])
+            try:
+                report = self.run(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+
+        text = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.write(text + "\n")
+            self.stderr.write(f"Wrote results to {options['output']}")
+        else:
+            self.stdout.write(text)
+        if baseline is not None:
+            self.write_comparison(compare(baseline, report))
+
+    def run(self, options):
+        if not options["current_db"]:
+            seed(options["items"], users=options["users"], seed=options["seed"], progress=self.seeded)
+        report = {"environment": environment(), "settings": {
+            key: options[key] for key in ("items", "users", "requests", "warmup", "seed", "with_cache")
+        }}
+        # The test client sends Host: testserver.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                               API_CACHE_ENABLED=options["with_cache"] and settings.API_CACHE_ENABLED):
+            report["results"] = run_benchmarks(
+                options["only"], requests=options["requests"], warmup=options["warmup"], seed=options["seed"],
+                progress=self.measured,
+            )
+        return report
+
+    def seeded(self, model, done, total):
+        self.stderr.write(f"Seeded {done}/{total} {model._meta.verbose_name_plural}", ending="\r")
+        if done >= total:
+            self.stderr.write("")
+
+    def measured(self, name, stats):
+        self.stderr.write(
+            f"{name:<28} p50 {stats['p50_ms']:8.1f} ms  p99 {stats['p99_ms']:8.1f} ms  "
+            f"{stats['throughput_rps']:8.1f} req/s  {stats['queries_per_request']:5.1f} queries"
+            + (f"  {stats['errors']} errors" if stats["errors"] else "")
+        )
+
+    def write_comparison(self, changes):
+        self.stderr.write("\nChange against the baseline (p50, p99, throughput):")
+        for name, metrics in changes.items():
+            parts = []
+            for metric, (old, new, change) in metrics.items():
+                parts.append(f"{metric} {old:.1f} -> {new:.1f} ({change:+.1f}%)" if change is not None else f"{metric} n/a")
+            self.stderr.write(f"{name:<28} " + "  ".join(parts))
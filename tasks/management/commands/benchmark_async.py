@@ -0,0 +1,86 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+
+ENDPOINTS = {
+    # name: (sync URL name, async URL name)
+    "tasks": ("api-task-list", "api-async-task-list"),
+    "bugs": ("api-bug-list", "api-async-bug-list"),
+    "notes": ("api-note-list", "api-async-note-list"),
+    "search": ("api-search", "api-async-search"),
+}
+
+
+def summarize(label, results, elapsed):
+    timings = sorted(duration for duration, _ in results)
+    failed = sum(1 for _, status in results if status != 200)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return (
+        f"{label:<6} {len(timings)} requests in {elapsed:.2f}s: {len(timings) / elapsed:,.1f} req/s, "
+        f"p50 {statistics.median(timings) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms"
+        + (f", {failed} failed" if failed else "")
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the same concurrent load to a sync (DRF, one thread per request) endpoint and its "
+        "async counterpart, in process, and compare throughput and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("endpoint", choices=sorted(ENDPOINTS), nargs="?", default="tasks")
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--query", default="task", help="?q= sent with every request.")
+        parser.add_argument("--with-cache", action="store_true",
+                            help="Let the sync endpoints use the API response cache (off by default, "
+                                 "the async ones have none).")
+
+    def handle(self, *args, **options):
+        sync_name, async_name = ENDPOINTS[options["endpoint"]]
+        params = {"q": options["query"]} if options["query"] else {}
+        total, concurrency = options["requests"], options["concurrency"]
+
+        self.stdout.write(f"{total} requests, {concurrency} at a time, {params or 'no query'}")
+        # The test clients send Host: testserver, as under the test runner.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            with override_settings(API_CACHE_ENABLED=options["with_cache"]):
+                results, elapsed = self.run_sync(reverse(sync_name), params, total, concurrency)
+            self.stdout.write(summarize("sync", results, elapsed))
+            results, elapsed = asyncio.run(self.run_async(reverse(async_name), params, total, concurrency))
+            self.stdout.write(summarize("async", results, elapsed))
+
+    def run_sync(self, url, params, total, concurrency):
+        def one(_):
+            client = Client()
+            started = time.perf_counter()
+            response = client.get(url, params)
+            response.close()
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(one, range(total)))
+        return results, time.perf_counter() - started
+
+    async def run_async(self, url, params, total, concurrency):
+        client = AsyncClient()
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with limit:
+                started = time.perf_counter()
+                response = await client.get(url, params)
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(total)))
+        return results, time.perf_counter() - started
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tasks.sync import compact_sync_log
+
+
+class Command(BaseCommand):
+    help = "Delete sync log rows that a later change of the same item supersedes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = compact_sync_log(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} superseded sync log row(s)."))
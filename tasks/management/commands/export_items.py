@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from tasks.export import EXPORTS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream all tasks, bug reports or notes as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(EXPORTS))
+        parser.add_argument("--format", dest="fmt", choices=sorted(FORMATS), default="ndjson")
+        parser.add_argument("--output", "-o", help="File to write to (default: standard output).")
+        parser.add_argument("--chunk-size", type=int, help="Rows per database fetch (default: EXPORT_CHUNK_SIZE).")
+
+    def handle(self, *args, **options):
+        lines = export_lines(options["kind"], options["fmt"], chunk_size=options["chunk_size"])
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+        count = 0
+        # newline="" keeps csv's \r\n line endings as they are.
+        with open(options["output"], "w", encoding="utf-8", newline="") as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stderr.write(f"Wrote {count} line(s) to {options['output']}")
@@ -0,0 +1,133 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tasks.bulk import bulk_create_items
+from tasks.serializers import TaskSerializer, BugReportSerializer, NoteSerializer
+
+
+SERIALIZERS = {
+    "tasks": TaskSerializer,
+    "bugs": BugReportSerializer,
+    "notes": NoteSerializer,
+}
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line number, row dict or None, error)`` without reading the whole input."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, f"invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "expected a JSON object"
+            continue
+        yield line_number, row, None
+
+
+class Command(BaseCommand):
+    help = (
+        "Import tasks, bug reports or notes from NDJSON or CSV (the export_items formats). "
+        "Rows are validated like API input and written in chunks with bulk_create; bad rows are "
+        "reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(SERIALIZERS))
+        parser.add_argument("path", help="File to read, or - for standard input.")
+        parser.add_argument("--format", dest="fmt", choices=["ndjson", "csv"],
+                            help="Input format (default: from the file extension, else ndjson).")
+        parser.add_argument("--owner", help="Username that owns every imported item "
+                                            "(default: the owner id in each row).")
+        parser.add_argument("--chunk-size", type=int, default=1000,
+                            help="Rows validated and inserted per transaction.")
+        parser.add_argument("--show-errors", type=int, default=20,
+                            help="How many rejected rows to print (the rest are only counted).")
+
+    def handle(self, *args, **options):
+        serializer_class = SERIALIZERS[options["kind"]]
+        path = options["path"]
+        fmt = options["fmt"] or ("csv" if path.endswith(".csv") else "ndjson")
+        owner = None
+        if options["owner"]:
+            owner = User.objects.filter(username=options["owner"]).first()
+            if owner is None:
+                raise CommandError(f"No user named {options['owner']!r}.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        self.shown_errors = options["show_errors"]
+        self.stats = {"read": 0, "created": 0, "rejected": 0}
+        started = time.monotonic()
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        try:
+            rows = read_rows(stream, fmt)
+            while True:
+                chunk = list(islice(rows, options["chunk_size"]))
+                if not chunk:
+                    break
+                self.import_chunk(serializer_class, chunk, owner)
+                if options["verbosity"] >= 2:
+                    self.report(started, ending="\r")
+        except (OSError, UnicodeDecodeError) as exc:
+            # The chunks before this one are already saved.
+            raise CommandError(f"Cannot read {path} after {self.stats['read']} row(s): {exc}")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.report(started, style=self.style.SUCCESS)
+
+    def import_chunk(self, serializer_class, chunk, owner):
+        self.stats["read"] += len(chunk)
+        items, lines = [], []
+        for line_number, row, error in chunk:
+            if error:
+                self.reject(line_number, error)
+            else:
+                items.append(row)
+                lines.append(line_number)
+        if not items:
+            return
+
+        with transaction.atomic():
+            result = bulk_create_items(serializer_class, items, owner)
+        self.stats["created"] += len(result.objects)
+        for error in result.errors:
+            messages = "; ".join(
+                f"{field}: {' '.join(map(str, problems))}" for field, problems in error["errors"].items()
+            )
+            self.reject(lines[error["index"]], messages)
+
+    def reject(self, line_number, message):
+        self.stats["rejected"] += 1
+        if self.stats["rejected"] <= self.shown_errors:
+            self.stderr.write(f"line {line_number}: {message}")
+
+    def report(self, started, style=None, ending="\n"):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        stats = self.stats
+        message = (
+            f"Read {stats['read']} row(s): {stats['created']} created, {stats['rejected']} rejected "
+            f"in {elapsed:.2f}s ({stats['read'] / elapsed:,.0f} rows/s)"
+        )
+        self.stdout.write(style(message) if style else message, ending=ending)
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.activity import activity_buffer
+from tasks.models import ActivityEvent
+
+
+class Command(BaseCommand):
+    help = "Delete activity events older than the retention period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.ACTIVITY_RETENTION_DAYS,
+            help="Keep events from the last DAYS days (default: ACTIVITY_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Delete this many events per statement, so the table is never locked for long.",
+        )
+
+    def handle(self, *args, **options):
+        activity_buffer.flush()
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        old_events = ActivityEvent.objects.filter(created_at__lt=cutoff).order_by("created_at", "id")
+
+        deleted = 0
+        while True:
+            ids = list(old_events.values_list("id", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            deleted += ActivityEvent.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} activity event(s) older than {cutoff:%Y-%m-%d %H:%M}."))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.search import ensure_search_index, fts_available, get_indexed_models, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for tasks, bug reports and notes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias to rebuild.")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        ensure_search_index(using=using)
+        if not fts_available(using):
+            raise CommandError("Full-text search needs SQLite with FTS5; searches fall back to icontains.")
+
+        for model in get_indexed_models():
+            rebuild_search_index(model, using=using)
+            count = model._default_manager.using(using).count()
+            self.stdout.write(f"Indexed {count} {model.__name__} rows")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tasks.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recount every dashboard counter from the items and fix the ones that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        drift = reconcile_counters(dry_run=options["dry_run"])
+        for (user_id, role, model_name, dimension, value), (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"user {user_id} {role} {model_name}.{dimension}={value}: {stored} -> {actual}")
+        verb = "Found" if options["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(drift)} drifted counter(s)."))
@@ -0,0 +1,196 @@
+"""
+Per-view request metrics: wall time, number and duration of database queries
+and response size, recorded by MetricsMiddleware for every resolved URL name.
+
+Each metric keeps a running count and sum plus a rolling window of the last
+METRICS_WINDOW samples, from which the percentiles are computed when
+/metrics is scraped. Everything lives in process memory, so each worker
+reports its own numbers.
+"""
+import math
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+
+METRICS = {
+    # name: (help text, unit suffix)
+    'request_duration': ("Wall time of the request.", 'seconds'),
+    'db_queries': ("Database queries run by the request.", ''),
+    'db_duration': ("Time spent in database queries.", 'seconds'),
+    'response_size': ("Size of the response body (streamed responses are not counted).", 'bytes'),
+}
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class RollingWindow:
+    """Running count and sum, plus the last ``size`` samples for percentiles."""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentiles(self, quantiles=QUANTILES):
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: math.nan for q in quantiles}
+        # Nearest rank.
+        return {q: ordered[max(0, math.ceil(q * len(ordered)) - 1)] for q in quantiles}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def record(self, view, **values):
+        with self.lock:
+            windows = self.views.get(view)
+            if windows is None:
+                windows = self.views[view] = {name: RollingWindow(settings.METRICS_WINDOW) for name in METRICS}
+            for name, value in values.items():
+                if value is not None:
+                    windows[name].add(value)
+
+    def snapshot(self):
+        """``{view: {metric: (count, sum, {quantile: value})}}``"""
+        with self.lock:
+            return {
+                view: {
+                    name: (window.count, window.total, window.percentiles())
+                    for name, window in windows.items()
+                }
+                for view, windows in self.views.items()
+            }
+
+    def clear(self):
+        with self.lock:
+            self.views = {}
+
+
+registry = MetricsRegistry()
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# The timer of the request being handled. A context variable rather than a
+# wrapper installed on the connection per request: async views run their queries
+# on another thread, with that thread's connection, and asgiref carries context
+# variables over to it.
+current_timer = ContextVar('query_timer', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """``execute_wrapper`` that adds each query to the current request's timer."""
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.duration += time.perf_counter() - started
+        timer.count += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created: fires again when a connection object reconnects.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return 'NaN' if math.isnan(value) else repr(float(value))
+
+
+def render_prometheus(snapshot, prefix='taskmanager'):
+    """The snapshot in the Prometheus text exposition format, one summary per metric."""
+    lines = []
+    for name, (help_text, unit) in METRICS.items():
+        metric = f"{prefix}_{name}_{unit}" if unit else f"{prefix}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} summary"]
+        for view in sorted(snapshot):
+            count, total, percentiles = snapshot[view][name]
+            if not count:
+                continue
+            label = f'view="{_escape(view)}"'
+            for quantile, value in percentiles.items():
+                lines.append(f'{metric}{{{label},quantile="{quantile}"}} {_number(value)}')
+            lines.append(f"{metric}_sum{{{label}}} {_number(total)}")
+            lines.append(f"{metric}_count{{{label}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Time every request, count and time its queries (see time_query), and record
+    the numbers under the view name the URL resolved to ("unresolved" for 404s
+    that matched no route). Adds a Server-Timing header when METRICS_SERVER_TIMING
+    is on.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self._finish(request, response, started, timer)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+        timer = QueryTimer()
+        token = current_timer.set(timer)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self._finish(request, response, started, timer)
+
+    def _finish(self, request, response, started, timer):
+        duration = time.perf_counter() - started
+        queries, db_duration = timer.count, timer.duration
+        size = None if response.streaming else len(response.content)
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        registry.record(
+            view, request_duration=duration, db_queries=queries, db_duration=db_duration, response_size=size,
+        )
+        if settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'db;dur={db_duration * 1000:.1f};desc="{queries} queries", total;dur={duration * 1000:.1f}'
+            )
+        return response
@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_alter_bugreport_unique_together_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bugreport',
+            index=models.Index(fields=['created_at', 'id'], name='bugreport_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bugreport',
+            index=models.Index(fields=['updated_at'], name='bugreport_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bugreport',
+            index=models.Index(fields=['severity', 'created_at'], name='bug_severity_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bugreport',
+            index=models.Index(fields=['status', 'created_at'], name='bug_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['created_at', 'id'], name='note_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['updated_at'], name='note_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['is_pinned', 'created_at'], name='note_pinned_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['note_type', 'created_at'], name='note_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='task_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at'], name='task_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'created_at'], name='task_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['priority', 'created_at'], name='task_priority_created_idx'),
+        ),
+    ]
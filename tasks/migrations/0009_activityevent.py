@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_item_access_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('action', models.CharField(choices=[('visited', 'Visited'), ('viewed', 'Viewed'), ('searched', 'Searched'), ('created', 'Created'), ('duplicate', 'Duplicate'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=20)),
+                ('model_name', models.CharField(blank=True, max_length=50)),
+                ('object_id', models.BigIntegerField(blank=True, null=True)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('query', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='activity_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at', 'id'], name='activity_created_idx'), models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'), models.Index(fields=['model_name', 'created_at'], name='activity_model_created_idx')],
+            },
+        ),
+    ]
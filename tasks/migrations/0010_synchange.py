@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:53
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    """One "saved" row per existing item, so a first sync from cursor 0 sees everything."""
+    SyncChange = apps.get_model('tasks', 'SyncChange')
+    db = schema_editor.connection.alias
+    for name in ('Task', 'BugReport', 'Note'):
+        model = apps.get_model('tasks', name)
+        rows = model.objects.using(db).order_by('updated_at', 'id').values_list('id', 'updated_at')
+        SyncChange.objects.using(db).bulk_create(
+            [SyncChange(model_name=name.lower(), object_id=pk, action='saved', changed_at=updated_at)
+             for pk, updated_at in rows.iterator()],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_activityevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('saved', 'Saved'), ('deleted', 'Deleted')], max_length=10)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model_name', 'object_id', 'id'], name='sync_object_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_synchange'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='activityevent',
+            name='action',
+            field=models.CharField(choices=[('visited', 'Visited'), ('viewed', 'Viewed'), ('searched', 'Searched'), ('created', 'Created'), ('duplicate', 'Duplicate'), ('updated', 'Updated'), ('deleted', 'Deleted'), ('exported', 'Exported')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill(apps, schema_editor):
+    """Count the existing items, as reconcile_counters does."""
+    ItemCounter = apps.get_model('tasks', 'ItemCounter')
+    db = schema_editor.connection.alias
+    counted = {
+        'Task': (('status', 'priority'), (('owner', 'owner_id'), ('assignee', 'assigned_to_id'))),
+        'BugReport': (('status', 'severity'), (('owner', 'owner_id'),)),
+        'Note': (('note_type',), (('owner', 'owner_id'),)),
+    }
+    rows = []
+    for name, (dimensions, roles) in counted.items():
+        model = apps.get_model('tasks', name)
+        for role, user_field in roles:
+            for dimension in dimensions:
+                groups = (
+                    model.objects.using(db).filter(**{f'{user_field}__isnull': False})
+                    .values_list(user_field, dimension).annotate(n=Count('id')).order_by()
+                )
+                rows += [
+                    ItemCounter(user_id=user_id, role=role, model_name=name.lower(),
+                                dimension=dimension, value=value, count=n)
+                    for user_id, value, n in groups
+                ]
+    ItemCounter.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_activityevent_exported'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('assignee', 'Assignee')], max_length=10)),
+                ('model_name', models.CharField(max_length=20)),
+                ('dimension', models.CharField(max_length=20)),
+                ('value', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='item_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'role', 'model_name', 'dimension', 'value'), name='item_counter_key')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
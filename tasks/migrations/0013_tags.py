@@ -0,0 +1,77 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:34
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def parse_tags(text):
+    # The rules of tasks.tags.parse_tags when this migration was written.
+    text = (text or "").strip()
+    parts = re.split(r"\s*,\s*", text) if "," in text else text.split()
+    names = []
+    for part in parts:
+        name = re.sub(r"\s+", "-", part.strip().lstrip("#").strip().lower())[:50]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill(apps, schema_editor):
+    """Parse every note's tags string into Tag rows and links."""
+    Note = apps.get_model('tasks', 'Note')
+    Tag = apps.get_model('tasks', 'Tag')
+    NoteTag = apps.get_model('tasks', 'NoteTag')
+    db = schema_editor.connection.alias
+
+    parsed = [
+        (pk, parse_tags(tags))
+        for pk, tags in Note.objects.using(db).exclude(tags='').values_list('id', 'tags').iterator()
+    ]
+    names = sorted({name for _, note_names in parsed for name in note_names})
+    Tag.objects.using(db).bulk_create([Tag(name=name) for name in names], batch_size=500)
+    ids = dict(Tag.objects.using(db).values_list('name', 'id'))
+    NoteTag.objects.using(db).bulk_create(
+        [NoteTag(note_id=pk, tag_id=ids[name]) for pk, note_names in parsed for name in note_names],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_itemcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NoteTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='tasks.note')),
+                ('tag', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='note_links', to='tasks.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='note',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, related_name='notes', through='tasks.NoteTag', to='tasks.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='notetag',
+            index=models.Index(fields=['tag', 'note'], name='note_tag_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notetag',
+            constraint=models.UniqueConstraint(fields=('note', 'tag'), name='note_tag_unique'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor):
+    """Count the existing items per owner and day created, as reconcile_counters does."""
+    ItemCounter = apps.get_model('tasks', 'ItemCounter')
+    db = schema_editor.connection.alias
+    rows = []
+    for name in ('Task', 'BugReport', 'Note'):
+        days = (
+            apps.get_model('tasks', name).objects.using(db)
+            .values_list('owner_id', TruncDate('created_at', tzinfo=timezone.get_default_timezone()))
+            .annotate(n=Count('id')).order_by()
+        )
+        rows += [
+            ItemCounter(user_id=user_id, role='owner', model_name=name.lower(), dimension='created_day',
+                        value=day.isoformat(), count=n)
+            for user_id, day, n in days
+        ]
+    ItemCounter.objects.using(db).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0013_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemcounter',
+            index=models.Index(fields=['model_name', 'dimension', 'value'], name='item_counter_value_idx'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models 
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class BaseItem(models.Model):
@@ -11,6 +12,19 @@ class BaseItem(models.Model):
 
     class Meta:
         abstract = True 
+        # Every list (HTML, API, admin) is ordered newest first.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='%(class)s_created_idx'),
+            models.Index(fields=['updated_at'], name='%(class)s_updated_idx'),
+        ]
+
+    def save(self, *args, using=None, **kwargs):
+        # The counters re-read the row under a lock before it is written
+        # (tasks/counters.py), so that read, the write and the counter upsert
+        # have to share one transaction.
+        using = using or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, using=using, **kwargs)
 
 
 class Task(BaseItem):  
@@ -34,8 +48,12 @@ class Task(BaseItem):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='todo')
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
 
-    class Meta:
+    class Meta(BaseItem.Meta):
         unique_together = ('owner', 'title')
+        indexes = BaseItem.Meta.indexes + [
+            models.Index(fields=['status', 'created_at'], name='task_status_created_idx'),
+            models.Index(fields=['priority', 'created_at'], name='task_priority_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.status})"
@@ -62,8 +80,12 @@ class BugReport(BaseItem):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='reported')
     expected_result = models.TextField(blank=True)
 
-    class Meta:
+    class Meta(BaseItem.Meta):
         unique_together = ('owner', 'title')
+        indexes = BaseItem.Meta.indexes + [
+            models.Index(fields=['severity', 'created_at'], name='bug_severity_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='bug_status_created_idx'),
+        ]
 
     def __str__(self):
         return f"Bug: {self.title} ({self.severity})"
@@ -80,10 +102,142 @@ class Note(BaseItem):
     
     note_type = models.CharField(max_length=20, choices=NOTE_TYPES, default='general')
     is_pinned = models.BooleanField(default=False)
+    # What the user typed; tag_set is kept in step with it (see tasks/tags.py).
     tags = models.CharField(max_length=100, blank=True)
+    tag_set = models.ManyToManyField('Tag', through='NoteTag', related_name='notes', blank=True)
     
-    class Meta:
+    class Meta(BaseItem.Meta):
         unique_together = ('owner', 'title')
+        indexes = BaseItem.Meta.indexes + [
+            models.Index(fields=['is_pinned', 'created_at'], name='note_pinned_created_idx'),
+            models.Index(fields=['note_type', 'created_at'], name='note_type_created_idx'),
+        ]
 
     def __str__(self):
         return f"Note: {self.title} ({self.note_type})"
+
+
+class Tag(models.Model):
+    """A normalized (lowercase, trimmed) note tag. The unique index also serves prefix lookups."""
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class NoteTag(models.Model):
+    # The unique (note, tag) and the (tag, note) index below cover both foreign keys.
+    note = models.ForeignKey(Note, on_delete=models.CASCADE, related_name='tag_links', db_index=False)
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='note_links', db_index=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['note', 'tag'], name='note_tag_unique'),
+        ]
+        indexes = [
+            # "Notes tagged X" and per-tag counts read only this index.
+            models.Index(fields=['tag', 'note'], name='note_tag_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.note_id} #{self.tag_id}"
+
+
+class ActivityEvent(models.Model):
+    ACTION_CHOICES = [
+        ('visited', 'Visited'),
+        ('viewed', 'Viewed'),
+        ('searched', 'Searched'),
+        ('created', 'Created'),
+        ('duplicate', 'Duplicate'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+        ('exported', 'Exported'),
+    ]
+
+    # No FK constraint or cascade: the trail outlives the user, and deleting a user
+    # must not have to touch every event they ever produced.
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True,
+        related_name='activity_events',
+    )
+    username = models.CharField(max_length=150, blank=True)
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    model_name = models.CharField(max_length=50, blank=True)
+    object_id = models.BigIntegerField(null=True, blank=True)
+    title = models.CharField(max_length=200, blank=True)
+    query = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='activity_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='activity_user_created_idx'),
+            models.Index(fields=['model_name', 'created_at'], name='activity_model_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.username} {self.action} {self.model_name} {self.object_id or ''}".strip()
+
+
+class SyncChange(models.Model):
+    """
+    Append-only change log for delta sync. Every save or delete of an item adds a
+    row; the auto-increment id is the sequence clients pass back as their cursor.
+    Deleted items leave a "deleted" row (a tombstone), so clients learn about them.
+    """
+    ACTION_CHOICES = [
+        ('saved', 'Saved'),
+        ('deleted', 'Deleted'),
+    ]
+
+    model_name = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # compact_sync_log looks up older rows of the same object.
+            models.Index(fields=['model_name', 'object_id', 'id'], name='sync_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.model_name} {self.object_id} {self.action}"
+
+
+class ItemCounter(models.Model):
+    """
+    How many of a user's items have a given status, priority, severity or note
+    type, kept up to date as items change (see tasks/counters.py) so the
+    dashboard reads a few rows instead of counting every item.
+    """
+    ROLE_CHOICES = [
+        ('owner', 'Owner'),
+        ('assignee', 'Assignee'),
+    ]
+
+    # No FK constraint: the rows of a deleted user are removed once their items
+    # are gone (see tasks/counters.py), not by a cascade that runs before that.
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='item_counters',
+    )
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    model_name = models.CharField(max_length=20)
+    dimension = models.CharField(max_length=20)
+    value = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'role', 'model_name', 'dimension', 'value'], name='item_counter_key',
+            ),
+        ]
+        indexes = [
+            # Totals over all users, e.g. the admin date hierarchy's days.
+            models.Index(fields=['model_name', 'dimension', 'value'], name='item_counter_value_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.role} {self.model_name}.{self.dimension}={self.value}: {self.count}"
@@ -0,0 +1,161 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def get_page_size(request, default=None, query_param="page_size"):
+    """Read ``?page_size=`` from the request, never going above ``MAX_PAGE_SIZE``."""
+    page_size = default or settings.PAGE_SIZE
+    try:
+        page_size = int(request.GET.get(query_param, page_size))
+    except (TypeError, ValueError):
+        pass
+    return max(1, min(page_size, settings.MAX_PAGE_SIZE))
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the "rows after this one" filter for a multi-column ordering, e.g. for
+    ('-created_at', '-id'): created_at < x OR (created_at = x AND id < y).
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        step = Q(**{f"{name}__{lookup}": values[index]})
+        for previous, value in zip(ordering[:index], values[:index]):
+            step &= Q(**{previous.lstrip("-"): value})
+        condition |= step
+    return condition
+
+
+def _encode_value(value):
+    # isoformat() keeps the microseconds, which the keyset comparison needs.
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith("-") else f"-{field}" for field in ordering)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a multi-column ordering that ends with a unique column.
+    The cursor stores the ordering values of the last row seen, so fetching any
+    page is a single indexed range query instead of an OFFSET scan.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("-created_at", "-id")
+
+    def get_ordering(self, view):
+        if hasattr(view, "get_ordering"):
+            return tuple(view.get_ordering())
+        return tuple(getattr(view, "ordering", None) or self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, values, backwards = self.prepare(queryset, request, self.get_ordering(view))
+        return self.finish(list(queryset[:self.page_size + 1]), values, backwards)
+
+    async def apaginate_queryset(self, queryset, request, ordering=None):
+        """paginate_queryset() for async views, reading the page with aiterator()."""
+        queryset, values, backwards = self.prepare(queryset, request, tuple(ordering or self.ordering))
+        return self.finish([obj async for obj in queryset[:self.page_size + 1].aiterator()], values, backwards)
+
+    def prepare(self, queryset, request, ordering):
+        self.request = request
+        self.page_size = get_page_size(request, query_param=self.page_size_query_param)
+        values, backwards = self.decode_cursor(request)
+
+        if backwards:
+            ordering = reverse_ordering(ordering)
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            values = self.clean_cursor_values(queryset.model, ordering, values)
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        self.ordering = ordering if not backwards else reverse_ordering(ordering)
+        return queryset, values, backwards
+
+    def finish(self, results, values, backwards):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if backwards:
+            results.reverse()
+            self.has_next, self.has_previous = values is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.page = results
+        return results
+
+    def clean_cursor_values(self, model, ordering, values):
+        if len(values) != len(ordering):
+            raise NotFound("Invalid cursor")
+        cleaned = []
+        for field, value in zip(ordering, values):
+            try:
+                cleaned.append(model._meta.get_field(field.lstrip("-")).to_python(value))
+            except FieldDoesNotExist:
+                cleaned.append(value)
+            except ValidationError:
+                raise NotFound("Invalid cursor")
+        return cleaned
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], backwards=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], backwards=True)
+
+    def encode_cursor(self, obj, backwards):
+        values = [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        payload = json.dumps({"v": values, "b": backwards}, default=_encode_value)
+        token = base64.urlsafe_b64encode(payload.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        # DRF requests have query_params; plain Django (async) views pass request.GET.
+        token = getattr(request, "query_params", request.GET).get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            return list(payload["v"]), bool(payload.get("b"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound("Invalid cursor")
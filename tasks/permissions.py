@@ -10,4 +10,4 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         if request.method in permissions.SAFE_METHODS:
             return True
         
-        return obj.owner == request.user
\ No newline at end of file
+        return obj.owner_id == request.user.pk
\ No newline at end of file
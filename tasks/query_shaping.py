@@ -0,0 +1,44 @@
+from django.contrib.admin.views.main import ChangeList
+
+
+class QueryShape:
+    """
+    Declares how a view loads its rows: which relations to join up front and
+    which heavy text columns the page never shows and can leave unloaded.
+    """
+
+    def __init__(self, select_related=(), defer=()):
+        self.select_related = tuple(select_related)
+        self.defer = tuple(defer)
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.defer:
+            queryset = queryset.defer(*self.defer)
+        return queryset
+
+    def __repr__(self):
+        return f"QueryShape(select_related={self.select_related!r}, defer={self.defer!r})"
+
+
+class QueryShapeMixin:
+    """For generic (web and API) views: shape whatever get_queryset() returns."""
+    query_shape = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.query_shape is not None:
+            queryset = self.query_shape.apply(queryset)
+        return queryset
+
+
+class ShapedChangeList(ChangeList):
+    """Admin changelist that applies the ModelAdmin's ``list_shape``."""
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        shape = getattr(self.model_admin, 'list_shape', None)
+        if shape is not None:
+            queryset = shape.apply(queryset)
+        return queryset
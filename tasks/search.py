@@ -0,0 +1,301 @@
+import asyncio
+import heapq
+import itertools
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.urls import reverse
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+
+# Title hits weigh ten times as much as description hits when ranking.
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Shared cross-model score: a hit with every word in the title lands in the top
+# tier, a description hit in the lower one, and recency adds up to RECENCY_BOOST
+# on top (half of it for an item RECENCY_DECAY_DAYS old).
+TITLE_MATCH_SCORE = 2.0
+DESCRIPTION_MATCH_SCORE = 1.0
+RECENCY_BOOST = 0.5
+RECENCY_DECAY_DAYS = 30.0
+
+DETAIL_URL_NAMES = {
+    "task": ("task-detail", "api-task-detail"),
+    "bugreport": ("bug-detail", "api-bug-detail"),
+    "note": ("note-detail", "api-note-detail"),
+}
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def get_indexed_models():
+    from .models import Task, BugReport, Note
+    return [Task, BugReport, Note]
+
+
+def fts_table(model):
+    return f"{model._meta.db_table}_fts"
+
+
+# Aliases whose FTS tables are known to exist, so the introspection query runs once.
+_fts_ready = set()
+
+
+def fts_available(using="default"):
+    if using in _fts_ready:
+        return True
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    tables = set(connection.introspection.table_names())
+    if all(fts_table(model) in tables for model in get_indexed_models()):
+        _fts_ready.add(using)
+        return True
+    return False
+
+
+def build_match_expression(query):
+    """Turn free text into an FTS5 expression: every word, as a prefix, must match."""
+    tokens = TOKEN_RE.findall(query or "")
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _index_sql(model):
+    content = model._meta.db_table
+    table = fts_table(model)
+    row = "new.id, new.title, new.description"
+    old_row = "old.id, old.title, old.description"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        f"title, description, content='{content}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {content} BEGIN "
+        f"INSERT INTO {table}(rowid, title, description) VALUES ({row}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {content} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, title, description) VALUES ('delete', {old_row}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF title, description ON {content} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, title, description) VALUES ('delete', {old_row}); "
+        f"INSERT INTO {table}(rowid, title, description) VALUES ({row}); END",
+    ]
+
+
+def ensure_search_index(using="default"):
+    """
+    Create the FTS5 tables and the triggers that keep them in sync.
+    Safe to call repeatedly; a table that did not exist yet is filled from its model.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return []
+    existing = set(connection.introspection.table_names())
+    created = []
+    with connection.cursor() as cursor:
+        for model in get_indexed_models():
+            for statement in _index_sql(model):
+                cursor.execute(statement)
+            if fts_table(model) not in existing:
+                rebuild_search_index(model, using=using)
+                created.append(model)
+    return created
+
+
+def rebuild_search_index(model, using="default"):
+    table = fts_table(model)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+        cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+
+
+def search_queryset(queryset, query):
+    """
+    Filter ``queryset`` down to items matching ``query`` and order them by relevance.
+    Uses the FTS5 index on SQLite and falls back to ``icontains`` elsewhere.
+    """
+    match = build_match_expression(query)
+    if not match:
+        # Nothing to match (punctuation only), but callers still order by the rank.
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    model = queryset.model
+    if not fts_available(queryset.db):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        ).annotate(
+            search_rank=Case(
+                When(title__icontains=query, then=Value(0.0)),
+                default=Value(1.0),
+                output_field=FloatField(),
+            )
+        ).order_by("search_rank", "-created_at")
+
+    table = fts_table(model)
+    pk_column = f'"{model._meta.db_table}"."{model._meta.pk.column}"'
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match])
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT bm25({table}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT}) FROM {table} "
+            f"WHERE {table} MATCH %s AND rowid = {pk_column}",
+            [match],
+            output_field=FloatField(),
+        )
+    ).order_by("search_rank", "-created_at")
+
+
+def annotate_search_score(queryset, query):
+    """Search ``queryset`` and annotate each hit with the shared ``search_score``."""
+    queryset = search_queryset(queryset, query)
+    if not fts_available(queryset.db):
+        return queryset.annotate(
+            search_score=Case(
+                When(title__icontains=query, then=Value(TITLE_MATCH_SCORE)),
+                default=Value(DESCRIPTION_MATCH_SCORE),
+                output_field=FloatField(),
+            )
+        )
+
+    model = queryset.model
+    table = fts_table(model)
+    db_table = model._meta.db_table
+    pk_column = f'"{db_table}"."{model._meta.pk.column}"'
+    created_column = f'"{db_table}"."{model._meta.get_field("created_at").column}"'
+    return queryset.annotate(
+        search_score=RawSQL(
+            f"(CASE WHEN {pk_column} IN (SELECT rowid FROM {table} WHERE {table} MATCH %s) "
+            f"THEN {TITLE_MATCH_SCORE} ELSE {DESCRIPTION_MATCH_SCORE} END) + "
+            f"{RECENCY_BOOST} / (1.0 + (julianday('now') - julianday({created_column})) / {RECENCY_DECAY_DAYS})",
+            [f"title : ({build_match_expression(query)})"],
+            output_field=FloatField(),
+        )
+    )
+
+
+class SearchHit:
+    def __init__(self, obj, score):
+        self.obj = obj
+        self.score = score
+        self.model_name = obj._meta.model_name
+        self.type = obj._meta.verbose_name
+        detail_url_name, api_url_name = DETAIL_URL_NAMES[self.model_name]
+        self.url = reverse(detail_url_name, args=[obj.pk])
+        self.api_url = reverse(api_url_name, args=[obj.pk])
+
+
+class SearchPage:
+    """One page of merged search hits; quacks like a ``Page`` for the pagination template."""
+
+    def __init__(self, hits, number, has_next):
+        self.object_list = hits
+        self.number = number
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def _candidates(model, query, limit):
+    """The best ``limit`` hits of one model, as (score, rank, created_at, pk) rows."""
+    return annotate_search_score(model._default_manager.all(), query).order_by(
+        "-search_score", "search_rank", "-created_at", "-id"
+    ).values_list("id", "search_score", "search_rank", "created_at")[:limit]
+
+
+def _merge_key_rows(model, rows):
+    label = model._meta.label
+    return [
+        (-score, rank, -created_at.timestamp(), label, -pk, model)
+        for pk, score, rank, created_at in rows
+    ]
+
+
+def _page_bounds(page_number, page_size):
+    """``(page_number, offset, limit)``; past SEARCH_MAX_PAGES raises InvalidPage."""
+    page_number = max(1, page_number)
+    if page_number > settings.SEARCH_MAX_PAGES:
+        raise InvalidPage(f"Search results stop at page {settings.SEARCH_MAX_PAGES}; refine the query.")
+    offset = (page_number - 1) * page_size
+    return page_number, offset, offset + page_size + 1
+
+
+def _page_window(candidates, page_number, offset, page_size):
+    merged = heapq.merge(*candidates, key=lambda row: row[:5])
+    window = list(itertools.islice(merged, offset, offset + page_size + 1))
+    has_next = len(window) > page_size and page_number < settings.SEARCH_MAX_PAGES
+    window = window[:page_size]
+    ids_by_model = {}
+    for row in window:
+        ids_by_model.setdefault(row[-1], []).append(-row[4])
+    return window, has_next, ids_by_model
+
+
+def _page_hits(window, objects):
+    return [
+        SearchHit(objects[row[-1]][-row[4]], -row[0])
+        for row in window if -row[4] in objects[row[-1]]
+    ]
+
+
+def search_all(query, page_number=1, page_size=25):
+    """
+    Search every indexed model and merge the hits into one stream ordered by
+    ``search_score``. Each model is asked for at most one page past the requested
+    offset, then only the hits on the page are loaded, so a search is a bounded
+    number of queries however large the tables are. Pages stop at
+    SEARCH_MAX_PAGES, which bounds the rows read as well.
+    """
+    page_number, offset, limit = _page_bounds(page_number, page_size)
+
+    candidates = [
+        _merge_key_rows(model, _candidates(model, query, limit))
+        for model in get_indexed_models()
+    ]
+    window, has_next, ids_by_model = _page_window(candidates, page_number, offset, page_size)
+    objects = {
+        model: model._default_manager.in_bulk(ids)
+        for model, ids in ids_by_model.items()
+    }
+    return SearchPage(_page_hits(window, objects), page_number, has_next)
+
+
+async def asearch_all(query, page_number=1, page_size=25):
+    """search_all() for async views: the per-model queries run concurrently."""
+    page_number, offset, limit = _page_bounds(page_number, page_size)
+    models = get_indexed_models()
+
+    async def fetch(model):
+        # Building the queryset may check for the FTS tables, which is a sync query.
+        queryset = await sync_to_async(_candidates)(model, query, limit)
+        # `async for` on the queryset rather than aiterator(): Django's values_list()
+        # iterable runs its query as soon as aiterator() asks for it, outside a thread.
+        return _merge_key_rows(model, [row async for row in queryset])
+
+    candidates = await asyncio.gather(*(fetch(model) for model in models))
+    window, has_next, ids_by_model = _page_window(candidates, page_number, offset, page_size)
+    loaded = await asyncio.gather(*(
+        model._default_manager.ain_bulk(ids) for model, ids in ids_by_model.items()
+    ))
+    objects = dict(zip(ids_by_model, loaded))
+    return SearchPage(_page_hits(window, objects), page_number, has_next)
@@ -1,12 +1,34 @@
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
-from .models import Task, BugReport, Note
+from .bulk import BatchPrimaryKeyRelatedField
+from .models import Task, BugReport, Note, ActivityEvent
 
 class BaseItemSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ['id', 'title', 'description', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('bulk'):
+            # Related objects come from a dict loaded once per batch. Unless the
+            # batch names its owners (imports), the writer owns every item.
+            related = self.context['bulk_related']
+            if 'owner' not in related:
+                fields['owner'].read_only = True
+            for name, objects in related.items():
+                field = fields[name]
+                fields[name] = BatchPrimaryKeyRelatedField(
+                    objects, queryset=field.queryset, required=field.required, allow_null=field.allow_null,
+                )
+        return fields
+
+    def get_validators(self):
+        # Bulk writes check (owner, title) for the whole batch in one query instead.
+        if self.context.get('bulk'):
+            return []
+        return super().get_validators()
+
     def validate_title(self, value):
         if len(value) < 3:
             raise serializers.ValidationError("Title must be at least 3 characters long.")
@@ -53,3 +75,24 @@ class NoteSerializer(BaseItemSerializer):
                 message="You already have a note with this title."
             )
         ]
+
+
+class SearchHitSerializer(serializers.Serializer):
+    type = serializers.CharField(source='model_name')
+    id = serializers.IntegerField(source='obj.pk')
+    title = serializers.CharField(source='obj.title')
+    description = serializers.CharField(source='obj.description')
+    created_at = serializers.DateTimeField(source='obj.created_at')
+    score = serializers.FloatField()
+    url = serializers.SerializerMethodField()
+
+    def get_url(self, hit):
+        request = self.context.get('request')
+        return request.build_absolute_uri(hit.api_url) if request else hit.api_url
+
+
+class ActivityEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ActivityEvent
+        fields = ['id', 'created_at', 'user', 'username', 'action', 'model_name', 'object_id', 'title', 'query']
+        read_only_fields = fields
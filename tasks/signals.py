@@ -0,0 +1,15 @@
+from django.dispatch import Signal
+
+
+# bulk_create, bulk_update, QuerySet.update() and bulk.queryset_delete() skip
+# post_save/post_delete, so the bulk write paths send this instead. Arguments:
+#   sender  - the model class
+#   action  - "created", "updated" or "deleted"
+#   objects - the saved instances ("created"/"updated") or the deleted ones,
+#             loaded before the DELETE ("deleted")
+#   fields  - the updated field names ("updated" only)
+#   set_based - True when the rows were deleted without a post_delete for
+#             each of them ("deleted" only; see bulk.queryset_delete). A
+#             plain QuerySet.delete() sends post_delete per row, so receivers
+#             skip "deleted" when it is False.
+items_bulk_changed = Signal()
@@ -0,0 +1,138 @@
+"""
+Delta sync: a client keeps the ``cursor`` of its last sync and asks for the
+changes after it. Each change is the current version of an item, or a
+tombstone if it was deleted, so a client only has to apply them in order.
+
+The cursor is the log's auto-increment id. SQLite has one writer at a time, so
+ids become visible in order. PostgreSQL and MySQL hand out ids at INSERT but
+transactions may commit in another order, so a reader could see id 11 before
+id 10 commits and move its cursor past 10 for good. There, rows younger than
+SYNC_COMMIT_LAG seconds are held back, and a page stops at the first of them.
+A write transaction that stays open longer than the lag can still be missed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Task, SyncChange
+from .serializers import TaskSerializer, BugReportSerializer, NoteSerializer
+
+
+SYNC_SERIALIZERS = {
+    'task': TaskSerializer,
+    'bugreport': BugReportSerializer,
+    'note': NoteSerializer,
+}
+
+
+def _change(model, pk, action):
+    return SyncChange(model_name=model._meta.model_name, object_id=pk, action=action)
+
+
+def record_save(sender, instance, **kwargs):
+    _change(sender, instance.pk, 'saved').save()
+
+
+def record_delete(sender, instance, **kwargs):
+    _change(sender, instance.pk, 'deleted').save()
+
+
+def record_bulk(sender, action, objects, set_based=False, **kwargs):
+    if action == 'deleted' and not set_based:
+        # The queryset delete already sent post_delete for each row (record_delete).
+        return
+    action = 'deleted' if action == 'deleted' else 'saved'
+    SyncChange.objects.bulk_create([_change(sender, obj.pk, action) for obj in objects], batch_size=500)
+
+
+def record_assigned_tasks(sender, instance, **kwargs):
+    # pre_delete of a user: their assigned tasks get assigned_to = NULL through a plain
+    # UPDATE in the same transaction, which sends no signal of its own.
+    pks = list(instance.assigned_tasks.values_list('pk', flat=True))
+    if pks:
+        SyncChange.objects.bulk_create([_change(Task, pk, 'saved') for pk in pks], batch_size=500)
+
+
+def _commit_threshold():
+    # Rows changed after this may sit behind an uncommitted lower id (see the module docstring).
+    if not settings.SYNC_COMMIT_LAG:
+        return None
+    return timezone.now() - timedelta(seconds=settings.SYNC_COMMIT_LAG)
+
+
+def current_cursor():
+    """The cursor a client that is up to date with the log would hold now."""
+    threshold = _commit_threshold()
+    rows = SyncChange.objects.order_by('-id').values_list('id', 'changed_at')
+    if threshold is None:
+        return rows.values_list('id', flat=True).first() or 0
+    # Only the rows of the last SYNC_COMMIT_LAG seconds are walked.
+    for pk, changed_at in rows.iterator(chunk_size=100):
+        if changed_at <= threshold:
+            return pk
+    return 0
+
+
+def changes_since(cursor, limit=None, context=None):
+    """
+    Return ``(changes, next_cursor, has_more)`` for the changes after ``cursor``.
+    When an item changed several times in the page only its last change is kept.
+    Costs one query for the log plus one per model that has saved items in it.
+    """
+    limit = min(limit or settings.SYNC_PAGE_SIZE, settings.SYNC_MAX_PAGE_SIZE)
+    rows = list(SyncChange.objects.filter(id__gt=cursor).order_by('id')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    threshold = _commit_threshold()
+    if threshold is not None:
+        for index, row in enumerate(rows):
+            if row.changed_at > threshold:
+                rows, has_more = rows[:index], False
+                break
+    next_cursor = rows[-1].id if rows else cursor
+
+    latest = {}
+    for row in rows:
+        latest.pop((row.model_name, row.object_id), None)
+        latest[(row.model_name, row.object_id)] = row
+
+    saved = {}
+    for (model_name, object_id), row in latest.items():
+        if row.action == 'saved':
+            saved.setdefault(model_name, []).append(object_id)
+    objects = {
+        model_name: SYNC_SERIALIZERS[model_name].Meta.model.objects.in_bulk(pks)
+        for model_name, pks in saved.items()
+    }
+
+    changes = []
+    for (model_name, object_id), row in latest.items():
+        change = {'seq': row.id, 'type': model_name, 'id': object_id, 'action': row.action, 'data': None}
+        if row.action == 'saved':
+            obj = objects[model_name].get(object_id)
+            if obj is None:
+                # Deleted after this page's change; its tombstone is in a later page.
+                continue
+            change['data'] = SYNC_SERIALIZERS[model_name](obj, context=context).data
+        changes.append(change)
+    return changes, next_cursor, has_more
+
+
+def compact_sync_log(batch_size=1000):
+    """
+    Delete rows superseded by a later change of the same item. Safe for every
+    client: anyone whose cursor is before the old row is also before the newer one.
+    """
+    latest = (
+        SyncChange.objects.values('model_name', 'object_id')
+        .annotate(last=Max('id'))
+        .values_list('last', flat=True)
+    )
+    deleted = 0
+    while True:
+        ids = list(SyncChange.objects.exclude(id__in=latest).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += SyncChange.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,130 @@
+"""
+Normalized note tags. Note.tags stays the string users type ("Work, urgent");
+every save parses it into Tag rows linked through NoteTag, so "notes tagged X",
+per-tag counts and autocomplete are index lookups instead of substring scans.
+"""
+import re
+
+from django.db.models import Count
+
+from .models import NoteTag, Tag
+
+
+TAG_MAX_LENGTH = Tag._meta.get_field('name').max_length
+_SEPARATOR = re.compile(r"\s*,\s*")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_tag(name):
+    """Lowercase, no leading '#', inner whitespace as '-': "  #Data Science " -> "data-science"."""
+    return _SPACE.sub("-", name.strip().lstrip("#").strip().lower())[:TAG_MAX_LENGTH]
+
+
+def parse_tags(text):
+    """
+    Tag names in ``text``, in order and without duplicates. Tags are separated
+    by commas; a string without commas is split on whitespace ("django orm").
+    """
+    text = (text or "").strip()
+    parts = _SEPARATOR.split(text) if "," in text else text.split()
+    names = []
+    for part in parts:
+        name = normalize_tag(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def prefix_range(prefix):
+    """
+    Range lookups matching the names that start with ``prefix``. Unlike
+    ``LIKE 'prefix%'`` (case-insensitive on SQLite, so it cannot use the
+    index), a range is answered from the unique index on any database.
+    """
+    return {'name__gte': prefix, 'name__lt': prefix[:-1] + chr(ord(prefix[-1]) + 1)}
+
+
+def _tag_ids(names):
+    """Ids of the named tags, creating the missing ones: two queries at most."""
+    if not names:
+        return {}
+    ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+    return ids
+
+
+def set_note_tags(notes):
+    """Replace the tag links of ``notes`` with the tags parsed from their ``tags`` strings."""
+    parsed = {note.pk: parse_tags(note.tags) for note in notes}
+    ids = _tag_ids(sorted({name for names in parsed.values() for name in names}))
+    NoteTag.objects.filter(note_id__in=list(parsed)).delete()
+    NoteTag.objects.bulk_create(
+        [NoteTag(note_id=pk, tag_id=ids[name]) for pk, names in parsed.items() for name in names],
+        batch_size=500,
+    )
+
+
+def remember_tags(sender, instance, **kwargs):
+    # post_init; '__dict__' so a deferred field is not loaded for it.
+    instance._loaded_tags = instance.__dict__.get('tags')
+
+
+def sync_note_tags(sender, instance, created, update_fields=None, **kwargs):
+    # Only when the string changed, so saves that leave tags alone cost nothing.
+    if update_fields is not None and 'tags' not in update_fields:
+        return
+    loaded, instance._loaded_tags = instance._loaded_tags, instance.tags
+    if created and not parse_tags(instance.tags):
+        return
+    if not created and parse_tags(loaded) == parse_tags(instance.tags):
+        return
+    set_note_tags([instance])
+
+
+def sync_bulk_tags(sender, action, objects, fields=(), **kwargs):
+    if action == 'created':
+        changed = [note for note in objects if parse_tags(note.tags)]
+    elif action == 'updated' and 'tags' in fields:
+        changed = [note for note in objects if parse_tags(note._loaded_tags) != parse_tags(note.tags)]
+    else:
+        # Deleted notes lose their links through the cascade.
+        return
+    for note in objects:
+        note._loaded_tags = note.tags
+    if changed:
+        set_note_tags(changed)
+
+
+def notes_tagged(queryset, names):
+    """Narrow a Note queryset to the notes that carry every one of ``names``."""
+    for name in names:
+        name = normalize_tag(name)
+        queryset = queryset.filter(pk__in=NoteTag.objects.filter(tag__name=name).values('note_id'))
+    return queryset
+
+
+def tag_counts(prefix='', limit=50):
+    """``[(name, note count)]`` of the tags in use, most used first."""
+    tags = Tag.objects.all()
+    prefix = normalize_tag(prefix)
+    if prefix:
+        tags = tags.filter(**prefix_range(prefix))
+    return list(
+        tags.annotate(count=Count('note_links')).filter(count__gt=0)
+        .order_by('-count', 'name').values_list('name', 'count')[:limit]
+    )
+
+
+def autocomplete(prefix, limit=10):
+    """Names of tags in use that start with ``prefix``, alphabetically."""
+    prefix = normalize_tag(prefix)
+    if not prefix:
+        return []
+    return list(
+        Tag.objects.filter(**prefix_range(prefix), note_links__isnull=False)
+        .distinct().order_by('name').values_list('name', flat=True)[:limit]
+    )
+
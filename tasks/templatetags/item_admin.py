@@ -0,0 +1,21 @@
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+
+from ..changelist import BucketedChangeList
+
+register = template.Library()
+
+
+def counted_date_hierarchy(cl):
+    """The date_hierarchy tag, answered from the day counters when the changelist can."""
+    get_buckets = getattr(cl, 'get_date_buckets', None)
+    buckets = get_buckets() if get_buckets is not None else None
+    return date_hierarchy(cl if buckets is None else BucketedChangeList(cl, buckets))
+
+
+@register.tag(name='counted_date_hierarchy')
+def counted_date_hierarchy_tag(parser, token):
+    return InclusionAdminNode(
+        parser, token, func=counted_date_hierarchy, template_name='date_hierarchy.html', takes_context=False,
+    )
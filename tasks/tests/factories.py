@@ -0,0 +1,23 @@
+"""
+Seed realistic volumes of items for tests: a few users, each owning a share
+of hundreds of tasks, bug reports and notes, through the benchmark seeder.
+"""
+from django.contrib.auth.models import User
+
+from tasks.benchmarks import seed_items as seed_benchmark_items
+from tasks.models import Task, BugReport, Note
+
+
+def make_users(count=5, prefix="seed"):
+    users = User.objects.bulk_create([User(username=f"{prefix}{i}") for i in range(count)])
+    return list(User.objects.filter(username__in=[user.username for user in users]).order_by("id"))
+
+
+def seed_items(count=300, users=None, batch_size=500):
+    """
+    Create ``count`` tasks, bug reports and notes spread over ``users`` (five
+    new ones by default) with tasks.benchmarks.seed_items(). Returns
+    ``{model: [instances]}`` in creation order.
+    """
+    seed_benchmark_items(count, users or make_users(), batch_size=batch_size)
+    return {model: list(model.objects.order_by("id")) for model in (Task, BugReport, Note)}
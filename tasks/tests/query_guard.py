@@ -0,0 +1,102 @@
+"""
+Query guard for view tests: fail a request that runs too many queries, runs
+the same SQL (up to literal values) too often, which is the N+1 pattern, or
+runs a query slower than a threshold.
+
+Use ``QueryGuardMixin`` on a TestCase, so that every request made through
+``self.client`` is checked, or ``QueryGuard`` as a context manager around any
+block of code.
+"""
+import re
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+# Defaults; a test class can pick others with GuardedClient.limited().
+MAX_QUERIES = 15
+MAX_REPEATS = 3
+SLOW_QUERY_MS = None
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"IN \((?:\?, )*\?\)")
+_VALUES = re.compile(r"(\((?:\?, )*\?\))(?:, \((?:\?, )*\?\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def query_shape(sql):
+    """``sql`` with its literals replaced by ``?``, so queries that differ only in values compare equal."""
+    shape = _NUMBER.sub("?", _STRING.sub("?", sql))
+    shape = _IN_LIST.sub("IN (...)", shape)
+    shape = _VALUES.sub(r"\1, ...", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class QueryGuard(CaptureQueriesContext):
+    def __init__(self, max_queries=MAX_QUERIES, max_repeats=MAX_REPEATS, slow_query_ms=SLOW_QUERY_MS,
+                 label="", connection=connection):
+        super().__init__(connection)
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.slow_query_ms = slow_query_ms
+        self.label = label
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self.check()
+
+    def repeated(self):
+        """``{shape: count}`` of the shapes run more than ``max_repeats`` times."""
+        counts = {}
+        for query in self.captured_queries:
+            shape = query_shape(query["sql"])
+            counts[shape] = counts.get(shape, 0) + 1
+        return {shape: n for shape, n in counts.items() if n > self.max_repeats}
+
+    def slow(self):
+        if self.slow_query_ms is None:
+            return []
+        return [query for query in self.captured_queries if float(query["time"]) * 1000 > self.slow_query_ms]
+
+    def problems(self):
+        problems = []
+        if self.max_queries is not None and len(self) > self.max_queries:
+            listing = "\n".join(f"  {i}. {query['sql']}" for i, query in enumerate(self.captured_queries, 1))
+            problems.append(f"{len(self)} queries, more than the limit of {self.max_queries}:\n{listing}")
+        if self.max_repeats is not None:
+            for shape, n in self.repeated().items():
+                problems.append(f"Same query run {n} times (limit {self.max_repeats}), likely an N+1:\n  {shape}")
+        for query in self.slow():
+            problems.append(
+                f"Query took {float(query['time']) * 1000:.1f} ms (limit {self.slow_query_ms} ms):\n  {query['sql']}"
+            )
+        return problems
+
+    def check(self):
+        problems = self.problems()
+        if problems:
+            prefix = f"{self.label}: " if self.label else ""
+            raise AssertionError(prefix + "\n".join(problems))
+
+
+class GuardedClient(Client):
+    """Test client that runs every request under a QueryGuard."""
+    max_queries = MAX_QUERIES
+    max_repeats = MAX_REPEATS
+    slow_query_ms = SLOW_QUERY_MS
+
+    @classmethod
+    def limited(cls, **limits):
+        return type("GuardedClient", (cls,), limits)
+
+    def request(self, **request):
+        label = f"{request.get('REQUEST_METHOD', 'GET')} {request.get('PATH_INFO', '')}"
+        with QueryGuard(self.max_queries, self.max_repeats, self.slow_query_ms, label=label):
+            return super().request(**request)
+
+
+class QueryGuardMixin:
+    client_class = GuardedClient
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.activity import activity_buffer, flush_activity_if_due, log_activity
+from tasks.models import ActivityEvent, Task
+
+
+@override_settings(ACTIVITY_EVENTS_ENABLED=True, ACTIVITY_BUFFER_SIZE=100, ACTIVITY_FLUSH_INTERVAL=60)
+class ActivityEventTestCase(TestCase):
+    def setUp(self):
+        activity_buffer.clear()
+        self.addCleanup(activity_buffer.clear)
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+
+    def test_events_are_buffered_then_bulk_written(self):
+        log_activity(self.user, 'viewed', 'viewed', model=Task, obj=self.task)
+        log_activity(self.user, 'searched', 'searched', query='report')
+        self.assertEqual(ActivityEvent.objects.count(), 0)
+        with self.assertNumQueries(1):
+            self.assertEqual(activity_buffer.flush(), 2)
+        viewed, searched = ActivityEvent.objects.order_by('id')
+        self.assertEqual((viewed.user, viewed.action, viewed.model_name, viewed.object_id, viewed.title),
+                         (self.user, 'viewed', 'Task', self.task.pk, 'Test Task'))
+        self.assertEqual((searched.action, searched.query), ('searched', 'report'))
+
+    def test_buffer_flushes_when_full(self):
+        with override_settings(ACTIVITY_BUFFER_SIZE=3), self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                log_activity(self.user, 'visited', 'visited', model=Task)
+            self.assertEqual(ActivityEvent.objects.count(), 0)
+        self.assertEqual(ActivityEvent.objects.count(), 3)
+
+    def test_rolled_back_flush_keeps_the_buffered_events(self):
+        # Another request's events are waiting when this one fills the buffer and rolls back.
+        log_activity(self.other, 'visited', 'visited', model=Task)
+        with override_settings(ACTIVITY_BUFFER_SIZE=3), self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                log_activity(self.user, 'updated', 'updated', model=Task)
+                log_activity(self.user, 'deleted', 'deleted', model=Task)
+                transaction.set_rollback(True)
+        self.assertEqual(ActivityEvent.objects.count(), 0)
+        self.assertEqual(activity_buffer.flush(), 3)
+        self.assertEqual(ActivityEvent.objects.count(), 3)
+
+    def test_request_end_flushes_once_the_interval_has_passed(self):
+        log_activity(self.user, 'visited', 'visited', model=Task)
+        with self.captureOnCommitCallbacks(execute=True):
+            flush_activity_if_due()
+        self.assertEqual(ActivityEvent.objects.count(), 0)
+        with override_settings(ACTIVITY_FLUSH_INTERVAL=0), self.captureOnCommitCallbacks(execute=True):
+            flush_activity_if_due()
+        self.assertEqual(ActivityEvent.objects.count(), 1)
+
+    def test_views_record_events(self):
+        self.client.login(username='testuser', password='testpass123')
+        self.client.post(reverse('task-delete', args=[self.task.pk]))
+        activity_buffer.flush()
+        event = ActivityEvent.objects.get(action='deleted')
+        self.assertEqual((event.user, event.model_name, event.object_id), (self.user, 'Task', self.task.pk))
+
+    def test_api_lists_own_events_only(self):
+        log_activity(self.user, 'viewed', 'viewed', model=Task, obj=self.task)
+        log_activity(self.other, 'visited', 'visited', model=Task)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('api-activity'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e['action'] for e in response.data['results']], ['viewed'])
+
+    def test_api_filters_for_staff(self):
+        for user in (self.user, self.other):
+            log_activity(user, 'viewed', 'viewed', model=Task, obj=self.task)
+            log_activity(user, 'searched', 'searched', query='x')
+        self.client.force_login(self.staff)
+        url = reverse('api-activity')
+        self.assertEqual(len(self.client.get(url).data['results']), 4)
+        response = self.client.get(url, {'user': 'otheruser', 'model': 'task'})
+        self.assertEqual([(e['username'], e['action']) for e in response.data['results']], [('otheruser', 'viewed')])
+        response = self.client.get(url, {'user': self.user.pk, 'action': 'searched'})
+        self.assertEqual([e['username'] for e in response.data['results']], ['testuser'])
+
+    def test_api_time_range(self):
+        log_activity(self.user, 'visited', 'visited', model=Task)
+        activity_buffer.flush()
+        ActivityEvent.objects.update(created_at=timezone.now() - timedelta(days=3))
+        log_activity(self.user, 'viewed', 'viewed', model=Task, obj=self.task)
+        self.client.force_login(self.user)
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('api-activity'), {'since': since})
+        self.assertEqual([e['action'] for e in response.data['results']], ['viewed'])
+        response = self.client.get(reverse('api-activity'), {'until': since})
+        self.assertEqual([e['action'] for e in response.data['results']], ['visited'])
+        self.assertEqual(self.client.get(reverse('api-activity'), {'since': 'yesterday'}).status_code, 400)
+
+    def test_api_requires_login(self):
+        self.assertEqual(self.client.get(reverse('api-activity')).status_code, 403)
+
+    def test_prune_deletes_old_events_in_batches(self):
+        for _ in range(5):
+            log_activity(self.user, 'visited', 'visited', model=Task)
+        activity_buffer.flush()
+        old_ids = list(ActivityEvent.objects.values_list('id', flat=True)[:3])
+        ActivityEvent.objects.filter(id__in=old_ids).update(created_at=timezone.now() - timedelta(days=100))
+        out = StringIO()
+        call_command('prune_activity', days=90, batch_size=2, stdout=out)
+        self.assertIn('Deleted 3 activity event(s)', out.getvalue())
+        self.assertEqual(ActivityEvent.objects.count(), 2)
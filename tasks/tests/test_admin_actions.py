@@ -0,0 +1,99 @@
+from django.contrib.admin import helpers
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from tasks.bulk import queryset_delete
+from tasks.counters import reconcile_counters
+from tasks.models import Task, BugReport, Note, NoteTag, SyncChange, Tag
+
+
+class AdminBulkActionTestCase(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='testpass123')
+        self.user = User.objects.create_user(username='testuser', password='testpass123', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def run_action(self, model, action, objects, **data):
+        url = reverse(f'admin:tasks_{model._meta.model_name}_changelist')
+        data = {'action': action, helpers.ACTION_CHECKBOX_NAME: [obj.pk for obj in objects], **data}
+        return self.client.post(url, data)
+
+    def make_tasks(self, count, owner=None):
+        start = Task.objects.count()
+        return [Task.objects.create(title=f'Task {start + i}', description='d', owner=owner or self.admin)
+                for i in range(count)]
+
+    def count_writes(self, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.run_action(*args, **kwargs)
+        self.assertEqual(response.status_code, 302)
+        return sum(query['sql'].startswith(('UPDATE "tasks_task"', 'DELETE FROM "tasks_task"')) for query in queries)
+
+    def test_set_status_is_one_update(self):
+        few, many = self.make_tasks(3), self.make_tasks(30)
+        with CaptureQueriesContext(connection) as small:
+            self.run_action(Task, 'set_status', few, status='done')
+        with CaptureQueriesContext(connection) as large:
+            self.run_action(Task, 'set_status', many, status='done')
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Task.objects.filter(status='done').count(), 33)
+        self.assertEqual(reconcile_counters(dry_run=True), {})
+        self.assertEqual(SyncChange.objects.filter(model_name='task', action='saved').count(), 33 + 33)
+
+    def test_only_changed_rows_are_written(self):
+        tasks = self.make_tasks(4)
+        Task.objects.filter(pk=tasks[0].pk).update(status='done')
+        before = Task.objects.get(pk=tasks[0].pk).updated_at
+        self.assertEqual(self.count_writes(Task, 'set_status', tasks, status='done'), 1)
+        self.assertEqual(Task.objects.get(pk=tasks[0].pk).updated_at, before)
+        self.assertEqual(SyncChange.objects.filter(model_name='task').count(), 4 + 3)
+
+    def test_invalid_status_changes_nothing(self):
+        tasks = self.make_tasks(2)
+        self.assertEqual(self.count_writes(Task, 'set_status', tasks, status='bogus'), 0)
+        self.assertFalse(Task.objects.exclude(status='todo').exists())
+
+    def test_reassign(self):
+        tasks = self.make_tasks(3)
+        self.run_action(Task, 'reassign', tasks, assigned_to=self.user.pk)
+        self.assertEqual(Task.objects.filter(assigned_to=self.user).count(), 3)
+        self.assertEqual(reconcile_counters(dry_run=True), {})
+
+    def test_bug_status_and_note_pins(self):
+        bugs = [BugReport.objects.create(title=f'Bug {i}', description='d', owner=self.admin) for i in range(2)]
+        notes = [Note.objects.create(title=f'Note {i}', description='c', owner=self.admin) for i in range(2)]
+        self.run_action(BugReport, 'set_status', bugs, status='closed')
+        self.run_action(Note, 'pin', notes)
+        self.assertEqual(BugReport.objects.filter(status='closed').count(), 2)
+        self.assertEqual(Note.objects.filter(is_pinned=True).count(), 2)
+        self.run_action(Note, 'unpin', notes[:1])
+        self.assertEqual(Note.objects.filter(is_pinned=True).count(), 1)
+        self.assertEqual(reconcile_counters(dry_run=True), {})
+
+    def test_actions_stay_in_the_owner_scope(self):
+        self.user.user_permissions.add(*Permission.objects.filter(codename__in=['view_task', 'change_task']))
+        mine, theirs = self.make_tasks(1, owner=self.user), self.make_tasks(2)
+        self.client.force_login(self.user)
+        self.run_action(Task, 'set_status', mine + theirs, status='done')
+        self.assertEqual(list(Task.objects.filter(status='done')), mine)
+
+    def test_delete_selected_is_set_based(self):
+        notes = [Note.objects.create(title=f'Note {i}', description='c', tags='work, home', owner=self.admin) for i in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.run_action(Note, 'delete_selected', notes[:4], post='yes')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(sum(query['sql'].startswith('DELETE FROM "tasks_note"') for query in queries), 1)
+        self.assertEqual(list(Note.objects.all()), notes[4:])
+        self.assertEqual(NoteTag.objects.count(), 2)
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(SyncChange.objects.filter(model_name='note', action='deleted').count(), 4)
+        self.assertEqual(reconcile_counters(dry_run=True), {})
+
+    def test_set_based_delete_refuses_other_on_delete_rules(self):
+        # Task.assigned_to is SET_NULL: deleting users this way would leave dangling ids.
+        Task.objects.create(title='Assigned', description='d', owner=self.admin, assigned_to=self.user)
+        with self.assertRaisesMessage(ValueError, 'Task.assigned_to'):
+            queryset_delete(User.objects.filter(pk=self.user.pk))
+        self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
@@ -0,0 +1,103 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import Task, BugReport, Note
+from tasks.search import asearch_all, search_all
+
+
+# The async client closes responses on a thread with its own connection, where a
+# request-end flush would wait on this test's transaction.
+@override_settings(ACTIVITY_EVENTS_ENABLED=False)
+class AsyncApiTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        for i in range(5):
+            Task.objects.create(title=f'Design task {i}', description='d', owner=self.user,
+                                assigned_to=self.user)
+        self.bug = BugReport.objects.create(title='Design bug', description='d', owner=self.user)
+        Note.objects.create(title='Unrelated note', description='design notes', owner=self.user)
+        # Search scores decay with age and are computed per query; spread the rows out so
+        # sync and async searches, run a moment apart, still rank them the same way.
+        now, age = timezone.now(), 0
+        for model in (Task, BugReport, Note):
+            for pk in model.objects.order_by('-id').values_list('id', flat=True):
+                model.objects.filter(pk=pk).update(created_at=now - timedelta(days=age))
+                age += 3
+
+    async def test_list_matches_sync_list(self):
+        for prefix in ('task', 'bug', 'note'):
+            with self.subTest(prefix=prefix):
+                sync = await self.async_client.get(reverse(f'api-{prefix}-list'), {'page_size': 100})
+                response = await self.async_client.get(reverse(f'api-async-{prefix}-list'), {'page_size': 100})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['results'], sync.json()['results'])
+
+    async def test_punctuation_only_query(self):
+        for name in ('api-task-list', 'api-note-list', 'api-async-task-list', 'api-async-note-list'):
+            with self.subTest(name=name):
+                response = await self.async_client.get(reverse(name), {'q': '!!!'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['results'], [])
+
+    async def test_list_cursor_walk(self):
+        seen = []
+        url, params = reverse('api-async-task-list'), {'page_size': 2}
+        while url:
+            data = (await self.async_client.get(url, params)).json()
+            seen += [item['id'] for item in data['results']]
+            url, params = data['next'], None
+        expected = [pk async for pk in Task.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+        self.assertEqual(seen, expected)
+
+    async def test_invalid_cursor(self):
+        response = await self.async_client.get(reverse('api-async-task-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_detail(self):
+        response = await self.async_client.get(reverse('api-async-bug-detail', args=[self.bug.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Design bug')
+        response = await self.async_client.get(reverse('api-async-bug-detail', args=[self.bug.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_search_matches_sync_search(self):
+        for page in (1, 2):
+            with self.subTest(page=page):
+                sync = await self.async_client.get(reverse('api-search'), {'q': 'design', 'page': page, 'page_size': 4})
+                response = await self.async_client.get(
+                    reverse('api-async-search'), {'q': 'design', 'page': page, 'page_size': 4}
+                )
+                self.assertEqual(response.status_code, 200)
+                urls = [hit['url'] for hit in response.json()['results']]
+                self.assertEqual(urls, [hit['url'] for hit in sync.json()['results']])
+        page = await asearch_all('design', 1, 25)
+        self.assertEqual({hit.model_name for hit in page}, {'task', 'bugreport', 'note'})
+
+    def test_sync_and_async_search_agree(self):
+        from asgiref.sync import async_to_sync
+
+        sync_page = search_all('design', 1, 3)
+        async_page = async_to_sync(asearch_all)('design', 1, 3)
+        self.assertEqual([hit.obj for hit in async_page], [hit.obj for hit in sync_page])
+        self.assertEqual(async_page.has_next(), sync_page.has_next())
+
+
+
+class BenchmarkCommandTestCase(TransactionTestCase):
+    # The sync side runs in worker threads with their own connections, which
+    # cannot read tables that a TestCase transaction holds locked.
+
+    def test_benchmark_command(self):
+        user = User.objects.create_user(username='testuser', password='testpass123')
+        Note.objects.create(title='Test note', description='d', owner=user)
+        out = StringIO()
+        call_command('benchmark_async', 'notes', requests=4, concurrency=2, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith('sync   4 requests'))
+        self.assertTrue(lines[2].startswith('async  4 requests'))
+        self.assertNotIn('failed', out.getvalue())
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from tasks.benchmarks import compare, run_benchmarks, seed
+from tasks.counters import reconcile_counters
+from tasks.models import Task, BugReport, Note
+
+
+class BenchmarkTestCase(TestCase):
+    def test_seed_tops_up_to_the_volume(self):
+        seed(40, users=3, batch_size=15)
+        for model in (Task, BugReport, Note):
+            self.assertEqual(model.objects.count(), 40)
+        self.assertEqual(Task.objects.values('owner').distinct().count(), 3)
+        seed(50, users=3)
+        self.assertEqual(Note.objects.count(), 50)
+        self.assertEqual(reconcile_counters(dry_run=True), {})
+
+    def test_run_benchmarks(self):
+        seed(30, users=3)
+        results = run_benchmarks(['web-detail:task', 'api-create', 'admin-changelist:bug'], requests=3, warmup=1)
+        self.assertEqual(sorted(results), [
+            'admin-changelist:bug', 'api-create:bug', 'api-create:note', 'api-create:task', 'web-detail:task',
+        ])
+        for name, stats in results.items():
+            with self.subTest(name=name):
+                self.assertEqual((stats['requests'], stats['errors']), (3, 0))
+                self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+                self.assertGreater(stats['queries_per_request'], 0)
+        self.assertEqual(Task.objects.count(), 34)
+
+    def test_compare(self):
+        baseline = {'results': {'a': {'p50_ms': 10.0, 'p99_ms': 20.0, 'throughput_rps': 100.0}}}
+        current = {'results': {'a': {'p50_ms': 5.0, 'p99_ms': 20.0, 'throughput_rps': 150.0}, 'b': {}}}
+        self.assertEqual(compare(baseline, current), {
+            'a': {'p50_ms': (10.0, 5.0, -50.0), 'p99_ms': (20.0, 20.0, 0.0), 'throughput_rps': (100.0, 150.0, 50.0)},
+        })
+
+    def test_command_writes_json(self):
+        seed(10, users=2)
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        options = dict(current_db=True, only=['api-detail:note'], requests=2, warmup=0, stderr=StringIO())
+        call_command('benchmark', output=path, **options)
+        with open(path) as result_file:
+            report = json.load(result_file)
+        self.assertEqual(report['environment']['items']['note'], 10)
+        self.assertEqual(list(report['results']), ['api-detail:note'])
+
+        err = StringIO()
+        call_command('benchmark', compare=path, stdout=StringIO(), **{**options, 'stderr': err})
+        self.assertIn('Change against the baseline', err.getvalue())
@@ -0,0 +1,179 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from tasks import bulk
+from tasks.counters import reconcile_counters
+from tasks.models import Task, BugReport, Note
+from tasks.signals import items_bulk_changed
+
+
+class BulkAPITestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.force_login(self.user)
+        self.url = reverse('api-task-bulk')
+
+    def send(self, method, data, url=None):
+        return getattr(self.client, method)(url or self.url, json.dumps(data), content_type='application/json')
+
+    def test_create_many_in_constant_queries(self):
+        items = [{'title': f'Task {i}', 'description': 'd', 'assigned_to': self.other.pk} for i in range(50)]
+        # session, user, assignee lookup, uniqueness, INSERT (in a savepoint), sync log INSERT, counters upsert.
+        with self.assertNumQueries(9):
+            response = self.send('post', items)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 50)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Task.objects.filter(owner=self.user, assigned_to=self.other).count(), 50)
+
+    def test_create_reports_per_item_errors(self):
+        Task.objects.create(title='Existing', description='d', owner=self.user)
+        Task.objects.create(title='Theirs', description='d', owner=self.other)
+        items = [
+            {'title': 'Existing', 'description': 'd'},
+            {'title': 'ok', 'description': 'd'},
+            {'title': 'Fresh', 'description': 'd'},
+            {'title': 'Fresh', 'description': 'd'},
+            {'title': 'Theirs', 'description': 'd', 'assigned_to': 999},
+            {'title': 'Theirs', 'description': 'd'},
+        ]
+        response = self.send('post', items)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['title'] for item in response.data['created']], ['Fresh', 'Theirs'])
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [0, 1, 3, 4])
+        self.assertEqual(errors[0]['title'], ['You already have a task with this title.'])
+        self.assertIn('assigned_to', errors[4])
+
+    def test_title_taken_during_the_batch_is_an_item_error(self):
+        taken_pairs = bulk._taken_pairs
+
+        def check_then_race(model, pairs):
+            # Another request inserts 'Raced' right after the uniqueness check.
+            taken = taken_pairs(model, pairs)
+            if not Task.objects.filter(title='Raced').exists():
+                Task.objects.bulk_create([Task(title='Raced', description='d', owner=self.user)])
+            return taken
+
+        items = [{'title': 'Raced', 'description': 'd'}, {'title': 'Calm', 'description': 'd'}]
+        with mock.patch.object(bulk, '_taken_pairs', side_effect=check_then_race):
+            response = self.send('post', items)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['title'] for item in response.data['created']], ['Calm'])
+        self.assertEqual(response.data['errors'],
+                         [{'index': 0, 'errors': {'title': ['You already have a task with this title.']}}])
+
+    def test_owner_is_always_the_requesting_user(self):
+        response = self.send('post', [{'title': 'Mine', 'description': 'd', 'owner': self.other.pk}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.get(title='Mine').owner, self.user)
+
+    def test_update(self):
+        tasks = [Task.objects.create(title=f'Task {i}', description='d', owner=self.user) for i in range(3)]
+        theirs = Task.objects.create(title='Theirs', description='d', owner=self.other)
+        before = tasks[0].updated_at
+        items = [
+            {'id': tasks[0].pk, 'status': 'done'},
+            {'id': tasks[1].pk, 'title': 'Task 2'},
+            {'id': tasks[2].pk, 'title': 'Renamed'},
+            {'id': theirs.pk, 'status': 'done'},
+            {'id': tasks[0].pk, 'priority': 'high'},
+        ]
+        response = self.send('patch', items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.data['updated']], [tasks[0].pk, tasks[2].pk])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 3, 4])
+        tasks[0].refresh_from_db()
+        self.assertEqual(tasks[0].status, 'done')
+        self.assertGreater(tasks[0].updated_at, before)
+        self.assertEqual(Task.objects.get(pk=tasks[2].pk).title, 'Renamed')
+        self.assertEqual(Task.objects.get(pk=theirs.pk).status, 'todo')
+
+    def test_update_in_constant_queries(self):
+        tasks = [Task.objects.create(title=f'Task {i}', description='d', owner=self.user) for i in range(20)]
+        items = [{'id': task.pk, 'title': f'Renamed {task.pk}', 'assigned_to': self.other.pk} for task in tasks]
+        # session, user, items, assignee lookup, uniqueness, UPDATE (in a savepoint), sync log INSERT, counters upsert.
+        with self.assertNumQueries(10):
+            response = self.send('patch', items)
+        self.assertEqual(len(response.data['updated']), 20)
+
+    def test_rename_taken_during_the_batch_is_an_item_error(self):
+        tasks = [Task.objects.create(title=f'Task {i}', description='d', owner=self.user) for i in range(2)]
+        taken_titles = bulk._taken_titles
+
+        def check_then_race(model, owner, titles):
+            # Another request creates 'Raced' right after the uniqueness check.
+            taken = taken_titles(model, owner, titles)
+            if not Task.objects.filter(title='Raced').exists():
+                Task.objects.bulk_create([Task(title='Raced', description='d', owner=self.user)])
+            return taken
+
+        items = [{'id': tasks[0].pk, 'title': 'Raced'}, {'id': tasks[1].pk, 'title': 'Calm'}]
+        with mock.patch.object(bulk, '_taken_titles', side_effect=check_then_race):
+            response = self.send('patch', items)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['title'] for item in response.data['updated']], ['Calm'])
+        self.assertEqual(response.data['errors'], [
+            {'index': 0, 'id': tasks[0].pk, 'errors': {'title': ['You already have a task with this title.']}},
+        ])
+        self.assertEqual(Task.objects.get(pk=tasks[0].pk).title, 'Task 0')
+
+    def test_delete(self):
+        mine = [BugReport.objects.create(title=f'Bug {i}', description='d', owner=self.user) for i in range(3)]
+        theirs = BugReport.objects.create(title='Theirs', description='d', owner=self.other)
+        response = self.send('delete', [mine[0].pk, mine[1].pk, theirs.pk, mine[0].pk], reverse('api-bug-bulk'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['deleted'], [mine[0].pk, mine[1].pk])
+        self.assertEqual(response.data['errors'], [
+            {'index': 2, 'id': theirs.pk, 'errors': {'id': ['Not found.']}},
+            {'index': 3, 'id': mine[0].pk, 'errors': {'id': ['Listed more than once in this batch.']}},
+        ])
+        self.assertEqual(set(BugReport.objects.values_list('pk', flat=True)), {mine[2].pk, theirs.pk})
+
+    def test_delete_in_constant_queries(self):
+        counts = []
+        for size in (3, 30):
+            notes = [Note.objects.create(title=f'Note {size} {i}', description='d', tags='work', owner=self.user)
+                     for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.send('delete', [note.pk for note in notes], reverse('api-note-bulk'))
+            self.assertEqual(len(response.data['deleted']), size)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Note.objects.exists())
+        self.assertEqual(reconcile_counters(dry_run=True), {})
+
+    def test_all_items_failing_is_a_bad_request(self):
+        response = self.send('post', [{'title': 'x'}], reverse('api-note-bulk'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Note.objects.count(), 0)
+
+    @override_settings(BULK_MAX_ITEMS=2)
+    def test_batch_limits(self):
+        self.assertEqual(self.send('post', {'title': 'not a list'}).status_code, 400)
+        self.assertEqual(self.send('post', []).status_code, 400)
+        self.assertEqual(self.send('post', [{}, {}, {}]).status_code, 400)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.send('post', [{'title': 'Task', 'description': 'd'}]).status_code, 403)
+
+    def test_sends_bulk_changed_signal(self):
+        calls = []
+
+        def receiver(sender, action, objects, **kwargs):
+            calls.append((sender, action, len(objects)))
+
+        items_bulk_changed.connect(receiver)
+        self.addCleanup(items_bulk_changed.disconnect, receiver)
+        response = self.send('post', [{'title': 'One', 'description': 'd'}, {'title': 'Two', 'description': 'd'}])
+        ids = [item['id'] for item in response.data['created']]
+        self.send('patch', [{'id': ids[0], 'status': 'done'}])
+        self.send('delete', ids)
+        self.assertEqual(calls, [(Task, 'created', 2), (Task, 'updated', 1), (Task, 'deleted', 2)])
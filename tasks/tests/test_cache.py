@@ -0,0 +1,113 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.models import Task, Note
+
+
+@override_settings(API_CACHE_ENABLED=True)
+class ResponseCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.task = Task.objects.create(title='Test Task', description='d', owner=self.user, assigned_to=self.other)
+        self.client.force_login(self.user)
+
+    def get(self, url, **params):
+        return self.client.get(url, params)
+
+    def test_list_is_served_from_cache_until_an_item_changes(self):
+        url = reverse('api-task-list')
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+        # session and user; the ETag comes from the cache's version token, and no page query.
+        with self.assertNumQueries(2):
+            response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['results'][0]['title'], 'Test Task')
+
+        Task.objects.create(title='Another', description='d', owner=self.user)
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_keys_include_user_and_query(self):
+        url = reverse('api-task-list')
+        self.get(url)
+        self.assertEqual(self.get(url, q='test')['X-Cache'], 'MISS')
+        self.assertEqual(self.get(url, page_size=1)['X-Cache'], 'MISS')
+        self.client.force_login(self.other)
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+
+    def test_detail_is_invalidated_by_save_and_delete(self):
+        url = reverse('api-task-detail', args=[self.task.pk])
+        self.get(url)
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+        self.task.title = 'Renamed'
+        self.task.save()
+        response = self.get(url)
+        self.assertEqual((response['X-Cache'], response.data['title']), ('MISS', 'Renamed'))
+
+        self.task.delete()
+        self.assertEqual(self.get(url).status_code, 404)
+
+    def test_other_objects_keep_their_detail_cache(self):
+        other_task = Task.objects.create(title='Other Task', description='d', owner=self.user)
+        url = reverse('api-task-detail', args=[self.task.pk])
+        self.get(url)
+        other_task.save()
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+    def test_models_are_invalidated_separately(self):
+        url = reverse('api-task-list')
+        self.get(url)
+        Note.objects.create(title='A note', description='d', owner=self.user)
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+    def test_api_writes_invalidate(self):
+        list_url = reverse('api-task-list')
+        self.get(list_url)
+        self.client.patch(
+            reverse('api-task-detail', args=[self.task.pk]), json.dumps({'status': 'done'}),
+            content_type='application/json',
+        )
+        response = self.get(list_url)
+        self.assertEqual((response['X-Cache'], response.data['results'][0]['status']), ('MISS', 'done'))
+
+    def test_bulk_writes_invalidate(self):
+        url = reverse('api-task-detail', args=[self.task.pk])
+        self.get(url)
+        self.client.patch(
+            reverse('api-task-bulk'), json.dumps([{'id': self.task.pk, 'status': 'done'}]),
+            content_type='application/json',
+        )
+        response = self.get(url)
+        self.assertEqual((response['X-Cache'], response.data['status']), ('MISS', 'done'))
+
+    def test_deleting_the_assignee_invalidates_their_tasks(self):
+        url = reverse('api-task-detail', args=[self.task.pk])
+        self.get(url)
+        self.other.delete()
+        response = self.get(url)
+        self.assertEqual((response['X-Cache'], response.data['assigned_to']), ('MISS', None))
+
+    def test_stats(self):
+        url = reverse('api-task-list')
+        self.get(url)
+        self.get(url)
+        self.get(url)
+        self.assertEqual(self.get(reverse('api-cache-stats')).status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        stats = self.get(reverse('api-cache-stats')).data
+        self.assertEqual(stats['tasks.task'], {'hits': 2, 'misses': 1})
+        self.assertEqual(stats['tasks.note'], {'hits': 0, 'misses': 0})
+
+    @override_settings(API_CACHE_ENABLED=False)
+    def test_disabled(self):
+        url = reverse('api-task-list')
+        self.get(url)
+        self.assertNotIn('X-Cache', self.get(url))
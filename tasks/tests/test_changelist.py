@@ -0,0 +1,93 @@
+import datetime
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.counters import item_days, reconcile_counters
+from tasks.models import Task, ItemCounter
+
+
+def aware(year, month, day):
+    return timezone.make_aware(datetime.datetime(year, month, day, 12))
+
+
+@override_settings(ADMIN_EXACT_COUNT_LIMIT=5)
+class ChangelistCountTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(username='admin', password='testpass123')
+        cls.user = User.objects.create_user(username='testuser', password='testpass123', is_staff=True)
+        cls.user.user_permissions.add(Permission.objects.get(codename='view_task'))
+        for i in range(8):
+            Task.objects.create(title=f'Task {i} report', description='d', owner=cls.admin)
+        Task.objects.create(title='Mine', description='d', owner=cls.user)
+        days = [aware(2024, 3, 1), aware(2024, 3, 9), aware(2025, 1, 2)]
+        for i, task in enumerate(Task.objects.order_by('id')):
+            Task.objects.filter(pk=task.pk).update(created_at=days[i % len(days)])
+        # The updates sent no signals.
+        reconcile_counters()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:tasks_task_changelist')
+
+    def changelist(self, response):
+        return response.context['cl']
+
+    def test_small_counts_are_exact(self):
+        self.client.force_login(self.user)
+        cl = self.changelist(self.client.get(self.url))
+        self.assertEqual(cl.result_count, 1)
+        self.assertFalse(cl.paginator.approximate)
+        self.assertIsNone(cl.full_result_count)
+
+    def test_unfiltered_count_comes_from_the_counters(self):
+        ItemCounter.objects.filter(user=self.admin, role='owner', model_name='task', dimension='status').update(count=F('count') + 100)
+        cl = self.changelist(self.client.get(self.url))
+        self.assertEqual(cl.result_count, 109)
+        self.assertTrue(cl.paginator.approximate)
+
+    def test_filtered_count_is_cached(self):
+        cl = self.changelist(self.client.get(self.url, {'q': 'report'}))
+        self.assertEqual(cl.result_count, 8)
+        Task.objects.bulk_create([Task(title='Extra report', description='d', owner=self.admin)])
+        cl = self.changelist(self.client.get(self.url, {'q': 'report'}))
+        self.assertEqual(cl.result_count, 8)
+
+    def test_pages_past_an_estimate_are_empty(self):
+        ItemCounter.objects.filter(user=self.admin, role='owner', model_name='task', dimension='status').update(count=F('count') + 100)
+        response = self.client.get(self.url, {'p': 4})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.changelist(response).result_list), [])
+
+    def test_date_hierarchy_reads_the_counters(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'created_at__year=2024')
+        self.assertContains(response, 'created_at__year=2025')
+        # No MIN/MAX or DISTINCT over the task table.
+        task_queries = [query['sql'] for query in captured if 'FROM "tasks_task"' in query['sql']]
+        self.assertFalse([sql for sql in task_queries if 'MIN(' in sql or 'DISTINCT' in sql])
+
+        response = self.client.get(self.url, {'created_at__year': 2024})
+        self.assertContains(response, 'created_at__month=3')
+        response = self.client.get(self.url, {'created_at__year': 2024, 'created_at__month': 3})
+        self.assertContains(response, 'created_at__day=9')
+        self.assertEqual(self.changelist(response).result_count, 6)
+
+    def test_item_days(self):
+        self.assertEqual(item_days(Task, year=2024), [datetime.date(2024, 3, 1), datetime.date(2024, 3, 9)])
+        self.assertEqual(item_days(Task, owner_id=self.user.pk), [datetime.date(2025, 1, 2)])
+        self.assertEqual(item_days(Task, year=2025, month=2), [])
+
+    def test_filtered_date_hierarchy_falls_back_to_the_table(self):
+        response = self.client.get(self.url, {'q': 'Mine'})
+        self.assertIsNone(self.changelist(response).get_date_buckets())
+        self.assertContains(response, 'created_at__year=2025')
+        self.assertNotContains(response, 'created_at__year=2024')
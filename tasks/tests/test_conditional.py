@@ -0,0 +1,97 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.models import Task
+
+
+class ConditionalRequestTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+        self.client.force_login(self.user)
+        self.detail_url = reverse('api-task-detail', args=[self.task.pk])
+
+    def patch(self, data, **headers):
+        return self.client.patch(self.detail_url, json.dumps(data), content_type='application/json', headers=headers)
+
+    def test_detail_not_modified(self):
+        response = self.client.get(self.detail_url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        # session, user, the object; nothing serialized.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.detail_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.detail_url, headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_changes_etag_on_update(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.task.status = 'done'
+        self.task.save()
+        response = self.client.get(self.detail_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_not_modified_until_create_or_delete(self):
+        url = reverse('api-task-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        other = Task.objects.create(title='Another', description='d', owner=self.user)
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        other.delete()
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_list_not_modified_from_the_cache_version(self):
+        url = reverse('api-task-list')
+        etag = self.client.get(url)['ETag']
+        # session, user; the ETag comes from the cache's version token, not an aggregate.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(API_CACHE_ENABLED=False)
+    def test_list_not_modified_without_the_cache(self):
+        url = reverse('api-task-list')
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+        Task.objects.create(title='Another', description='d', owner=self.user)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 200)
+
+    def test_list_etag_follows_the_filter(self):
+        url = reverse('api-task-list')
+        Task.objects.create(title='Design review', description='d', owner=self.user)
+        self.assertNotEqual(self.client.get(url)['ETag'], self.client.get(url, {'q': 'design'})['ETag'])
+
+    def test_if_match_prevents_lost_updates(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.assertEqual(self.patch({'status': 'review'}, **{'If-Match': etag}).status_code, 200)
+        # The first write changed the version, so a second client holding the old ETag is refused.
+        response = self.patch({'status': 'done'}, **{'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'review')
+
+        response = self.client.delete(self.detail_url, headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_html_detail(self):
+        url = reverse('task-detail', args=[self.task.pk])
+        # The first page sets the CSRF cookie the ETag depends on.
+        self.client.get(url)
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        # Another user gets a page without the owner's edit links.
+        self.client.logout()
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
@@ -0,0 +1,145 @@
+import json
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from tasks.counters import reconcile_counters, user_counters
+from tasks.models import Task, BugReport, Note, ItemCounter
+
+
+class CounterTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.task = Task.objects.create(title='Task', description='d', owner=self.user,
+                                        assigned_to=self.other, status='todo', priority='high')
+        BugReport.objects.create(title='Bug', description='d', owner=self.user, severity='critical')
+        Note.objects.create(title='Note', description='d', owner=self.user, note_type='idea')
+
+    def assertInSync(self):
+        self.assertEqual(reconcile_counters(dry_run=True), {})
+
+    def test_create(self):
+        counts = user_counters(self.user)
+        self.assertEqual(counts['owner']['task']['status']['todo'], 1)
+        self.assertEqual(counts['owner']['task']['priority']['high'], 1)
+        self.assertEqual(counts['owner']['bugreport']['severity']['critical'], 1)
+        self.assertEqual(counts['owner']['note']['note_type']['idea'], 1)
+        self.assertEqual(counts['assignee']['task']['status']['todo'], 0)
+        self.assertEqual(user_counters(self.other)['assignee']['task']['priority']['high'], 1)
+        self.assertInSync()
+
+    def test_update_moves_counts(self):
+        self.task.status = 'done'
+        self.task.assigned_to = self.user
+        self.task.save()
+        self.assertEqual(user_counters(self.user)['owner']['task']['status'], {
+            'todo': 0, 'in_progress': 0, 'review': 0, 'done': 1,
+        })
+        self.assertEqual(user_counters(self.user)['assignee']['task']['status']['done'], 1)
+        self.assertEqual(user_counters(self.other)['assignee']['task']['status']['todo'], 0)
+        # Saving again must not count the same change twice.
+        self.task.save()
+        self.assertInSync()
+
+    def test_update_without_changes_costs_nothing(self):
+        self.task.title = 'Renamed'
+        with self.assertNumQueries(3):  # the row's counted values, UPDATE, sync log
+            self.task.save()
+
+    def test_saves_of_stale_copies(self):
+        # Two requests load the task at the same version and each change its status.
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        first.status = 'done'
+        first.save()
+        second.status = 'review'
+        second.save()
+        self.assertEqual(user_counters(self.user)['owner']['task']['status'], {
+            'todo': 0, 'in_progress': 0, 'review': 1, 'done': 0,
+        })
+        self.assertInSync()
+
+    def test_deferred_instance(self):
+        task = Task.objects.only('title').get(pk=self.task.pk)
+        task.status = 'review'
+        task.save()
+        self.assertEqual(user_counters(self.user)['owner']['task']['status']['review'], 1)
+        self.assertInSync()
+
+    def test_update_fields(self):
+        self.task.status = 'done'
+        self.task.save(update_fields=['title'])
+        self.assertInSync()
+        self.task.save(update_fields=['status'])
+        self.assertEqual(user_counters(self.user)['owner']['task']['status']['done'], 1)
+        self.assertInSync()
+
+    def test_delete(self):
+        self.task.delete()
+        self.assertEqual(user_counters(self.user)['owner']['task']['status']['todo'], 0)
+        self.assertEqual(user_counters(self.other)['assignee']['task']['status']['todo'], 0)
+        self.assertInSync()
+
+    def test_deleting_a_user(self):
+        self.user.delete()
+        self.assertFalse(ItemCounter.objects.filter(user_id=self.user.pk).exists())
+        self.assertEqual(user_counters(self.other)['assignee']['task']['status']['todo'], 0)
+        self.assertInSync()
+
+    def test_bulk_api(self):
+        self.client.force_login(self.user)
+        items = [{'title': f'Bulk {i}', 'description': 'd', 'status': 'in_progress'} for i in range(3)]
+        created = self.client.post(reverse('api-task-bulk'), json.dumps(items),
+                                   content_type='application/json').json()['created']
+        self.assertEqual(user_counters(self.user)['owner']['task']['status']['in_progress'], 3)
+        updates = [{'id': created[0]['id'], 'status': 'done'}, {'id': self.task.pk, 'priority': 'low'}]
+        self.client.patch(reverse('api-task-bulk'), json.dumps(updates), content_type='application/json')
+        self.assertInSync()
+        self.client.delete(reverse('api-task-bulk'), json.dumps([item['id'] for item in created]),
+                           content_type='application/json')
+        self.assertEqual(user_counters(self.user)['owner']['task']['status']['in_progress'], 0)
+        self.assertInSync()
+
+    def test_reconcile_fixes_drift(self):
+        # QuerySet.update() sends no signal, so the counters fall behind.
+        Task.objects.filter(pk=self.task.pk).update(status='done')
+        ItemCounter.objects.filter(user=self.user, model_name='note').delete()
+        drift = reconcile_counters(dry_run=True)
+        self.assertEqual(drift[(self.user.pk, 'owner', 'task', 'status', 'done')], (0, 1))
+        self.assertEqual(drift[(self.user.pk, 'owner', 'note', 'note_type', 'idea')], (0, 1))
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn(f'Fixed {len(drift)} drifted counter(s).', out.getvalue())
+        self.assertInSync()
+        self.assertEqual(user_counters(self.user)['owner']['task']['status']['done'], 1)
+
+
+class StatsViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        Task.objects.create(title='Task', description='d', owner=self.user, status='review')
+        Note.objects.create(title='Note', description='d', owner=self.user, note_type='meeting')
+
+    def test_stats_api(self):
+        self.assertEqual(self.client.get(reverse('api-stats')).status_code, 403)
+        self.client.force_login(self.user)
+        # session, user, counters
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api-stats'))
+        data = response.json()
+        self.assertEqual(data['owner']['task']['status']['review'], 1)
+        self.assertEqual(data['owner']['note']['note_type']['meeting'], 1)
+        self.assertEqual(data['owner']['bugreport']['severity']['critical'], 0)
+
+    def test_dashboard(self):
+        self.client.force_login(self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('home'))
+        self.assertTemplateUsed(response, 'home.html')
+        self.assertContains(response, 'In Review: 1')
+        self.assertContains(response, 'Meeting: 1')
+        tasks = response.context['sections'][0]
+        self.assertEqual((tasks['title'], tasks['total']), ('Tasks', 1))
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from tasks.db import apply_sqlite_pragmas
+
+
+class ConnectionSettingsTestCase(TestCase):
+    def test_pragmas_are_applied_to_new_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            # NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_pragma_names_are_checked(self):
+        with connection.cursor() as cursor, self.assertRaises(ValueError):
+            apply_sqlite_pragmas(cursor, {'cache_size = 1; DROP TABLE x; --': 1})
+
+
+class ConcurrentReadTestCase(SimpleTestCase):
+    """
+    A reader running while a writer holds the database's write lock: with the old
+    rollback journal it fails with "database is locked"; with WAL it reads the
+    last committed rows straight away.
+    """
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        self.addCleanup(self.remove_files)
+
+    def remove_files(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def connect(self, pragmas):
+        conn = sqlite3.connect(self.path, timeout=0, isolation_level=None, check_same_thread=False)
+        apply_sqlite_pragmas(conn.cursor(), pragmas)
+        return conn
+
+    def read_during_write(self, pragmas):
+        setup = self.connect(pragmas)
+        setup.execute('CREATE TABLE item (id INTEGER PRIMARY KEY, title TEXT)')
+        setup.execute("INSERT INTO item (title) VALUES ('committed')")
+        setup.close()
+
+        writer = self.connect(pragmas)
+        # EXCLUSIVE is the lock a rollback-journal commit takes while it writes pages.
+        writer.execute('BEGIN EXCLUSIVE')
+        writer.execute("INSERT INTO item (title) VALUES ('uncommitted')")
+
+        result = {}
+
+        def read():
+            try:
+                reader = self.connect(pragmas)
+                result['rows'] = reader.execute('SELECT title FROM item').fetchall()
+                reader.close()
+            except sqlite3.OperationalError as exc:
+                result['error'] = str(exc)
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        writer.execute('COMMIT')
+        writer.close()
+        return result
+
+    def test_rollback_journal_blocks_readers(self):
+        result = self.read_during_write({'journal_mode': 'delete'})
+        self.assertIn('locked', result.get('error', ''))
+
+    def test_wal_readers_do_not_block(self):
+        # No busy_timeout, so a reader that had to wait would fail instead.
+        pragmas = {key: value for key, value in settings.SQLITE_PRAGMAS.items() if key != 'busy_timeout'}
+        result = self.read_during_write(pragmas)
+        self.assertEqual(result, {'rows': [('committed',)]})
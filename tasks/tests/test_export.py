@@ -0,0 +1,70 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+from tasks.export import export_lines
+from tasks.models import Task, BugReport
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        for i in range(5):
+            Task.objects.create(title=f'Task {i}', description='line one\nline "two"', owner=self.user,
+                                assigned_to=self.user)
+        BugReport.objects.create(title='Test Bug', description='d', owner=self.user)
+        self.client.force_login(self.user)
+
+    def test_ndjson_endpoint_streams(self):
+        response = self.client.get(reverse('api-export', args=['tasks', 'ndjson']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['title'] for row in rows], [f'Task {i}' for i in range(5)])
+        self.assertEqual(rows[0]['owner'], self.user.pk)
+        self.assertEqual(rows[0]['description'], 'line one\nline "two"')
+        self.assertEqual(rows[0]['created_at'], Task.objects.get(title='Task 0').created_at.isoformat())
+
+    def test_csv_endpoint(self):
+        response = self.client.get(reverse('api-export', args=['bugs', 'csv']))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bugs.csv"')
+        content = b''.join(response.streaming_content).decode()
+        [row] = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual((row['title'], row['severity']), ('Test Bug', 'medium'))
+
+    def test_rows_are_read_lazily_from_one_cursor(self):
+        lines = export_lines('tasks', 'ndjson', chunk_size=2)
+        # Nothing runs until the response starts streaming, then a single SELECT is
+        # read chunk_size rows at a time.
+        with self.assertNumQueries(1):
+            self.assertEqual(json.loads(next(lines))['title'], 'Task 0')
+            self.assertEqual(len(list(lines)), 4)
+
+    def test_unknown_kind_or_format(self):
+        self.assertEqual(self.client.get(reverse('api-export', args=['users', 'csv'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api-export', args=['tasks', 'xml'])).status_code, 404)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api-export', args=['tasks', 'csv'])).status_code, 403)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_items', 'tasks', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command('export_items', 'tasks', format='csv', output=path, stderr=io.StringIO())
+        with open(path, newline='') as export_file:
+            rows = list(csv.DictReader(export_file))
+        self.assertEqual(rows[4]['description'], 'line one\nline "two"')
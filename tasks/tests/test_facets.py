@@ -0,0 +1,124 @@
+from django.contrib.auth.models import User
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from tasks.facets import counter_facet_counts, facet_counts, parse_filters
+from tasks.models import Task, BugReport, Note
+
+
+class FacetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        cls.other = User.objects.create_user(username='otheruser', password='testpass123')
+        for i, (status, priority, assignee) in enumerate([
+            ('todo', 'high', cls.other), ('todo', 'low', cls.other), ('done', 'high', None),
+            ('review', 'medium', cls.user), ('todo', 'high', None),
+        ]):
+            Task.objects.create(title=f'Task {i} design', description='d', owner=cls.user,
+                                status=status, priority=priority, assigned_to=assignee)
+        Note.objects.create(title='Pinned', description='d', owner=cls.user, is_pinned=True, tags='work')
+        Note.objects.create(title='Plain', description='d', owner=cls.other, note_type='idea')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def facet(self, response, name):
+        return {entry['value']: entry['count'] for entry in response.json()['facets'][name]}
+
+    def titles(self, response):
+        return sorted(item['title'] for item in response.json()['results'])
+
+    def test_parse_filters(self):
+        params = QueryDict('status=todo,done&status=review&assigned_to=none&assigned_to=3&priority=')
+        self.assertEqual(parse_filters(Task, params, ('status', 'priority', 'assigned_to')), {
+            'status': ['todo', 'done', 'review'], 'assigned_to': [None, 3],
+        })
+        self.assertEqual(parse_filters(Note, QueryDict('is_pinned=true'), ('is_pinned',)), {'is_pinned': [True]})
+        for query in ('status=nope', 'assigned_to=abc', 'priority=none'):
+            with self.subTest(query=query), self.assertRaises(ValidationError):
+                parse_filters(Task, QueryDict(query), ('status', 'priority', 'assigned_to'))
+
+    def test_filters(self):
+        url = reverse('api-task-list')
+        response = self.client.get(url, {'status': 'todo', 'priority': 'high'})
+        self.assertEqual(self.titles(response), ['Task 0 design', 'Task 4 design'])
+        response = self.client.get(url, {'assigned_to': f'none,{self.user.pk}'})
+        self.assertEqual(self.titles(response), ['Task 2 design', 'Task 3 design', 'Task 4 design'])
+        response = self.client.get(url, {'status': 'unknown'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json())
+
+    def test_facets_count_the_other_filters(self):
+        response = self.client.get(reverse('api-task-list'), {'status': 'todo'})
+        # The status facet ignores the status filter; the others apply it.
+        self.assertEqual(self.facet(response, 'status'), {'todo': 3, 'in_progress': 0, 'review': 1, 'done': 1})
+        self.assertEqual(self.facet(response, 'priority'), {'low': 1, 'medium': 0, 'high': 2, 'urgent': 0})
+        self.assertEqual(self.facet(response, 'assigned_to'), {self.other.pk: 2, None: 1})
+
+    def test_facets_use_the_counters_when_nothing_narrows(self):
+        queryset = Task.objects.all()
+        fields = ('status', 'priority', 'assigned_to')
+        with self.assertNumQueries(1):
+            counted = counter_facet_counts(Task, fields)
+        self.assertEqual(
+            {name: {value: n for value, n in by_value.items() if n} for name, by_value in counted.items()},
+            facet_counts(queryset, {}, fields),
+        )
+        # is_pinned is not counted.
+        self.assertIsNone(counter_facet_counts(Note, ('note_type', 'is_pinned')))
+
+        response = self.client.get(reverse('api-task-list'))
+        self.assertEqual(self.facet(response, 'assigned_to'), {self.other.pk: 2, None: 2, self.user.pk: 1})
+        self.assertEqual(self.facet(response, 'status')['todo'], 3)
+
+    def test_counters_cover_the_assignee_filters(self):
+        def nonzero(counts):
+            return {name: {value: n for value, n in by_value.items() if n} for name, by_value in counts.items()}
+
+        fields = ('status', 'priority', 'assigned_to')
+        for facets, filters in [
+            (fields, {'assigned_to': [self.other.pk]}),
+            (fields, {'assigned_to': [None, self.user.pk]}),
+            (('assigned_to',), {'status': ['todo', 'review']}),
+        ]:
+            with self.subTest(filters=filters):
+                with self.assertNumQueries(1):
+                    counted = counter_facet_counts(Task, facets, filters)
+                self.assertEqual(nonzero(counted), facet_counts(Task.objects.all(), filters, facets))
+        # A priority facet under a status filter needs both at once, which the counters do not hold.
+        self.assertIsNone(counter_facet_counts(Task, fields, {'status': ['todo']}))
+
+        response = self.client.get(reverse('api-task-list'), {'assigned_to': 'none'})
+        self.assertEqual(self.facet(response, 'status'), {'todo': 1, 'in_progress': 0, 'review': 0, 'done': 1})
+        self.assertEqual(self.facet(response, 'assigned_to'), {self.other.pk: 2, None: 2, self.user.pk: 1})
+
+    def test_facets_with_search_and_tags(self):
+        response = self.client.get(reverse('api-task-list'), {'q': 'design', 'priority': 'high'})
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertEqual(self.facet(response, 'priority'), {'low': 1, 'medium': 1, 'high': 3, 'urgent': 0})
+
+        url = reverse('api-note-list')
+        self.assertEqual(self.facet(self.client.get(url), 'is_pinned'), {True: 1, False: 1})
+        response = self.client.get(url, {'tag': 'work'})
+        self.assertEqual(self.facet(response, 'note_type'), {'general': 1, 'meeting': 0, 'research': 0, 'idea': 0, 'personal': 0})
+        response = self.client.get(url, {'is_pinned': 'false'})
+        self.assertEqual(self.titles(response), ['Plain'])
+
+    def test_only_the_first_page_has_facets(self):
+        response = self.client.get(reverse('api-task-list'), {'page_size': 2})
+        self.assertIn('facets', response.json())
+        response = self.client.get(response.json()['next'])
+        self.assertNotIn('facets', response.json())
+
+    def test_etag_follows_the_facets(self):
+        url = reverse('api-bug-list')
+        BugReport.objects.create(title='Bug', description='d', owner=self.user, status='reported')
+        etag = self.client.get(url, {'status': 'reported'})['ETag']
+        # Not in the filtered page, but in its status facet.
+        BugReport.objects.create(title='Closed bug', description='d', owner=self.user, status='closed')
+        response = self.client.get(url, {'status': 'reported'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.facet(response, 'status')['closed'], 1)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from tasks.bulk import queryset_delete, queryset_update
+from tasks.feed import Broker, LocalBroker, get_broker
+from tasks.models import Task, Note
+
+
+class RecordingBroker(Broker):
+    """Keeps what is published, for the signal tests."""
+
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+
+
+@override_settings(FEED_BROKER='tasks.tests.test_feed.RecordingBroker')
+class FeedSignalTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.events = get_broker().events
+        self.events.clear()
+
+    def actions(self):
+        return [(event['type'], event['action']) for event in self.events]
+
+    def test_save_and_delete_are_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='Live task', description='d', owner=self.user, assigned_to=self.other)
+            self.assertEqual(self.events, [])
+        with self.captureOnCommitCallbacks(execute=True):
+            task.status = 'done'
+            task.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            task.delete()
+        self.assertEqual(self.actions(), [('task', 'created'), ('task', 'updated'), ('task', 'deleted')])
+        self.assertEqual(self.events[1]['data']['status'], 'done')
+        self.assertEqual((self.events[2]['owner'], self.events[2]['assigned_to'], self.events[2]['data']),
+                         (self.user.pk, self.other.pk, None))
+
+    def test_rolled_back_changes_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Task.objects.create(title='Gone task', description='d', owner=self.user)
+                transaction.set_rollback(True)
+        self.assertEqual(self.events, [])
+
+    def test_bulk_changes(self):
+        notes = [Note.objects.create(title=f'Note {i}', description='d', owner=self.user) for i in range(3)]
+        with self.captureOnCommitCallbacks(execute=True):
+            queryset_update(Note.objects.all(), is_pinned=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            queryset_delete(Note.objects.filter(pk__in=[note.pk for note in notes[:2]]))
+        with self.captureOnCommitCallbacks(execute=True):
+            Note.objects.all().delete()
+        self.assertEqual(self.actions(), [('note', 'updated')] * 3 + [('note', 'deleted')] * 3)
+        self.assertTrue(all(event['data']['is_pinned'] for event in self.events[:3]))
+
+
+class LocalBrokerTestCase(TestCase):
+    async def test_publish_from_another_thread(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe()
+        self.assertTrue(broker.listening)
+        thread = threading.Thread(target=broker.publish, args=({'id': 1},))
+        thread.start()
+        thread.join()
+        self.assertEqual(await asyncio.wait_for(subscription.get(), 1), {'id': 1})
+        subscription.close()
+        self.assertFalse(broker.listening)
+
+    async def test_slow_subscriber_is_dropped(self):
+        broker = LocalBroker(queue_size=2)
+        subscription = broker.subscribe()
+        for i in range(3):
+            broker.publish({'id': i})
+        await asyncio.sleep(0)
+        self.assertIsNone(await subscription.get())
+        self.assertFalse(broker.listening)
+
+
+# The async client closes responses on a thread with its own connection, where a
+# request-end flush would wait on this test's transaction.
+@override_settings(ACTIVITY_EVENTS_ENABLED=False)
+class FeedViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.url = reverse('api-feed')
+
+    async def next_event(self, stream):
+        chunk = await asyncio.wait_for(anext(stream), 1)
+        lines = dict(line.split(': ', 1) for line in chunk.decode().strip().splitlines() if ': ' in line)
+        return lines['event'], json.loads(lines['data'])
+
+    async def disconnect(self, stream):
+        # The ASGI handler cancels the response when the client goes away.
+        reading = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0)
+        reading.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reading
+
+    def event(self, pk, owner, assigned_to=None, type='task'):
+        return {'type': type, 'id': pk, 'action': 'updated', 'owner': owner, 'assigned_to': assigned_to, 'data': {}}
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    async def test_unknown_type(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, {'types': 'task,widget'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_needs_asgi(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 501)
+
+    async def test_stream(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, {'types': 'task', 'mine': '1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await self.next_event(stream), ('ready', {'cursor': 0}))
+
+        broker = get_broker()
+        broker.publish(self.event(1, owner=self.other.pk))
+        broker.publish(self.event(2, owner=self.user.pk, type='note'))
+        broker.publish(self.event(3, owner=self.other.pk, assigned_to=self.user.pk))
+        name, event = await self.next_event(stream)
+        self.assertEqual((name, event['id']), ('change', 3))
+        await self.disconnect(stream)
+        self.assertFalse(broker.listening)
+
+    async def test_failed_start_unsubscribes(self):
+        await self.async_client.aforce_login(self.user)
+        with mock.patch('tasks.async_views.current_cursor', side_effect=DatabaseError), \
+                self.assertRaises(DatabaseError):
+            await self.async_client.get(self.url)
+        self.assertFalse(get_broker().listening)
+
+    @override_settings(FEED_HEARTBEAT=0.01)
+    async def test_heartbeat(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        self.assertEqual(await asyncio.wait_for(anext(stream), 1), b': keep-alive\n\n')
+        await self.disconnect(stream)
@@ -0,0 +1,89 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from tasks.models import Task, Note, SyncChange
+
+
+class ImportItemsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        Task.objects.create(title='Existing', description='d', owner=self.user)
+
+    def write(self, content, suffix='.ndjson'):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w', newline='') as import_file:
+            import_file.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, *args, **options):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_items', *args, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_ndjson_with_owners_from_rows(self):
+        rows = [
+            {'title': 'Imported 1', 'description': 'd', 'owner': self.user.pk, 'status': 'done'},
+            {'title': 'Existing', 'description': 'd', 'owner': self.user.pk},
+            {'title': 'Existing', 'description': 'd', 'owner': self.other.pk},
+            {'title': 'no', 'description': 'd', 'owner': self.user.pk},
+            {'title': 'Bad status', 'description': 'd', 'owner': self.user.pk, 'status': 'someday'},
+            {'title': 'No owner', 'description': 'd', 'owner': 999},
+        ]
+        path = self.write('\n'.join(json.dumps(row) for row in rows) + '\n{not json}\n')
+        out, err = self.run_import('tasks', path, chunk_size=4)
+        self.assertIn('Read 7 row(s): 2 created, 5 rejected', out)
+        self.assertIn('rows/s', out)
+        self.assertIn('line 2: title: You already have a task with this title.', err)
+        self.assertIn('line 4: title: Title must be at least 3 characters long.', err)
+        self.assertIn('line 5: status:', err)
+        self.assertIn('line 6: owner:', err)
+        self.assertIn('line 7: invalid JSON', err)
+        self.assertEqual(Task.objects.get(title='Imported 1').status, 'done')
+        self.assertEqual(Task.objects.get(title='Existing', owner=self.other).description, 'd')
+
+    def test_csv_with_fixed_owner(self):
+        path = self.write(
+            'title,description,note_type,is_pinned,tags\n'
+            'First note,"multi\nline",idea,True,a\n'
+            'First note,dup,idea,False,\n'
+            'Second note,d,meeting,False,\n',
+            suffix='.csv',
+        )
+        out, err = self.run_import('notes', path, owner='otheruser')
+        self.assertIn('3 row(s): 2 created, 1 rejected', out)
+        # Line numbers are physical lines; the first record spans two.
+        self.assertIn('line 4: title:', err)
+        first = Note.objects.get(title='First note')
+        self.assertEqual((first.owner, first.description, first.is_pinned), (self.other, 'multi\nline', True))
+        # Bulk inserts still reach the sync log.
+        self.assertTrue(SyncChange.objects.filter(model_name='note', object_id=first.pk).exists())
+
+    def test_round_trip_with_export(self):
+        export = io.StringIO()
+        call_command('export_items', 'tasks', stdout=export)
+        Task.objects.all().delete()
+        self.run_import('tasks', self.write(export.getvalue()))
+        self.assertEqual(list(Task.objects.values_list('title', 'owner')), [('Existing', self.user.pk)])
+
+    def test_unknown_owner(self):
+        with self.assertRaises(CommandError):
+            self.run_import('tasks', self.write(''), owner='nobody')
+
+    def test_unreadable_file(self):
+        missing = os.path.join(tempfile.gettempdir(), 'no-such-import.ndjson')
+        with self.assertRaisesMessage(CommandError, f'Cannot read {missing}'):
+            self.run_import('tasks', missing)
+        fd, path = tempfile.mkstemp(suffix='.ndjson')
+        with os.fdopen(fd, 'wb') as import_file:
+            import_file.write(json.dumps({'title': 'Caf\u00e9', 'description': 'd'}, ensure_ascii=False).encode('latin-1'))
+        self.addCleanup(os.remove, path)
+        with self.assertRaisesMessage(CommandError, 'after 0 row(s)'):
+            self.run_import('tasks', path, owner='testuser')
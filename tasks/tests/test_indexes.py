@@ -0,0 +1,97 @@
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import Task, BugReport, Note
+from tasks.pagination import keyset_filter
+
+
+ITEM_TABLES = ('tasks_task', 'tasks_bugreport', 'tasks_note')
+# "SCAN tasks_task" on its own is a full table scan; "SCAN ... USING INDEX" walks an index.
+TABLE_SCAN = re.compile(r"\bSCAN (%s)\b(?! USING)" % "|".join(ITEM_TABLES))
+LIST_ORDERING = ('-created_at', '-id')
+
+
+@skipUnlessDBFeature('supports_explaining_query_execution')
+class QueryPlanTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='admin', password='testpass123')
+        for i in range(5):
+            Task.objects.create(title=f'Task {i}', description='d', owner=self.user, assigned_to=self.user)
+            BugReport.objects.create(title=f'Bug {i}', description='d', owner=self.user)
+            Note.objects.create(title=f'Note {i}', description='d', owner=self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return "\n".join(row[-1] for row in cursor.fetchall())
+
+    def assertIndexed(self, queryset, ordered=True):
+        plan = queryset.explain()
+        self.assertNotRegex(plan, TABLE_SCAN, f"{queryset.query}\n{plan}")
+        if ordered:
+            self.assertNotIn("TEMP B-TREE", plan, f"{queryset.query}\n{plan}")
+
+    def test_list_queries(self):
+        for model in (Task, BugReport, Note):
+            with self.subTest(model=model.__name__):
+                queryset = model.objects.order_by(*LIST_ORDERING)
+                self.assertIndexed(queryset[:25])
+                next_page = queryset.filter(keyset_filter(LIST_ORDERING, [timezone.now(), 3]))
+                self.assertIndexed(next_page[:25])
+
+    def test_filter_queries(self):
+        filters = [
+            (Task, {'status': 'done'}),
+            (Task, {'priority': 'high'}),
+            (BugReport, {'severity': 'critical'}),
+            (BugReport, {'status': 'resolved'}),
+            (Note, {'is_pinned': True}),
+            (Note, {'note_type': 'meeting'}),
+        ]
+        for model, lookup in filters:
+            with self.subTest(model=model.__name__, lookup=lookup):
+                self.assertIndexed(model.objects.filter(**lookup).order_by(*LIST_ORDERING)[:25])
+
+    def test_admin_list_filter_queries(self):
+        self.client.login(username='admin', password='testpass123')
+        today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        date_range = {
+            'created_at__gte': str(today - timedelta(days=7)),
+            'created_at__lt': str(today + timedelta(days=1)),
+        }
+        updated_range = {
+            'updated_at__gte': str(today - timedelta(days=7)),
+            'updated_at__lt': str(today + timedelta(days=1)),
+        }
+        changelists = [
+            ('admin:tasks_task_changelist', [
+                {}, {'status__exact': 'done'}, {'priority__exact': 'high'},
+                {'assigned_to__id__exact': self.user.pk}, date_range, updated_range,
+            ]),
+            ('admin:tasks_bugreport_changelist', [
+                {}, {'severity__exact': 'critical'}, {'status__exact': 'resolved'}, date_range,
+            ]),
+            ('admin:tasks_note_changelist', [
+                {}, {'note_type__exact': 'meeting'}, {'is_pinned__exact': '1'}, updated_range,
+            ]),
+        ]
+        for url_name, params_list in changelists:
+            for params in params_list:
+                with self.subTest(url=url_name, params=params):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(reverse(url_name), params)
+                    self.assertEqual(response.status_code, 200)
+                    item_queries = [
+                        query['sql'] for query in queries.captured_queries
+                        if query['sql'].startswith('SELECT')
+                        and any(f'FROM "{table}"' in query['sql'] for table in ITEM_TABLES)
+                    ]
+                    self.assertTrue(item_queries)
+                    for sql in item_queries:
+                        self.assertNotRegex(self.explain(sql), TABLE_SCAN, sql)
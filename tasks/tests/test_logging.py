@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from tasks.log_handlers import BatchingQueueHandler
+from tasks.models import Task
+
+
+class BatchingQueueHandlerTestCase(SimpleTestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        self.logger = logging.getLogger('tasks.tests.queue')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        os.remove(self.path)
+
+    def make_handler(self, **kwargs):
+        handler = BatchingQueueHandler(self.path, **kwargs)
+        self.logger.addHandler(handler)
+        return handler
+
+    def read_records(self):
+        with open(self.path) as log_file:
+            return [json.loads(line) for line in log_file]
+
+    def test_records_are_structured_json(self):
+        handler = self.make_handler(start_thread=False)
+        activity = {'user': 'alice', 'user_id': 7, 'action': 'created', 'model': 'Task', 'object_id': 3}
+        self.logger.info("User 'alice' created Task titled 'x'", extra={'activity': activity})
+        handler.flush()
+        [record] = self.read_records()
+        self.assertEqual(record['message'], "User 'alice' created Task titled 'x'")
+        self.assertEqual(record['level'], 'INFO')
+        for key, value in activity.items():
+            self.assertEqual(record[key], value)
+
+    def test_nothing_is_written_until_the_writer_runs(self):
+        handler = self.make_handler(start_thread=False)
+        self.logger.info('queued')
+        self.assertEqual(self.read_records(), [])
+        handler.flush()
+        self.assertEqual(len(self.read_records()), 1)
+
+    def test_drop_newest_policy(self):
+        handler = self.make_handler(maxsize=2, policy='drop_newest', start_thread=False)
+        for i in range(5):
+            self.logger.info(f'record {i}')
+        self.assertEqual(handler.dropped, 3)
+        handler.flush()
+        messages = [record['message'] for record in self.read_records()]
+        self.assertEqual(messages[:2], ['record 0', 'record 1'])
+        self.assertIn('dropped 3 record(s)', messages[2])
+
+    def test_drop_oldest_policy(self):
+        handler = self.make_handler(maxsize=2, policy='drop_oldest', start_thread=False)
+        for i in range(5):
+            self.logger.info(f'record {i}')
+        handler.flush()
+        messages = [record['message'] for record in self.read_records()]
+        self.assertEqual(messages[:2], ['record 3', 'record 4'])
+
+    def test_block_policy_gives_up_after_timeout(self):
+        handler = self.make_handler(maxsize=1, policy='block', block_timeout=0.01, start_thread=False)
+        self.logger.info('first')
+        self.logger.info('second')
+        self.assertEqual(handler.dropped, 1)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            BatchingQueueHandler(self.path, policy='sometimes')
+
+    def test_background_writer_batches(self):
+        handler = self.make_handler(batch_size=10, flush_interval=0.05)
+        for i in range(25):
+            self.logger.info(f'record {i}')
+        handler.close()
+        self.assertEqual(len(self.read_records()), 25)
+
+
+class ActivityLoggingTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+
+    def test_views_log_structured_activity(self):
+        self.client.login(username='testuser', password='testpass123')
+        with self.assertLogs('project', level='INFO') as logs:
+            self.client.post(reverse('task-delete', args=[self.task.pk]))
+        [record] = logs.records
+        self.assertEqual(record.activity, {
+            'user': 'testuser', 'user_id': self.user.pk, 'action': 'deleted',
+            'model': 'Task', 'object_id': self.task.pk,
+        })
@@ -0,0 +1,83 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from tasks.metrics import RollingWindow, registry, render_prometheus
+from tasks.models import Task
+
+
+class RollingWindowTestCase(SimpleTestCase):
+    def test_percentiles_use_recent_samples(self):
+        window = RollingWindow(size=100)
+        for value in range(1, 201):
+            window.add(value)
+        self.assertEqual((window.count, window.total), (200, sum(range(1, 201))))
+        # Only 101..200 are still in the window.
+        self.assertEqual(window.percentiles((0.5, 0.9, 0.99)), {0.5: 150, 0.9: 190, 0.99: 199})
+
+    def test_render(self):
+        snapshot = {'a"b': {name: (2, 0.5, {0.5: 0.25}) for name in (
+            'request_duration', 'db_queries', 'db_duration', 'response_size')}}
+        text = render_prometheus(snapshot)
+        self.assertIn('# TYPE taskmanager_request_duration_seconds summary', text)
+        self.assertIn('taskmanager_request_duration_seconds{view="a\\"b",quantile="0.5"} 0.25', text)
+        self.assertIn('taskmanager_db_queries_count{view="a\\"b"} 2', text)
+        self.assertIn('taskmanager_response_size_bytes_sum{view="a\\"b"} 0.5', text)
+
+
+class MetricsMiddlewareTestCase(TestCase):
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.staff = User.objects.create_user(username='staff', password='testpass123', is_staff=True)
+        self.task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_records_per_view_name(self):
+        response = self.client.get(reverse('task-detail', args=[self.task.pk]))
+        self.client.get(reverse('task-detail', args=[self.task.pk]))
+        self.client.get('/no-such-page/')
+        snapshot = registry.snapshot()
+        count, total, _ = snapshot['task-detail']['db_queries']
+        # One query per page load (see test_queries).
+        self.assertEqual((count, total), (2, 2))
+        self.assertEqual(snapshot['task-detail']['response_size'][1], 2 * len(response.content))
+        self.assertGreater(snapshot['task-detail']['request_duration'][1], 0)
+        self.assertIn('unresolved', snapshot)
+
+    # The async client closes responses on a thread with its own connection, where a
+    # request-end flush would wait on this test's transaction.
+    @override_settings(ACTIVITY_EVENTS_ENABLED=False)
+    async def test_async_views(self):
+        await self.async_client.get(reverse('api-async-task-list'))
+        count, total, _ = registry.snapshot()['api-async-task-list']['db_queries']
+        self.assertEqual((count, total), (1, 1))
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.staff)
+        self.client.get(reverse('api-task-list'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('taskmanager_request_duration_seconds_count{view="api-task-list"} 1', response.content.decode())
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+    def test_server_timing(self):
+        with override_settings(METRICS_SERVER_TIMING=True):
+            response = self.client.get(reverse('task-list'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries", total;dur=[\d.]+$')
+        with override_settings(METRICS_SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('task-list')))
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        self.client.get(reverse('task-list'))
+        self.assertEqual(registry.snapshot(), {})
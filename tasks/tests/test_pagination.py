@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.models import Task
+
+
+class PaginationTestCase(TestCase):
+    def setUp(self):
+        # The rows below are written with bulk_create() and update(), which do not
+        # invalidate the API cache; drop what earlier tests cached for the same ids.
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        Task.objects.bulk_create([
+            Task(title=f'Task {i}', description=f'Description {i}', owner=self.user)
+            for i in range(7)
+        ])
+        # Ties on created_at must still page deterministically thanks to the id tiebreaker.
+        Task.objects.filter(title__in=['Task 2', 'Task 3', 'Task 4']).update(created_at=timezone.now())
+        self.expected = list(Task.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, url, params):
+        seen, pages = [], []
+        response = self.client.get(url, params)
+        while True:
+            data = response.json()
+            pages.append(data)
+            seen += [item['id'] for item in data['results']]
+            if not data['next']:
+                return seen, pages
+            response = self.client.get(data['next'])
+
+    def test_api_keyset_walk_forward(self):
+        seen, pages = self.walk(reverse('api-task-list'), {'page_size': 3})
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(page['results']) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_api_keyset_previous_link(self):
+        first = self.client.get(reverse('api-task-list'), {'page_size': 3}).json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    @override_settings(MAX_PAGE_SIZE=5)
+    def test_api_page_size_is_capped(self):
+        response = self.client.get(reverse('api-task-list'), {'page_size': 1000})
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_api_invalid_cursor(self):
+        response = self.client.get(reverse('api-task-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_api_search_results_are_paginated_by_rank(self):
+        seen, _ = self.walk(reverse('api-task-list'), {'q': 'task', 'page_size': 2})
+        self.assertEqual(sorted(seen), sorted(self.expected))
+
+    def test_html_list_pages(self):
+        response = self.client.get(reverse('task-list'), {'page_size': 3, 'page': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task.id for task in response.context['tasks']], self.expected[6:])
+        self.assertTrue(response.context['is_paginated'])
@@ -0,0 +1,156 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from tasks.models import Task, BugReport, Note
+
+
+# Every authenticated request loads its session and its user.
+AUTH = 2
+# Every write appends a row to the sync log.
+SYNC = 1
+# Creates, deletes and updates that change a status, priority, severity or note
+# type upsert the dashboard counters.
+COUNTERS = 1
+# Updates first read (and lock) the row's counted values.
+COUNTED_ROW = 1
+# Deleting a note also deletes its tag links: one cascaded DELETE.
+NOTE_TAGS = {'note': 1}
+
+
+class CrudQueryCountTestCase(TestCase):
+    """Each CRUD route loads its object once; these counts catch a second fetch."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.task = Task.objects.create(
+            title='Test Task', description='d', owner=self.user, assigned_to=self.user
+        )
+        self.bug = BugReport.objects.create(title='Test Bug', description='d', owner=self.user)
+        self.note = Note.objects.create(title='Test Note', description='d', owner=self.user)
+        # The task form also lists users for its assigned_to <select> on GET, and on POST
+        # looks the choice up and validates that it exists: (GET, POST) extra queries.
+        self.items = [
+            ('task', self.task, {'status': 'todo', 'priority': 'low', 'assigned_to': self.user.pk}, (1, 2)),
+            ('bug', self.bug, {'severity': 'low', 'status': 'reported', 'expected_result': ''}, (0, 0)),
+            ('note', self.note, {'note_type': 'idea', 'tags': ''}, (0, 0)),
+        ]
+
+    def test_web_list_and_detail(self):
+        for prefix, obj, _, _ in self.items:
+            with self.subTest(prefix=prefix):
+                # COUNT for the paginator, then the page.
+                with self.assertNumQueries(2):
+                    self.client.get(reverse(f'{prefix}-list'))
+                # The task page shows its assignee, which is joined into the same SELECT.
+                with self.assertNumQueries(1):
+                    self.client.get(reverse(f'{prefix}-detail', args=[obj.pk]))
+
+    def test_web_create(self):
+        self.client.force_login(self.user)
+        for prefix, obj, fields, (form_get, form_post) in self.items:
+            with self.subTest(prefix=prefix):
+                data = {'title': f'New {prefix}', 'description': 'd', **fields}
+                with self.assertNumQueries(AUTH + form_get):
+                    self.client.get(reverse(f'{prefix}-create'))
+                # INSERT.
+                with self.assertNumQueries(AUTH + form_post + 1 + SYNC + COUNTERS):
+                    response = self.client.post(reverse(f'{prefix}-create'), data)
+                self.assertEqual(response.status_code, 302)
+
+    def test_web_update(self):
+        self.client.force_login(self.user)
+        for prefix, obj, fields, (form_get, form_post) in self.items:
+            with self.subTest(prefix=prefix):
+                data = {'title': f'Updated {prefix}', 'description': 'd', **fields}
+                with self.assertNumQueries(AUTH + 1 + form_get):
+                    self.client.get(reverse(f'{prefix}-update', args=[obj.pk]))
+                # SELECT, then UPDATE.
+                with self.assertNumQueries(AUTH + form_post + 2 + COUNTED_ROW + SYNC + COUNTERS):
+                    response = self.client.post(reverse(f'{prefix}-update', args=[obj.pk]), data)
+                self.assertEqual(response.status_code, 302)
+
+    def test_web_delete(self):
+        self.client.force_login(self.user)
+        for prefix, obj, _, _ in self.items:
+            with self.subTest(prefix=prefix):
+                with self.assertNumQueries(AUTH + 1):
+                    self.client.get(reverse(f'{prefix}-delete', args=[obj.pk]))
+                # SELECT, then DELETE.
+                with self.assertNumQueries(AUTH + 2 + SYNC + COUNTERS + NOTE_TAGS.get(prefix, 0)):
+                    response = self.client.post(reverse(f'{prefix}-delete', args=[obj.pk]))
+                self.assertEqual(response.status_code, 302)
+
+    def test_web_non_owner_is_rejected_after_one_fetch(self):
+        other = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.force_login(other)
+        with self.assertNumQueries(AUTH + 1):
+            response = self.client.get(reverse('task-update', args=[self.task.pk]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_api_routes(self):
+        self.client.force_login(self.user)
+        api_items = [
+            ('task', self.task, {'status': 'todo', 'priority': 'low'}),
+            ('bug', self.bug, {'severity': 'low', 'status': 'reported'}),
+            ('note', self.note, {'note_type': 'idea'}),
+        ]
+        for prefix, obj, fields in api_items:
+            with self.subTest(prefix=prefix):
+                list_url = reverse(f'api-{prefix}-list')
+                detail_url = reverse(f'api-{prefix}-detail', args=[obj.pk])
+                # The page, then the facet counts; the ETag comes from the cache's version token.
+                with self.assertNumQueries(AUTH + 2):
+                    self.client.get(list_url)
+                # owner lookup, (owner, title) uniqueness, INSERT.
+                data = {'title': f'New {prefix}', 'description': 'd', 'owner': self.user.pk, **fields}
+                with self.assertNumQueries(AUTH + 3 + SYNC + COUNTERS):
+                    response = self.client.post(list_url, data)
+                self.assertEqual(response.status_code, 201)
+                with self.assertNumQueries(AUTH + 1):
+                    response = self.client.get(detail_url)
+                self.assertEqual(response.status_code, 200)
+                # SELECT (joined with the owner the uniqueness check reads), uniqueness, UPDATE.
+                # Only the title changes, so the counters are left alone.
+                with self.assertNumQueries(AUTH + 3 + COUNTED_ROW + SYNC):
+                    response = self.client.patch(
+                        detail_url, json.dumps({'title': f'Patched {prefix}'}),
+                        content_type='application/json',
+                    )
+                self.assertEqual(response.status_code, 200)
+                # SELECT, then DELETE.
+                with self.assertNumQueries(AUTH + 2 + SYNC + COUNTERS + NOTE_TAGS.get(prefix, 0)):
+                    response = self.client.delete(detail_url)
+                self.assertEqual(response.status_code, 204)
+
+
+class ListQueryShapeTestCase(TestCase):
+    """List pages cost the same number of queries however many related users they show."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='testpass123')
+        users = [User.objects.create(username=f'user{i}') for i in range(5)]
+        for i, user in enumerate(users):
+            Task.objects.create(title=f'Task {i}', description='d', owner=user, assigned_to=users[-i])
+            BugReport.objects.create(title=f'Bug {i}', description='d', owner=user)
+            Note.objects.create(title=f'Note {i}', description='d', owner=user)
+
+    def test_list_pages_defer_descriptions(self):
+        response = self.client.get(reverse('task-list'))
+        task = response.context['tasks'][0]
+        self.assertIn('description', task.get_deferred_fields())
+
+    def test_admin_changelists_join_users(self):
+        self.client.force_login(self.admin)
+        for url_name in ('admin:tasks_task_changelist', 'admin:tasks_bugreport_changelist',
+                         'admin:tasks_note_changelist'):
+            with self.subTest(url=url_name):
+                response = self.client.get(reverse(url_name))
+                self.assertEqual(response.status_code, 200)
+                with self.assertNumQueries(0):
+                    for obj in response.context['cl'].result_list:
+                        str(obj.owner)
+                        if isinstance(obj, Task):
+                            str(obj.assigned_to)
+                self.assertIn('description', response.context['cl'].result_list[0].get_deferred_fields())
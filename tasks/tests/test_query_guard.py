@@ -0,0 +1,109 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from tasks.models import Task, BugReport, Note
+from tasks.tests.factories import seed_items
+from tasks.tests.query_guard import GuardedClient, QueryGuard, QueryGuardMixin, query_shape
+
+
+class QueryShapeTestCase(SimpleTestCase):
+    def test_literals_are_normalized(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id = 12 AND title = 'it''s'"),
+            query_shape("SELECT * FROM t  WHERE id = 7 AND title = 'other'"),
+        )
+        self.assertEqual(query_shape("SELECT 1 FROM t WHERE id IN (1, 2, 3)"), "SELECT ? FROM t WHERE id IN (...)")
+        self.assertEqual(
+            query_shape("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'), (3, 'z')"),
+            "INSERT INTO t (a, b) VALUES (?, ?), ...",
+        )
+        self.assertNotEqual(query_shape("SELECT a FROM t1"), query_shape("SELECT a FROM t2"))
+
+
+class QueryGuardTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users = [User.objects.create(username=f'user{i}') for i in range(5)]
+        for i, user in enumerate(users):
+            Task.objects.create(title=f'Task {i}', description='d', owner=user, assigned_to=user)
+
+    def test_catches_n_plus_one(self):
+        with self.assertRaisesMessage(AssertionError, 'Same query run 5 times (limit 3), likely an N+1'):
+            with QueryGuard(max_queries=None):
+                for task in Task.objects.all():
+                    str(task.assigned_to)
+
+    def test_joined_relations_pass(self):
+        with QueryGuard(max_queries=1) as guard:
+            for task in Task.objects.select_related('assigned_to'):
+                str(task.assigned_to)
+        self.assertEqual(len(guard), 1)
+
+    def test_query_limit(self):
+        with self.assertRaisesMessage(AssertionError, '3 queries, more than the limit of 2'):
+            with QueryGuard(max_queries=2, max_repeats=None):
+                for model in (Task, BugReport, Note):
+                    model.objects.count()
+
+    def test_slow_queries(self):
+        with self.assertRaisesMessage(AssertionError, 'Query took'):
+            with QueryGuard(slow_query_ms=-1):
+                Task.objects.count()
+
+    def test_guarded_client(self):
+        client = GuardedClient.limited(max_queries=1)()
+        with self.assertRaisesMessage(AssertionError, 'GET /tasks/: 2 queries, more than the limit of 1'):
+            client.get(reverse('task-list'))
+
+
+class SeededPagesTestCase(QueryGuardMixin, TestCase):
+    """Every list, search, dashboard and admin page at a few hundred items per model."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_superuser(username='admin', password='testpass123')]
+        cls.items = seed_items(count=300)
+
+    def setUp(self):
+        self.client.force_login(self.users[0])
+
+    def test_seeded_volumes(self):
+        self.assertIsInstance(self.client, GuardedClient)
+        for model in (Task, BugReport, Note):
+            self.assertEqual(model.objects.count(), 300)
+        self.assertTrue(Task.objects.filter(assigned_to__isnull=True).exists())
+        for model, field in ((Task, 'status'), (Task, 'priority'), (BugReport, 'severity'), (Note, 'note_type')):
+            choices = {value for value, _ in model._meta.get_field(field).choices}
+            self.assertEqual(set(model.objects.values_list(field, flat=True)), choices)
+
+    def test_list_and_detail_pages(self):
+        for prefix, model in (('task', Task), ('bug', BugReport), ('note', Note)):
+            with self.subTest(prefix=prefix):
+                response = self.client.get(reverse(f'{prefix}-list'), {'page_size': 100, 'page': 2})
+                self.assertEqual(len(response.context['object_list']), 100)
+                obj = self.items[model][150]
+                self.assertEqual(self.client.get(reverse(f'{prefix}-detail', args=[obj.pk])).status_code, 200)
+
+    def test_api_lists(self):
+        for prefix in ('task', 'bug', 'note'):
+            with self.subTest(prefix=prefix):
+                response = self.client.get(reverse(f'api-{prefix}-list'), {'page_size': 100})
+                self.assertEqual(len(response.json()['results']), 100)
+                response = self.client.get(reverse(f'api-{prefix}-list'), {'q': 'design', 'page_size': 100})
+                self.assertTrue(response.json()['results'])
+
+    def test_search(self):
+        response = self.client.get(reverse('search'), {'q': 'review'})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(reverse('api-search'), {'q': 'review', 'page': 3})
+        self.assertEqual(len(response.json()['results']), 25)
+
+    def test_dashboard(self):
+        self.assertContains(self.client.get(reverse('home')), 'Dashboard')
+
+    def test_admin_changelists(self):
+        for url_name in ('admin:tasks_task_changelist', 'admin:tasks_bugreport_changelist',
+                         'admin:tasks_note_changelist'):
+            with self.subTest(url=url_name):
+                response = self.client.get(reverse(url_name))
+                self.assertEqual(response.context['cl'].result_count, 300)
@@ -0,0 +1,130 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.paginator import InvalidPage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from tasks.models import Task, BugReport, Note
+from tasks.search import build_match_expression, fts_available, fts_table, search_all, search_queryset
+
+
+class SearchIndexTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.title_match = Task.objects.create(
+            title='Design homepage', description='Layout work', owner=self.user
+        )
+        self.description_match = Task.objects.create(
+            title='Fix login', description='Needs a design review', owner=self.user
+        )
+        Task.objects.create(title='Unrelated', description='Nothing here', owner=self.user)
+
+    def test_index_is_available(self):
+        self.assertTrue(fts_available())
+
+    def test_title_matches_rank_first(self):
+        results = list(search_queryset(Task.objects.all(), 'design'))
+        self.assertEqual(results, [self.title_match, self.description_match])
+
+    def test_prefix_match(self):
+        results = search_queryset(Task.objects.all(), 'desi')
+        self.assertEqual(results.count(), 2)
+
+    def test_index_follows_updates_and_deletes(self):
+        self.description_match.description = 'Needs a code review'
+        self.description_match.save()
+        self.title_match.delete()
+        self.assertFalse(search_queryset(Task.objects.all(), 'design').exists())
+
+    def test_punctuation_is_not_fts_syntax(self):
+        self.assertEqual(build_match_expression('design" OR *'), '"design"* "OR"*')
+        self.assertEqual(build_match_expression('   '), '')
+        self.assertFalse(search_queryset(Task.objects.all(), '"*').exists())
+
+    def test_search_view_uses_index(self):
+        BugReport.objects.create(title='Design bug', description='Broken', owner=self.user)
+        Note.objects.create(title='Meeting', description='design sync', owner=self.user)
+        response = self.client.get(reverse('search'), {'q': 'design'})
+        self.assertEqual(response.status_code, 200)
+        types = [hit.model_name for hit in response.context['hits']]
+        self.assertEqual(sorted(types), ['bugreport', 'note', 'task', 'task'])
+
+    def test_api_query_is_ranked(self):
+        response = self.client.get(reverse('api-task-list'), {'q': 'design'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            [self.title_match.id, self.description_match.id],
+        )
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {fts_table(Task)}({fts_table(Task)}) VALUES ('delete-all')")
+        self.assertFalse(search_queryset(Task.objects.all(), 'design').exists())
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(search_queryset(Task.objects.all(), 'design').count(), 2)
+
+
+class UnifiedSearchTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.old_title = Note.objects.create(title='Release plan', description='Q1', owner=self.user)
+        Note.objects.filter(pk=self.old_title.pk).update(created_at=timezone.now() - timedelta(days=365))
+        self.new_title = BugReport.objects.create(title='Release blocker', description='Crash', owner=self.user)
+        self.description_hit = Task.objects.create(
+            title='Write changelog', description='For the release', owner=self.user
+        )
+
+    def test_title_tier_then_recency(self):
+        hits = list(search_all('release'))
+        self.assertEqual(
+            [hit.obj for hit in hits],
+            [self.new_title, self.old_title, self.description_hit],
+        )
+        self.assertGreater(hits[1].score, hits[2].score)
+
+    def test_pages_are_disjoint(self):
+        first = search_all('release', page_number=1, page_size=2)
+        second = search_all('release', page_number=2, page_size=2)
+        self.assertTrue(first.has_next())
+        self.assertFalse(second.has_next())
+        self.assertEqual([hit.obj for hit in second], [self.description_hit])
+
+    @override_settings(SEARCH_MAX_PAGES=2)
+    def test_pages_stop_at_the_limit(self):
+        self.assertFalse(search_all('release', page_number=2, page_size=1).has_next())
+        with self.assertRaises(InvalidPage):
+            search_all('release', page_number=3, page_size=1)
+        for name in ('api-search', 'api-async-search', 'search'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name), {'q': 'release', 'page': 1000000})
+                self.assertEqual(response.status_code, 404)
+
+    def test_punctuation_only_query_finds_nothing(self):
+        self.assertEqual(list(search_all('!!!')), [])
+        for name in ('api-search', 'api-async-search', 'search'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name), {'q': '!!!'})
+                self.assertEqual(response.status_code, 200)
+
+    def test_query_count_is_bounded(self):
+        for i in range(30):
+            Task.objects.create(title=f'Release task {i}', description='x', owner=self.user)
+        # One candidate query per model, then one fetch for the only model on the page.
+        with self.assertNumQueries(4):
+            page = search_all('release', page_size=10)
+        self.assertEqual(len(page), 10)
+
+    def test_search_api(self):
+        response = self.client.get(reverse('api-search'), {'q': 'release', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([item['type'] for item in data['results']], ['bugreport', 'note'])
+        self.assertTrue(data['results'][0]['url'].endswith(reverse('api-bug-detail', args=[self.new_title.pk])))
+        self.assertIsNotNone(data['next'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual([item['id'] for item in data['results']], [self.description_hit.pk])
+        self.assertIsNone(data['next'])
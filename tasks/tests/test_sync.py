@@ -0,0 +1,141 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from tasks.bulk import bulk_delete_items
+from tasks.models import Task, BugReport, Note, SyncChange
+from tasks.sync import current_cursor
+
+
+class SyncAPITestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_login(self.user)
+        self.url = reverse('api-sync')
+
+    def sync(self, cursor=0, **params):
+        response = self.client.get(self.url, {'cursor': cursor, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_full_then_incremental_sync(self):
+        task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+        bug = BugReport.objects.create(title='Test Bug', description='d', owner=self.user)
+        data = self.sync()
+        self.assertEqual([(c['type'], c['id'], c['action']) for c in data['changes']],
+                         [('task', task.pk, 'saved'), ('bugreport', bug.pk, 'saved')])
+        self.assertEqual(data['changes'][0]['data']['title'], 'Test Task')
+        self.assertFalse(data['has_more'])
+
+        cursor = data['cursor']
+        self.assertEqual(self.sync(cursor), {'cursor': cursor, 'has_more': False, 'changes': []})
+
+        task.status = 'done'
+        task.save()
+        bug_pk = bug.pk
+        bug.delete()
+        note = Note.objects.create(title='Test Note', description='d', owner=self.user)
+        # session, user, the log, then one per model with saved items in it.
+        with self.assertNumQueries(5):
+            changes = self.client.get(self.url, {'cursor': cursor}).data['changes']
+        self.assertEqual([(c['type'], c['id'], c['action']) for c in changes],
+                         [('task', task.pk, 'saved'), ('bugreport', bug_pk, 'deleted'), ('note', note.pk, 'saved')])
+        self.assertEqual(changes[0]['data']['status'], 'done')
+        self.assertIsNone(changes[1]['data'])
+
+    def test_only_the_last_change_of_an_item_is_returned(self):
+        task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+        pk = task.pk
+        for status in ('in_progress', 'review', 'done'):
+            task.status = status
+            task.save()
+        [change] = self.sync()['changes']
+        self.assertEqual(change['data']['status'], 'done')
+
+        task.delete()
+        [change] = self.sync()['changes']
+        self.assertEqual((change['id'], change['action']), (pk, 'deleted'))
+
+    def test_paging(self):
+        for i in range(5):
+            Task.objects.create(title=f'Task {i}', description='d', owner=self.user)
+        data = self.sync(limit=2)
+        self.assertTrue(data['has_more'])
+        seen = [c['data']['title'] for c in data['changes']]
+        while data['has_more']:
+            data = self.sync(data['cursor'], limit=2)
+            seen += [c['data']['title'] for c in data['changes']]
+        self.assertEqual(seen, [f'Task {i}' for i in range(5)])
+
+    @override_settings(SYNC_MAX_PAGE_SIZE=3)
+    def test_limit_is_capped(self):
+        for i in range(5):
+            Task.objects.create(title=f'Task {i}', description='d', owner=self.user)
+        self.assertEqual(len(self.sync(limit=100)['changes']), 3)
+
+    def test_saved_then_deleted_in_a_later_page(self):
+        task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+        Task.objects.create(title='Other', description='d', owner=self.user)
+        task.delete()
+        data = self.sync(limit=1)
+        self.assertEqual(data['changes'], [])
+        self.assertTrue(data['has_more'])
+
+    def test_bulk_writes_and_assignee_deletion_are_recorded(self):
+        other = User.objects.create_user(username='otheruser', password='testpass123')
+        task = Task.objects.create(title='Test Task', description='d', owner=self.user, assigned_to=other)
+        cursor = self.sync()['cursor']
+        self.client.post(reverse('api-note-bulk'), json.dumps([{'title': 'Bulk note', 'description': 'd'}]),
+                         content_type='application/json')
+        other.delete()
+        changes = self.sync(cursor)['changes']
+        self.assertEqual([(c['type'], c['action']) for c in changes], [('note', 'saved'), ('task', 'saved')])
+        self.assertIsNone(changes[1]['data']['assigned_to'])
+        self.assertEqual(changes[1]['id'], task.pk)
+
+    def test_bulk_delete_writes_one_tombstone_per_item(self):
+        tasks = [Task.objects.create(title=f'Test Task {i}', description='d', owner=self.user) for i in range(3)]
+        before = SyncChange.objects.count()
+        bulk_delete_items(Task, [task.pk for task in tasks], self.user)
+        self.assertEqual(SyncChange.objects.count(), before + 3)
+        self.assertEqual(SyncChange.objects.filter(action='deleted').count(), 3)
+
+    @override_settings(SYNC_COMMIT_LAG=60)
+    def test_recent_changes_wait_out_the_commit_lag(self):
+        tasks = [Task.objects.create(title=f'Test Task {i}', description='d', owner=self.user) for i in range(3)]
+        rows = list(SyncChange.objects.order_by('id'))
+        SyncChange.objects.filter(pk__in=[row.pk for row in rows[:2]]).update(
+            changed_at=timezone.now() - timedelta(minutes=5))
+        data = self.sync()
+        self.assertEqual([c['id'] for c in data['changes']], [tasks[0].pk, tasks[1].pk])
+        self.assertEqual(data['cursor'], rows[1].pk)
+        self.assertFalse(data['has_more'])
+        self.assertEqual(current_cursor(), rows[1].pk)
+        SyncChange.objects.filter(pk=rows[2].pk).update(changed_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual([c['id'] for c in self.sync(data['cursor'])['changes']], [tasks[2].pk])
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': -1}).status_code, 400)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_compact_keeps_the_latest_row_per_item(self):
+        task = Task.objects.create(title='Test Task', description='d', owner=self.user)
+        task.save()
+        task.save()
+        note = Note.objects.create(title='Test Note', description='d', owner=self.user)
+        note.delete()
+        before = self.sync()
+        out = StringIO()
+        call_command('compact_sync_log', batch_size=1, stdout=out)
+        self.assertIn('Deleted 3', out.getvalue())
+        self.assertEqual(SyncChange.objects.count(), 2)
+        self.assertEqual(self.sync(), before)
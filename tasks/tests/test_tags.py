@@ -0,0 +1,140 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tasks.models import Note, NoteTag, Tag
+from tasks.signals import items_bulk_changed
+from tasks.tags import autocomplete, notes_tagged, parse_tags, prefix_range, tag_counts
+
+backfill_migration = import_module('tasks.migrations.0013_tags')
+
+
+def tag_names(note):
+    return sorted(note.tag_set.values_list('name', flat=True))
+
+
+class ParseTagsTestCase(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(parse_tags('Work, urgent ,, #Data Science'), ['work', 'urgent', 'data-science'])
+        self.assertEqual(parse_tags('django  ORM django'), ['django', 'orm'])
+        self.assertEqual(parse_tags(''), [])
+        self.assertEqual(parse_tags(None), [])
+        self.assertEqual(parse_tags('x' * 80), ['x' * 50])
+
+    def test_migration_parses_like_the_app(self):
+        for text in ('Work, urgent ,, #Data Science', 'django  ORM django', '', '#a,#A'):
+            self.assertEqual(backfill_migration.parse_tags(text), parse_tags(text))
+
+    def test_prefix_range(self):
+        self.assertEqual(prefix_range('dj'), {'name__gte': 'dj', 'name__lt': 'dk'})
+
+
+class TagSyncTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def make_note(self, tags='', title='Note'):
+        return Note.objects.create(title=title, description='d', owner=self.user, tags=tags)
+
+    def test_create_and_update(self):
+        note = self.make_note('Work, urgent')
+        self.assertEqual(tag_names(note), ['urgent', 'work'])
+        note.tags = 'work, later'
+        note.save()
+        self.assertEqual(tag_names(note), ['later', 'work'])
+        self.assertEqual(Tag.objects.count(), 3)
+        note.tags = ''
+        note.save()
+        self.assertEqual(tag_names(note), [])
+
+    def test_unchanged_tags_cost_nothing(self):
+        note = self.make_note('work')
+        note.title = 'Renamed'
+        note.tags = 'Work'
+        with self.assertNumQueries(3):  # the counters reading the row, UPDATE, sync log
+            note.save()
+        with self.assertNumQueries(3):
+            note.save(update_fields=['title'])
+        deferred = Note.objects.only('title').get(pk=note.pk)
+        deferred.title = 'Again'
+        with self.assertNumQueries(3):  # the same read covers the deferred note_type
+            deferred.save()
+        self.assertEqual(tag_names(note), ['work'])
+
+    def test_delete_cascades(self):
+        note = self.make_note('work')
+        note.delete()
+        self.assertFalse(NoteTag.objects.exists())
+        self.assertEqual(tag_counts(), [])
+
+    def test_bulk_changes(self):
+        notes = Note.objects.bulk_create([
+            Note(title='A', description='d', owner=self.user, tags='alpha, beta'),
+            Note(title='B', description='d', owner=self.user, tags='beta'),
+            Note(title='C', description='d', owner=self.user),
+        ])
+        items_bulk_changed.send(sender=Note, action='created', objects=notes)
+        self.assertEqual(tag_counts(), [('beta', 2), ('alpha', 1)])
+
+        notes[0].tags = 'gamma'
+        Note.objects.bulk_update(notes, ['tags'])
+        items_bulk_changed.send(sender=Note, action='updated', objects=notes, fields=['tags'])
+        self.assertEqual(tag_counts(), [('beta', 1), ('gamma', 1)])
+
+    def test_bulk_api(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('api-note-bulk'), [
+            {'title': 'First note', 'description': 'd', 'tags': 'alpha'},
+            {'title': 'Second note', 'description': 'd', 'tags': 'alpha, beta'},
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(tag_counts(), [('alpha', 2), ('beta', 1)])
+
+    def test_backfill(self):
+        note = self.make_note()
+        Note.objects.filter(pk=note.pk).update(tags='Legacy, #Old Stuff')
+        backfill_migration.backfill(apps, connection.schema_editor())
+        self.assertEqual(tag_names(note), ['legacy', 'old-stuff'])
+
+
+class TagQueryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpass123')
+        for title, tags in (('A', 'django, orm'), ('B', 'django'), ('C', 'docs'), ('D', 'Django, ORM, dj')):
+            Note.objects.create(title=title, description='d', owner=cls.user, tags=tags)
+        Tag.objects.create(name='unused')
+
+    def titles(self, queryset):
+        return sorted(queryset.values_list('title', flat=True))
+
+    def test_notes_tagged(self):
+        self.assertEqual(self.titles(notes_tagged(Note.objects.all(), ['django'])), ['A', 'B', 'D'])
+        self.assertEqual(self.titles(notes_tagged(Note.objects.all(), ['Django', 'orm'])), ['A', 'D'])
+        self.assertEqual(self.titles(notes_tagged(Note.objects.all(), ['missing'])), [])
+
+    def test_counts_and_autocomplete(self):
+        self.assertEqual(tag_counts(), [('django', 3), ('orm', 2), ('dj', 1), ('docs', 1)])
+        self.assertEqual(tag_counts(prefix='D', limit=2), [('django', 3), ('dj', 1)])
+        self.assertEqual(autocomplete('dj'), ['dj', 'django'])
+        self.assertEqual(autocomplete('un'), [])
+        self.assertEqual(autocomplete(''), [])
+
+    def test_api(self):
+        client = APIClient()
+        response = client.get(reverse('api-note-list'), {'tag': ['django', 'orm']})
+        self.assertEqual(sorted(note['title'] for note in response.json()['results']), ['A', 'D'])
+        response = client.get(reverse('api-tag-list'), {'prefix': 'd', 'limit': 1})
+        self.assertEqual(response.json(), [{'name': 'django', 'count': 3}])
+        response = client.get(reverse('api-tag-autocomplete'), {'q': 'do'})
+        self.assertEqual(response.json(), ['docs'])
+
+    def test_admin_search(self):
+        admin = User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:tasks_note_changelist'), {'q': 'ORM'})
+        self.assertEqual(response.context['cl'].result_count, 2)
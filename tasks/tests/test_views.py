@@ -1,9 +1,10 @@
-from django.test import TestCase, Client
+from django.test import TestCase
 from django.contrib.auth.models import User
 from django.urls import reverse
 from tasks.models import Task, BugReport, Note
+from tasks.tests.query_guard import QueryGuardMixin
 
-class ViewTestCase(TestCase):
+class ViewTestCase(QueryGuardMixin, TestCase):
     def setUp(self):
 
         self.user = User.objects.create_user(
@@ -42,7 +43,7 @@ class ViewTestCase(TestCase):
             is_pinned=False
         )
 
-        self.client = Client()
+        self.client = self.client_class()
 
     def test_home_view(self):
         response = self.client.get(reverse('home'))
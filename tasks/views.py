@@ -1,40 +1,113 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from .models import Task, BugReport, Note
-from django.db.models import Q
+from .activity import log_activity
+from .conditional import ObjectConditionalMixin, make_etag
+from .counters import DIMENSIONS, ROLES, user_counters
+from .metrics import registry, render_prometheus
+from .pagination import get_page_size
+from .query_shaping import QueryShape, QueryShapeMixin
+from .search import asearch_all
 from django.db import IntegrityError
+from django.utils.crypto import constant_time_compare
 import logging
 
 
-logger = logging.getLogger('project')
 
+def dashboard_sections(user):
+    """The user's counters, labelled for the home page; one query."""
+    counts = user_counters(user)
+    sections = []
+    for model, dimensions in DIMENSIONS.items():
+        for role, _ in ROLES[model]:
+            by_dimension = counts[role][model._meta.model_name]
+            title = model._meta.verbose_name_plural.capitalize()
+            if role == 'assignee':
+                title = f"{title} assigned to me"
+            breakdowns = [
+                (model._meta.get_field(dimension).verbose_name.capitalize(),
+                 [(label, by_dimension[dimension][value]) for value, label in model._meta.get_field(dimension).choices])
+                for dimension in dimensions
+            ]
+            total = sum(by_dimension[dimensions[0]].values())
+            sections.append({'title': title, 'total': total, 'breakdowns': breakdowns})
+    return sections
 
 
 def home(request):
-    logger.info(f"User '{request.user}' visited the home page")
-    return render(request, "base.html")
+    log_activity(request.user, 'visited', f"User '{request.user}' visited the home page")
+    sections = dashboard_sections(request.user) if request.user.is_authenticated else []
+    return render(request, "home.html", {'sections': sections})
 
 
-class BaseOwnerMixin(LoginRequiredMixin, UserPassesTestMixin):
+def metrics(request):
+    """
+    Per-view request metrics in the Prometheus text format. Staff only; a
+    scraper can instead send ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+    token = settings.METRICS_TOKEN
+    authorized = request.user.is_staff or (
+        token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    )
+    if not authorized:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(registry.snapshot()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class CachedObjectMixin:
+    """
+    Load the view's object once per request: the owner check, the logging and
+    the generic view itself all call get_object(), but only the first one queries.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+
+class BaseOwnerMixin(CachedObjectMixin, LoginRequiredMixin, UserPassesTestMixin):
 
     def test_func(self):
         obj = self.get_object()
-        return self.request.user == obj.owner
+        return self.request.user.pk == obj.owner_id
 
 
-class BaseListView(ListView):
+class BaseListView(QueryShapeMixin, ListView):
+    paginate_by = settings.PAGE_SIZE
+    ordering = ('-created_at', '-id')
+    # List pages only show titles and choice fields.
+    query_shape = QueryShape(defer=('description',))
+
+    def get_paginate_by(self, queryset):
+        return get_page_size(self.request, default=self.paginate_by)
 
     def get_queryset(self):
         queryset = super().get_queryset()
         query = self.request.GET.get("q")
 
         if query:
-            logger.info(f"User '{self.request.user}' searched for '{query}' in {self.model.__name__}")
+            log_activity(
+                self.request.user, 'searched',
+                f"User '{self.request.user}' searched for '{query}' in {self.model.__name__}",
+                model=self.model, query=query,
+            )
             queryset = queryset.filter(title__icontains=query)
         else:
-            logger.info(f"User '{self.request.user}' viewed list of {self.model.__name__}s")
+            log_activity(
+                self.request.user, 'viewed',
+                f"User '{self.request.user}' viewed list of {self.model.__name__}s",
+                model=self.model,
+            )
 
         return queryset
 
@@ -45,14 +118,18 @@ class BaseCreateView(LoginRequiredMixin, CreateView):
         form.instance.owner = self.request.user
         try:
             response = super().form_valid(form)
-            logger.info(
-                f"User '{self.request.user}' created {self.model.__name__} titled '{form.instance.title}'"
+            log_activity(
+                self.request.user, 'created',
+                f"User '{self.request.user}' created {self.model.__name__} titled '{form.instance.title}'",
+                model=self.model, obj=form.instance,
             )
             return response
         except IntegrityError:
             form.add_error('title', 'You already have an item with this title.')
-            logger.warning(
-                f"User '{self.request.user}' tried to create a duplicate {self.model.__name__} titled '{form.instance.title}'"
+            log_activity(
+                self.request.user, 'duplicate',
+                f"User '{self.request.user}' tried to create a duplicate {self.model.__name__} titled '{form.instance.title}'",
+                model=self.model, level=logging.WARNING,
             )
             return self.form_invalid(form)
 
@@ -61,23 +138,44 @@ class BaseUpdateView(BaseOwnerMixin, UpdateView):
 
     def form_valid(self, form):
         response = super().form_valid(form)
-        logger.info(f"User '{self.request.user}' updated {self.model.__name__} titled '{form.instance.title}'")
+        log_activity(
+            self.request.user, 'updated',
+            f"User '{self.request.user}' updated {self.model.__name__} titled '{form.instance.title}'",
+            model=self.model, obj=form.instance,
+        )
         return response
 
 
 class BaseDeleteView(BaseOwnerMixin, DeleteView):
 
-    def delete(self, request, *args, **kwargs):
-        instance = self.get_object()
-        logger.info(f"User '{request.user}' deleted {self.model.__name__} titled '{instance.title}'")
-        return super().delete(request, *args, **kwargs)
+    def form_valid(self, form):
+        # DeleteView handles POST through form_valid(), not delete().
+        log_activity(
+            self.request.user, 'deleted',
+            f"User '{self.request.user}' deleted {self.model.__name__} titled '{self.object.title}'",
+            model=self.model, obj=self.object,
+        )
+        return super().form_valid(form)
+
 
+class BaseDetailView(ObjectConditionalMixin, CachedObjectMixin, QueryShapeMixin, DetailView):
 
-class BaseDetailView(DetailView):
+    def get_validators(self):
+        # A queued flash message must still be shown, so no 304 then.
+        if len(messages.get_messages(self.request)):
+            return None, None
+        # The page also depends on who is looking (edit links, navbar, the CSRF token
+        # in the logout form), so the ETag does too; Last-Modified alone would not.
+        etag, _ = super().get_validators()
+        return make_etag(etag, self.request.user.pk, self.request.META.get('CSRF_COOKIE', '')), None
 
     def get(self, request, *args, **kwargs):
         instance = self.get_object()
-        logger.info(f"User '{request.user}' viewed details of {self.model.__name__} titled '{instance.title}'")
+        log_activity(
+            request.user, 'viewed',
+            f"User '{request.user}' viewed details of {self.model.__name__} titled '{instance.title}'",
+            model=self.model, obj=instance,
+        )
         return super().get(request, *args, **kwargs)
 
 
@@ -91,6 +189,7 @@ class TaskListView(BaseListView):
 class TaskDetailView(BaseDetailView):
     model = Task
     template_name = "tasks/task_detail.html"
+    query_shape = QueryShape(select_related=('assigned_to',))
 
 
 class TaskCreateView(BaseCreateView):
@@ -120,6 +219,7 @@ class BugReportListView(BaseListView):
     model = BugReport
     template_name = "bugs/bug_list.html"
     context_object_name = "bugs"
+    query_shape = QueryShape(defer=('description', 'expected_result'))
 
 
 class BugReportDetailView(BaseDetailView):
@@ -177,27 +277,28 @@ class NoteDeleteView(BaseDeleteView):
     template_name = "notes/note_confirm_delete.html"
     success_url = reverse_lazy("note-list")
 
-def search_view(request):
+async def search_view(request):
     query = request.GET.get('q', '').strip()
-    notes = tasks = bugs = []
+    page_obj = None
 
     if query:
-        notes = Note.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        )
-        tasks = Task.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        )
-        bugs = BugReport.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        )
+        try:
+            page_number = int(request.GET.get('page', 1))
+        except ValueError:
+            page_number = 1
+        # The three models are searched concurrently.
+        try:
+            page_obj = await asearch_all(query, page_number, get_page_size(request))
+        except InvalidPage as exc:
+            raise Http404(str(exc))
 
     context = {
         'query': query,
-        'notes': notes,
-        'tasks': tasks,
-        'bugs': bugs,
+        'hits': page_obj or [],
+        'page_obj': page_obj,
     }
 
-    logger.info(f"User '{request.user}' searched for '{query}'")
-    return render(request, 'search_results.html', context)
\ No newline at end of file
+    user = await request.auser()
+    await sync_to_async(log_activity)(user, 'searched', f"User '{user}' searched for '{query}'", query=query)
+    # Rendering reads the session and user lazily, which the async ORM does not allow.
+    return await sync_to_async(render)(request, 'search_results.html', context)